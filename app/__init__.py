@@ -99,6 +99,18 @@ except ImportError:
             return decorator
     limiter = DummyLimiter()
 
+# Per-request SQL statement counters / N+1 detection (see app/sql_instrumentation.py)
+from app import sql_instrumentation
+sql_instrumentation.init_app(app)
+
+# Byte budgets + background LRU sweep for the audio cache dirs (see app/disk_cache.py)
+from app import disk_cache
+disk_cache.init_app(app)
+
+# Bounded, persistent queue for 16PF voice analyses (see app/pf16_queue.py)
+from app import pf16_queue
+pf16_queue.init_app(app)
+
 from app import routes, models, errors, queries, api_integration
 
 
@@ -319,7 +319,7 @@ def sync_cluster_metadata_to_q3(cluster_internal_id):
     Build cluster metadata payload and POST to Q3 when cluster is created/updated.
     Payload matches schemas/cluster_metadata_sync.json.
     """
-    import requests
+    from app import http_client
     base = os.environ.get('Q3_BASE_URL', '').strip().rstrip('/')
     if not base:
         return False
@@ -406,7 +406,7 @@ def sync_cluster_metadata_to_q3(cluster_internal_id):
         headers = {"Content-Type": "application/json"}
         if Q3_INTEGRATION_SECRET:
             headers["Authorization"] = f"Bearer {Q3_INTEGRATION_SECRET}"
-        r = requests.post(url, json=payload, headers=headers, timeout=15)
+        r = http_client.post(url, json=payload, headers=headers, timeout=15)
         if r.status_code in (200, 201):
             return True
         return False
@@ -1087,9 +1087,9 @@ def send_results_to_aio(play_id, user_id, roleplay_id, scores):
         print(f"[CALLBACK] Payload: {result_payload}")
         
         # Send to callback URL
-        import requests
+        from app import http_client
         print(f"[CALLBACK] Sending POST to {callback_url}...")
-        response = requests.post(
+        response = http_client.post(
             callback_url,
             json=result_payload,
             headers={
@@ -1126,7 +1126,7 @@ def build_result_payload(play_id, user_id, roleplay_id, scores):
     """Build result JSON for ALL completed roleplays in the cluster (Q3 format: results_submission.json)."""
     from app.queries import (get_play_info, query_showreport, get_user, get_roleplay, 
                              get_cluster_by_id_or_external, get_16pf_analysis_by_play_id,
-                             get_16pf_config_for_roleplay)
+                             get_16pf_config_for_roleplay, get_play_summaries)
 
     user = get_user(user_id) if user_id else None
     cluster_id_val = session.get('cluster_id')
@@ -1166,6 +1166,7 @@ def build_result_payload(play_id, user_id, roleplay_id, scores):
                 ORDER BY p.roleplay_id, p.end_time DESC
             """, (user_id, internal_cluster_id))
             completed_plays = cur.fetchall()
+            summaries = get_play_summaries([p['play_id'] for p in completed_plays])
             
             # Group by roleplay_id (take latest play per roleplay)
             seen_roleplays = set()
@@ -1188,18 +1189,24 @@ def build_result_payload(play_id, user_id, roleplay_id, scores):
                     duration_seconds = int((play['end_time'] - play['start_time']).total_seconds())
                     duration_minutes = duration_seconds // 60
                 
-                # Get competency scores from report
-                report = query_showreport(play['play_id'])
+                # Get competency scores from the play summary once it carries the Tags-sheet
+                # maxima, falling back to the full report
+                summary = summaries.get(play['play_id'])
+                if summary and summary.get('competencies') and summary.get('tags_maxima'):
+                    comp_totals = summary['competencies']
+                else:
+                    report = query_showreport(play['play_id'])
+                    comp_totals = report[1] if report else None
                 competency_scores = []
                 total_marks_obtained = 0
                 total_max_marks = 0
-                if report and report[1]:
-                    for idx, comp in enumerate(report[1]):
+                if comp_totals:
+                    for idx, comp in enumerate(comp_totals):
                         if not isinstance(comp, dict):
                             continue
                         name = comp.get('name', 'Unknown')
                         marks = int(comp.get('score', 0))
-                        total = int(comp.get('total_possible', 3))
+                        total = int(comp.get('total_possible') or 3)
                         code = _slug_code(name, idx)
                         competency_scores.append({
                             "competency_code": code,
@@ -1254,12 +1261,52 @@ def build_result_payload(play_id, user_id, roleplay_id, scores):
 
 # ===================== SCORES FETCH APIs =====================
 
+def _play_scores(cur, play_id, summary=None):
+    """
+    Return (interaction_count, overall_score, competencies) for a play, where
+    competencies is {name: {'score', 'count', 'max_score'}}.
+    Uses the play_summary row when available, otherwise aggregates the transcript.
+    """
+    if summary:
+        competencies = {
+            c['name']: {'score': c['score'], 'count': c['count'], 'max_score': 3}
+            for c in summary.get('competencies', [])
+        }
+        return summary['interaction_count'], summary.get('last_overall_score') or 0, competencies
+
+    cur.execute("SELECT COUNT(*) as count FROM chathistory WHERE play_id = %s", (play_id,))
+    interaction_count = cur.fetchone()['count']
+
+    cur.execute("""
+        SELECT sb.score_name as competency, sb.score, sm.overall_score
+        FROM scorebreakdown sb
+        JOIN scoremaster sm ON sb.scoremaster_id = sm.id
+        JOIN chathistory ch ON sm.chathistory_id = ch.id
+        WHERE ch.play_id = %s
+    """, (play_id,))
+    score_rows = cur.fetchall()
+
+    competencies = {}
+    overall_score = 0
+    for row in score_rows:
+        comp = row['competency']
+        if comp not in competencies:
+            competencies[comp] = {'score': 0, 'count': 0, 'max_score': 3}
+        competencies[comp]['score'] += row['score']
+        competencies[comp]['count'] += 1
+        if row['overall_score']:
+            overall_score = row['overall_score']
+    return interaction_count, overall_score, competencies
+
+
 @app.route('/api/rolevo/scores/cluster/<cluster_id>', methods=['GET'])
 @csrf.exempt
 @jwt_required
 def api_get_scores_by_cluster(cluster_id):
     """Fetch all scores for a cluster grouped by user and roleplay"""
     
+    from app.queries import get_play_summaries
+
     try:
         conn = get_db_connection()
         cur = conn.cursor(dictionary=True)
@@ -1281,6 +1328,7 @@ def api_get_scores_by_cluster(cluster_id):
             ORDER BY u.email, p.roleplay_id, p.end_time DESC
         """, (cluster['id'],))
         plays = cur.fetchall()
+        summaries = get_play_summaries([p['play_id'] for p in plays])
         
         # Group by user, then by roleplay
         users = {}
@@ -1293,28 +1341,8 @@ def api_get_scores_by_cluster(cluster_id):
             
             if rp_id not in users[user_key]['roleplays']:
                 # Get interaction count and scores
-                cur.execute("SELECT COUNT(*) as count FROM chathistory WHERE play_id = %s", (play['play_id'],))
-                interaction_count = cur.fetchone()['count']
-                
-                cur.execute("""
-                    SELECT sb.score_name as competency, sb.score, sm.overall_score
-                    FROM scorebreakdown sb
-                    JOIN scoremaster sm ON sb.scoremaster_id = sm.id
-                    JOIN chathistory ch ON sm.chathistory_id = ch.id
-                    WHERE ch.play_id = %s
-                """, (play['play_id'],))
-                score_rows = cur.fetchall()
-                
-                competencies = {}
-                overall_score = 0
-                for row in score_rows:
-                    comp = row['competency']
-                    if comp not in competencies:
-                        competencies[comp] = {'score': 0, 'count': 0, 'max_score': 3}
-                    competencies[comp]['score'] += row['score']
-                    competencies[comp]['count'] += 1
-                    if row['overall_score']:
-                        overall_score = row['overall_score']
+                interaction_count, overall_score, competencies = _play_scores(
+                    cur, play['play_id'], summaries.get(play['play_id']))
                 
                 # Calculate time taken
                 time_taken_seconds = None
@@ -1372,6 +1400,8 @@ def api_get_scores_by_cluster(cluster_id):
 def api_get_scores_by_user(user_id):
     """Fetch all scores for a user grouped by roleplay with competency breakdowns"""
     
+    from app.queries import get_play_summaries
+
     try:
         conn = get_db_connection()
         cur = conn.cursor(dictionary=True)
@@ -1394,37 +1424,16 @@ def api_get_scores_by_user(user_id):
             ORDER BY p.end_time DESC
         """, (user['id'],))
         plays = cur.fetchall()
+        summaries = get_play_summaries([p['play_id'] for p in plays])
         
         # Group plays by roleplay and get detailed scores
         roleplays = {}
         for play in plays:
             rp_id = play['roleplay_id']
             if rp_id not in roleplays:
-                # Get interaction count
-                cur.execute("SELECT COUNT(*) as count FROM chathistory WHERE play_id = %s", (play['play_id'],))
-                interaction_count = cur.fetchone()['count']
-                
-                # Get competency scores for this play
-                cur.execute("""
-                    SELECT sb.score_name as competency, sb.score, sm.overall_score
-                    FROM scorebreakdown sb
-                    JOIN scoremaster sm ON sb.scoremaster_id = sm.id
-                    JOIN chathistory ch ON sm.chathistory_id = ch.id
-                    WHERE ch.play_id = %s
-                """, (play['play_id'],))
-                score_rows = cur.fetchall()
-                
-                # Aggregate competency scores
-                competencies = {}
-                overall_score = 0
-                for row in score_rows:
-                    comp = row['competency']
-                    if comp not in competencies:
-                        competencies[comp] = {'score': 0, 'count': 0, 'max_score': 3}
-                    competencies[comp]['score'] += row['score']
-                    competencies[comp]['count'] += 1
-                    if row['overall_score']:
-                        overall_score = row['overall_score']
+                # Get interaction count and aggregated competency scores for this play
+                interaction_count, overall_score, competencies = _play_scores(
+                    cur, play['play_id'], summaries.get(play['play_id']))
                 
                 # Format competencies as list with code, name, max_score, score_obtained
                 competency_list = [
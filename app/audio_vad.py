@@ -0,0 +1,313 @@
+"""
+Energy-based voice-activity trimming of user recordings.
+
+Recordings carry long silences (thinking time, the computer's turn playing back)
+that inflate what is uploaded to Whisper (LLMInteractor.transcribe_audio) and
+to Persona360 for 16PF. trim_silence() decodes the file to mono 16-bit PCM with
+ffmpeg, computes per-frame RMS energy with NumPy, and keeps only the speech:
+
+- the threshold adapts to the recording's own noise floor (10th percentile of
+  frame energy + VAD_MARGIN_DB, never below VAD_FLOOR_DBFS);
+- speech runs are padded by VAD_PAD_MS so word onsets are not clipped;
+- leading and trailing silence is dropped, pauses up to VAD_MAX_GAP_MS are kept
+  as they are and longer gaps are shortened to VAD_KEEP_GAP_MS.
+
+The trimmed copy is written next to the source as <name>.trimmed.mp3 with a
+<name>.trimmed.json sidecar holding the kept segments, so any time in the trimmed
+audio maps back to the original recording (to_original_time()). Both are reused
+while the source is unchanged. If NumPy or ffmpeg is missing, or trimming would
+save less than VAD_MIN_SAVED_SECONDS, the original file is used untouched.
+
+Callers that re-encode anyway (the 16PF payload) use find_speech() instead: it
+only returns the segments (cached in a <name>.speech.json sidecar), and
+segments_filter() turns them into an ffmpeg filter, so trimming happens in the
+caller's single encode rather than adding another lossy MP3 generation.
+
+Configuration (environment):
+    VAD                       1/0, trim recordings before STT / 16PF (default 1)
+    VAD_SAMPLE_RATE           analysis and output sample rate (default 16000)
+    VAD_FRAME_MS              energy frame length (default 30)
+    VAD_MARGIN_DB             dB above the noise floor that counts as speech (default 12)
+    VAD_FLOOR_DBFS            lowest threshold, for near-silent rooms (default -55)
+    VAD_PAD_MS                audio kept either side of speech (default 200)
+    VAD_MAX_GAP_MS            pauses up to this long are left alone (default 700)
+    VAD_KEEP_GAP_MS           longer gaps are shortened to this (default 300)
+    VAD_MIN_SAVED_SECONDS     below this saving the original is used (default 1)
+"""
+
+import json
+import os
+import subprocess
+import tempfile
+import threading
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ENABLED = os.getenv('VAD', '1') == '1'
+SAMPLE_RATE = int(os.getenv('VAD_SAMPLE_RATE', 16000))
+FRAME_MS = int(os.getenv('VAD_FRAME_MS', 30))
+MARGIN_DB = float(os.getenv('VAD_MARGIN_DB', 12))
+FLOOR_DBFS = float(os.getenv('VAD_FLOOR_DBFS', -55))
+PAD_MS = int(os.getenv('VAD_PAD_MS', 200))
+MAX_GAP_MS = int(os.getenv('VAD_MAX_GAP_MS', 700))
+KEEP_GAP_MS = int(os.getenv('VAD_KEEP_GAP_MS', 300))
+MIN_SAVED_SECONDS = float(os.getenv('VAD_MIN_SAVED_SECONDS', 1))
+FFMPEG_TIMEOUT = 120
+
+TRIMMED_SUFFIX = '.trimmed'
+SPEECH_SUFFIX = '.speech'
+
+_lock = threading.Lock()
+
+VAD_STATS = {
+    'trimmed': 0,       # files re-encoded (or segmented by find_speech) without their silences
+    'reused': 0,        # trimmed copy already on disk
+    'passthrough': 0,   # too little silence, no speech found, or trimming unavailable
+    'failed': 0,
+    'seconds_saved': 0.0,
+    'bytes_saved': 0,
+}
+
+
+def _count(stat, amount=1):
+    with _lock:
+        VAD_STATS[stat] += amount
+
+
+def decode_pcm(path, sample_rate=SAMPLE_RATE):
+    """Decode any audio file to a mono int16 NumPy array."""
+    result = subprocess.run(['ffmpeg', '-v', 'error', '-i', path, '-vn', '-ac', '1',
+                             '-ar', str(sample_rate), '-f', 's16le', '-'],
+                            capture_output=True, timeout=FFMPEG_TIMEOUT)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg decode failed: {result.stderr.decode(errors='replace')[:300]}")
+    return np.frombuffer(result.stdout, dtype=np.int16)
+
+
+def encode_mp3(samples, output_path, sample_rate=SAMPLE_RATE):
+    """Encode mono int16 samples to MP3 (written atomically)."""
+    tmp_fd, tmp_path = tempfile.mkstemp(suffix='.part.mp3', dir=os.path.dirname(output_path))
+    os.close(tmp_fd)
+    try:
+        result = subprocess.run(['ffmpeg', '-y', '-v', 'error', '-f', 's16le', '-ar', str(sample_rate),
+                                 '-ac', '1', '-i', '-', '-acodec', 'libmp3lame', '-ab', '64k', tmp_path],
+                                input=samples.astype(np.int16).tobytes(),
+                                capture_output=True, timeout=FFMPEG_TIMEOUT)
+        if result.returncode != 0 or os.path.getsize(tmp_path) == 0:
+            raise RuntimeError(f"ffmpeg encode failed: {result.stderr.decode(errors='replace')[:300]}")
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def detect_speech(samples, sample_rate=SAMPLE_RATE):
+    """Sample ranges [(start, end), ...] to keep, in order. Empty if no speech was found."""
+    frame = max(1, sample_rate * FRAME_MS // 1000)
+    n_frames = len(samples) // frame
+    if n_frames == 0:
+        return []
+
+    frames = samples[:n_frames * frame].reshape(n_frames, frame).astype(np.float32) / 32768.0
+    energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    threshold = max(float(np.percentile(energy_db, 10)) + MARGIN_DB, FLOOR_DBFS)
+    speech = energy_db > threshold
+    if not speech.any():
+        return []
+
+    pad = PAD_MS // FRAME_MS
+    if pad:
+        speech = np.convolve(speech.astype(np.int8), np.ones(2 * pad + 1, dtype=np.int8), 'same') > 0
+
+    # Run boundaries of the speech mask, in frames
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], speech.astype(np.int8), [0]))))
+    starts, ends = edges[0::2], edges[1::2]
+
+    # Merge runs separated by a natural pause; longer gaps keep only KEEP_GAP_MS
+    split = (starts[1:] - ends[:-1]) > MAX_GAP_MS // FRAME_MS
+    seg_starts = starts[np.concatenate(([True], split))]
+    seg_ends = ends[np.concatenate((split, [True]))].copy()
+    seg_ends[:-1] = np.minimum(seg_ends[:-1] + KEEP_GAP_MS // FRAME_MS, seg_starts[1:])
+
+    return [(int(s) * frame, min(int(e) * frame, len(samples))) for s, e in zip(seg_starts, seg_ends)]
+
+
+def to_original_time(seconds, segments):
+    """Map a time in the trimmed audio back to the original recording."""
+    for segment in segments:
+        if seconds < segment['offset'] + (segment['end'] - segment['start']):
+            return segment['start'] + max(0.0, seconds - segment['offset'])
+    return segments[-1]['end'] if segments else seconds
+
+
+def _segments(ranges):
+    """[{start, end, offset}] in seconds for sample ranges, and the kept length in samples."""
+    segments, offset = [], 0
+    for start, end in ranges:
+        segments.append({'start': round(start / SAMPLE_RATE, 3), 'end': round(end / SAMPLE_RATE, 3),
+                         'offset': round(offset / SAMPLE_RATE, 3)})
+        offset += end - start
+    return segments, offset
+
+
+def segments_filter(segments):
+    """ffmpeg audio filter keeping only the given segments of the original, back to back."""
+    keep = '+'.join(f"between(t\\,{segment['start']:.3f}\\,{segment['end']:.3f})" for segment in segments)
+    return f"aselect='{keep}',asetpts=N/SR/TB"
+
+
+def find_speech(source_path):
+    """Speech segments of a recording, without writing a trimmed copy.
+
+    Returns a dict: segments ([{start, end, offset}] in seconds, None when the
+    whole file should be used), reason, original_seconds, trimmed_seconds and
+    seconds_saved. Reused from the .speech.json sidecar while the source is unchanged.
+    """
+    if not ENABLED or np is None:
+        return _no_segments('disabled' if not ENABLED else 'numpy not installed')
+
+    report_path = os.path.splitext(source_path)[0] + SPEECH_SUFFIX + '.json'
+    source_mtime = os.path.getmtime(source_path)
+    try:
+        with open(report_path, 'r', encoding='utf-8') as fh:
+            report = json.load(fh)
+        if report.get('source_mtime') == source_mtime:
+            _count('reused')
+            return report
+    except (OSError, ValueError):
+        pass
+
+    try:
+        samples = decode_pcm(source_path)
+    except FileNotFoundError:
+        return _no_segments('ffmpeg not found in PATH')
+    except Exception as e:
+        _count('failed')
+        print(f"[VAD] Could not analyse {source_path}: {e}")
+        return _no_segments(str(e))
+
+    original_seconds = round(len(samples) / SAMPLE_RATE, 2)
+    ranges = detect_speech(samples)
+    kept = sum(end - start for start, end in ranges)
+    if not ranges:
+        report = _no_segments('no speech detected', original_seconds)
+    elif (len(samples) - kept) / SAMPLE_RATE < MIN_SAVED_SECONDS:
+        report = _no_segments('little silence', original_seconds)
+    else:
+        segments, kept = _segments(ranges)
+        report = {'segments': segments, 'reason': None, 'original_seconds': original_seconds,
+                  'trimmed_seconds': round(kept / SAMPLE_RATE, 2),
+                  'seconds_saved': round(original_seconds - kept / SAMPLE_RATE, 2)}
+        _count('trimmed')
+        _count('seconds_saved', report['seconds_saved'])
+    report['source_mtime'] = source_mtime
+    with open(report_path, 'w', encoding='utf-8') as fh:
+        json.dump(report, fh)
+    return report
+
+
+def record_bytes_saved(report, source_bytes, sent_bytes, count=True):
+    """Set a find_speech() report's bytes_saved from the file actually sent.
+
+    Trimming happens in the caller's encode, so the saving is measured on its
+    output; count=False skips the stats (e.g. when that output was reused).
+    """
+    report['bytes_saved'] = max(0, source_bytes - sent_bytes)
+    if count:
+        _count('bytes_saved', report['bytes_saved'])
+    return report
+
+
+def _no_segments(reason, original_seconds=None):
+    _count('passthrough')
+    return {'segments': None, 'reason': reason, 'original_seconds': original_seconds,
+            'trimmed_seconds': original_seconds, 'seconds_saved': 0.0}
+
+
+def _trimmed_paths(source_path):
+    stem = os.path.splitext(source_path)[0]
+    return stem + TRIMMED_SUFFIX + '.mp3', stem + TRIMMED_SUFFIX + '.json'
+
+
+def _passthrough(source_path, reason, original_seconds=None):
+    _count('passthrough')
+    return {'path': source_path, 'trimmed': False, 'reason': reason,
+            'original_seconds': original_seconds, 'trimmed_seconds': original_seconds,
+            'seconds_saved': 0.0, 'original_bytes': os.path.getsize(source_path),
+            'trimmed_bytes': os.path.getsize(source_path), 'bytes_saved': 0, 'segments': None}
+
+
+def trim_silence(source_path):
+    """Trimmed copy of a recording plus what it saved.
+
+    Returns a dict: path (the file to send - the original when nothing was trimmed),
+    trimmed, original/trimmed seconds and bytes, seconds_saved, bytes_saved, and
+    segments ([{start, end, offset}] in seconds: the original range kept and where
+    it starts in the trimmed audio).
+    """
+    if not ENABLED or np is None:
+        return _passthrough(source_path, 'disabled' if not ENABLED else 'numpy not installed')
+
+    output_path, report_path = _trimmed_paths(source_path)
+    try:
+        if os.path.getmtime(output_path) >= os.path.getmtime(source_path):
+            with open(report_path, 'r', encoding='utf-8') as fh:
+                report = json.load(fh)
+            report['path'] = output_path
+            _count('reused')
+            return report
+    except (OSError, ValueError):
+        pass
+
+    try:
+        samples = decode_pcm(source_path)
+        original_seconds = round(len(samples) / SAMPLE_RATE, 2)
+        ranges = detect_speech(samples)
+        if not ranges:
+            return _passthrough(source_path, 'no speech detected', original_seconds)
+        kept = sum(end - start for start, end in ranges)
+        if (len(samples) - kept) / SAMPLE_RATE < MIN_SAVED_SECONDS:
+            return _passthrough(source_path, 'little silence', original_seconds)
+
+        encode_mp3(np.concatenate([samples[start:end] for start, end in ranges]), output_path)
+    except FileNotFoundError:
+        return _passthrough(source_path, 'ffmpeg not found in PATH')
+    except Exception as e:
+        _count('failed')
+        print(f"[VAD] Could not trim {source_path}: {e}")
+        return _passthrough(source_path, str(e))
+
+    segments, offset = _segments(ranges)
+    original_bytes = os.path.getsize(source_path)
+    trimmed_bytes = os.path.getsize(output_path)
+    report = {
+        'trimmed': True,
+        'original_seconds': original_seconds,
+        'trimmed_seconds': round(offset / SAMPLE_RATE, 2),
+        'seconds_saved': round(original_seconds - offset / SAMPLE_RATE, 2),
+        'original_bytes': original_bytes,
+        'trimmed_bytes': trimmed_bytes,
+        'bytes_saved': original_bytes - trimmed_bytes,
+        'segments': segments,
+    }
+    with open(report_path, 'w', encoding='utf-8') as fh:
+        json.dump(report, fh)
+
+    _count('trimmed')
+    _count('seconds_saved', report['seconds_saved'])
+    _count('bytes_saved', report['bytes_saved'])
+    print(f"[VAD] {os.path.basename(source_path)}: {original_seconds}s -> {report['trimmed_seconds']}s, "
+          f"{original_bytes} -> {trimmed_bytes} bytes")
+    report['path'] = output_path
+    return report
+
+
+def get_vad_stats():
+    with _lock:
+        stats = dict(VAD_STATS)
+    stats['seconds_saved'] = round(stats['seconds_saved'], 1)
+    stats['enabled'] = ENABLED and np is not None
+    return stats
@@ -0,0 +1,364 @@
+"""
+Size-capped eviction for the on-disk audio caches.
+
+static/audio_cache, static/generated_tts and static/merged_audio used to grow
+without bound. Each directory now gets a small SQLite index
+(data/cache_index/<name>.sqlite, outside the web-served static tree) recording
+every file's size, last access, hit count and pin flag. Cache readers/writers call touch(path) and a background sweep - one
+daemon thread per worker - reconciles the index with the directory listing and,
+when the directory exceeds its byte budget, deletes unpinned files in LRU (or
+LFU) order until it is back under the low-water mark. Admins can also run a
+sweep at once with POST /admin/disk-cache/sweep; /admin/cache-stats only reports.
+
+touch() is on the hottest audio path (every TTS cache hit), so it only updates
+an in-process buffer; the sweeper thread writes the buffered accesses to the
+index every DISK_CACHE_TOUCH_FLUSH seconds and before each sweep (with the
+sweeper off, the next touch() after that interval does it). Accesses not
+yet flushed when a worker exits are lost, which only makes those files look
+older than they are.
+
+Pinned entries (pre-rendered scenario audio, see pin()) are never evicted.
+Files younger than DISK_CACHE_MIN_AGE are also skipped so a file that is still
+being written or sent is never pulled out from under a request.
+
+Configuration (environment):
+    DISK_CACHE_SWEEPER            1/0, run the background sweep (default 1)
+    DISK_CACHE_SWEEP_INTERVAL     seconds between sweeps (default 600)
+    DISK_CACHE_POLICY             lru or lfu (default lru)
+    DISK_CACHE_MIN_AGE            seconds a new file is protected (default 300)
+    DISK_CACHE_TOUCH_FLUSH        seconds between writes of buffered accesses (default 60)
+    AUDIO_CACHE_MAX_MB            budget for static/audio_cache (default 200)
+    GENERATED_TTS_MAX_MB          budget for static/generated_tts (default 1024)
+    MERGED_AUDIO_MAX_MB           budget for static/merged_audio (default 1024)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import fcntl  # Only used to keep two workers from sweeping the same dir at once
+except ImportError:  # Windows dev machines
+    fcntl = None
+
+SWEEPER_ENABLED = os.getenv('DISK_CACHE_SWEEPER', '1') == '1'
+SWEEP_INTERVAL = int(os.getenv('DISK_CACHE_SWEEP_INTERVAL', 600))
+POLICY = os.getenv('DISK_CACHE_POLICY', 'lru').lower()
+MIN_AGE = int(os.getenv('DISK_CACHE_MIN_AGE', 300))
+TOUCH_FLUSH_INTERVAL = int(os.getenv('DISK_CACHE_TOUCH_FLUSH', 60))
+LOW_WATER = 0.9  # evict down to 90% of the budget so every sweep doesn't evict again
+
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.webm', '.ogg', '.m4a')
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+APP_STATIC = os.path.join(os.path.dirname(__file__), 'static')
+INDEX_DIR = os.path.join(BASE_DIR, 'data', 'cache_index')
+
+
+def _mb(env_name, default):
+    return int(float(os.getenv(env_name, default)) * 1024 * 1024)
+
+
+class DiskCache:
+    """One cache directory, its byte budget and its SQLite access index."""
+
+    def __init__(self, name, directory, max_bytes, extensions=AUDIO_EXTENSIONS):
+        self.name = name
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.extensions = extensions
+        self.index_path = os.path.join(INDEX_DIR, f'{name}.sqlite')
+        self.lock_path = os.path.join(INDEX_DIR, f'{name}.lock')
+        self.evicted_files = 0
+        self.evicted_bytes = 0
+        self.last_sweep = None
+        self._lock = threading.Lock()
+        self._touch_lock = threading.Lock()
+        self._touches = {}  # filename -> [size, last access, hits] not yet in the index
+        self._last_flush = time.monotonic()
+        self._schema_pid = None
+
+    def _connect(self):
+        if self._schema_pid == os.getpid():
+            return sqlite3.connect(self.index_path, timeout=10)
+        # First connection of this process: create the index (WAL mode persists in the file)
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        conn = sqlite3.connect(self.index_path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                name TEXT PRIMARY KEY,
+                size INTEGER NOT NULL DEFAULT 0,
+                last_access REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                pinned INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._schema_pid = os.getpid()
+        return conn
+
+    def _tracked(self, filename):
+        return filename.lower().endswith(self.extensions)
+
+    def touch(self, path, size=None):
+        """Record a read or write of path (a file inside this directory); buffered until flush()."""
+        filename = os.path.basename(path)
+        if not self._tracked(filename):
+            return
+        try:
+            if size is None:
+                size = os.path.getsize(path)
+        except OSError as e:
+            print(f"[DISK_CACHE] touch failed for {path}: {e}")
+            return
+        with self._touch_lock:
+            entry = self._touches.get(filename)
+            if entry is None:
+                self._touches[filename] = [size, time.time(), 1]
+            else:
+                entry[0], entry[1] = size, time.time()
+                entry[2] += 1
+        if not SWEEPER_ENABLED and time.monotonic() - self._last_flush >= TOUCH_FLUSH_INTERVAL:
+            self.flush()  # no sweeper thread to do it
+
+    def flush(self):
+        """Write the buffered accesses to the index. Returns how many files were updated."""
+        with self._touch_lock:
+            touches, self._touches = self._touches, {}
+            self._last_flush = time.monotonic()
+        if not touches:
+            return 0
+        try:
+            conn = self._connect()
+            try:
+                conn.executemany("""
+                    INSERT INTO entries (name, size, last_access, hits) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(name) DO UPDATE SET
+                        size = excluded.size, last_access = MAX(last_access, excluded.last_access),
+                        hits = hits + excluded.hits
+                """, [(name, size, last_access, hits) for name, (size, last_access, hits) in touches.items()])
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"[DISK_CACHE] flush of {self.name} failed: {e}")
+            return 0
+        return len(touches)
+
+    def pin(self, path, pinned=True):
+        """Exclude path from eviction (or make it evictable again)."""
+        filename = os.path.basename(path)
+        try:
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            conn = self._connect()
+            try:
+                conn.execute("""
+                    INSERT INTO entries (name, size, last_access, hits, pinned) VALUES (?, ?, ?, 0, ?)
+                    ON CONFLICT(name) DO UPDATE SET pinned = excluded.pinned
+                """, (filename, size, time.time(), 1 if pinned else 0))
+                conn.commit()
+            finally:
+                conn.close()
+            return True
+        except Exception as e:
+            print(f"[DISK_CACHE] pin failed for {path}: {e}")
+            return False
+
+    def _reconcile(self, conn):
+        """Bring the index in line with the directory; return {name: (size, mtime)} on disk."""
+        on_disk = {}
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and self._tracked(entry.name):
+                    st = entry.stat()
+                    on_disk[entry.name] = (st.st_size, st.st_mtime)
+
+        indexed = {row[0] for row in conn.execute("SELECT name FROM entries")}
+        gone = indexed - set(on_disk)
+        if gone:
+            conn.executemany("DELETE FROM entries WHERE name = ?", [(n,) for n in gone])
+        # Files written by something that never called touch(): seed last access from mtime
+        new = [(n, size, mtime) for n, (size, mtime) in on_disk.items() if n not in indexed]
+        if new:
+            conn.executemany(
+                "INSERT OR IGNORE INTO entries (name, size, last_access, hits) VALUES (?, ?, ?, 0)", new)
+        conn.executemany("UPDATE entries SET size = ? WHERE name = ?",
+                         [(size, n) for n, (size, _) in on_disk.items() if n in indexed])
+        conn.commit()
+        return on_disk
+
+    def sweep(self):
+        """Evict unpinned files until the directory is under its budget.
+
+        Returns a dict describing what happened; never raises.
+        """
+        result = {'name': self.name, 'evicted_files': 0, 'evicted_bytes': 0}
+        if not os.path.isdir(self.directory):
+            return result
+        self.flush()
+        lock_fh = None
+        with self._lock:
+            try:
+                if fcntl is not None:
+                    os.makedirs(INDEX_DIR, exist_ok=True)
+                    lock_fh = open(self.lock_path, 'w')
+                    try:
+                        fcntl.flock(lock_fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except OSError:
+                        result['skipped'] = 'another worker is sweeping'
+                        return result
+
+                conn = self._connect()
+                try:
+                    on_disk = self._reconcile(conn)
+                    total = sum(size for size, _ in on_disk.values())
+                    result['total_bytes'] = total
+                    if total <= self.max_bytes:
+                        return result
+
+                    target = int(self.max_bytes * LOW_WATER)
+                    order = "hits ASC, last_access ASC" if POLICY == 'lfu' else "last_access ASC"
+                    cutoff = time.time() - MIN_AGE
+                    candidates = conn.execute(
+                        f"SELECT name, size FROM entries WHERE pinned = 0 ORDER BY {order}").fetchall()
+
+                    evicted = []
+                    for name, size in candidates:
+                        if total <= target:
+                            break
+                        if on_disk.get(name, (0, 0))[1] > cutoff:
+                            continue
+                        try:
+                            os.remove(os.path.join(self.directory, name))
+                        except FileNotFoundError:
+                            pass
+                        except OSError as e:
+                            print(f"[DISK_CACHE] could not evict {name}: {e}")
+                            continue
+                        evicted.append((name,))
+                        total -= size
+                        result['evicted_files'] += 1
+                        result['evicted_bytes'] += size
+                    conn.executemany("DELETE FROM entries WHERE name = ?", evicted)
+                    conn.commit()
+                    result['total_bytes'] = total
+                finally:
+                    conn.close()
+
+                self.evicted_files += result['evicted_files']
+                self.evicted_bytes += result['evicted_bytes']
+                if result['evicted_files']:
+                    print(f"[DISK_CACHE] {self.name}: evicted {result['evicted_files']} files "
+                          f"({result['evicted_bytes'] // 1024} KB), now {total // 1024} KB")
+            except Exception as e:
+                result['error'] = str(e)
+                print(f"[DISK_CACHE] sweep of {self.name} failed: {e}")
+            finally:
+                self.last_sweep = time.time()
+                if lock_fh is not None:
+                    lock_fh.close()
+        return result
+
+    def stats(self):
+        info = {
+            'name': self.name,
+            'directory': self.directory,
+            'max_bytes': self.max_bytes,
+            'evicted_files': self.evicted_files,
+            'evicted_bytes': self.evicted_bytes,
+            'last_sweep': self.last_sweep,
+        }
+        with self._touch_lock:
+            info['unflushed_touches'] = len(self._touches)
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(pinned), 0) FROM entries").fetchone()
+            finally:
+                conn.close()
+            info.update({'files': row[0], 'bytes': row[1], 'pinned': row[2]})
+        except Exception as e:
+            info['error'] = str(e)
+        return info
+
+
+_caches = {
+    'audio_cache': DiskCache('audio_cache', os.path.join(APP_STATIC, 'audio_cache'),
+                             _mb('AUDIO_CACHE_MAX_MB', 200)),
+    'generated_tts': DiskCache('generated_tts', os.path.join(BASE_DIR, 'static', 'generated_tts'),
+                               _mb('GENERATED_TTS_MAX_MB', 1024)),
+    'merged_audio': DiskCache('merged_audio', os.path.join(APP_STATIC, 'merged_audio'),
+                              _mb('MERGED_AUDIO_MAX_MB', 1024)),
+}
+
+
+def get_disk_cache(name):
+    return _caches[name]
+
+
+def cache_for_path(path):
+    """The DiskCache whose directory holds path, or None."""
+    directory = os.path.dirname(os.path.abspath(path))
+    for cache in _caches.values():
+        if os.path.abspath(cache.directory) == directory:
+            return cache
+    return None
+
+
+def touch(path):
+    """Record an access to a cached file; no-op for files outside managed dirs."""
+    cache = cache_for_path(path)
+    if cache is not None:
+        cache.touch(path)
+
+
+def pin(path, pinned=True):
+    """Protect a cached file from eviction."""
+    cache = cache_for_path(path)
+    return cache.pin(path, pinned) if cache is not None else False
+
+
+def sweep_all():
+    return [cache.sweep() for cache in _caches.values()]
+
+
+def disk_cache_stats():
+    return {name: cache.stats() for name, cache in _caches.items()}
+
+
+_sweeper_pid = None
+_sweeper_lock = threading.Lock()
+
+
+def flush_all():
+    return sum(cache.flush() for cache in _caches.values())
+
+
+def _sweep_loop():
+    next_sweep = 0.0
+    while True:
+        if time.monotonic() >= next_sweep:
+            sweep_all()  # flushes first
+            next_sweep = time.monotonic() + SWEEP_INTERVAL
+        else:
+            flush_all()
+        time.sleep(min(TOUCH_FLUSH_INTERVAL, SWEEP_INTERVAL))
+
+
+def start_sweeper():
+    """Start this process's background sweep thread (once per pid, so forked workers get their own)."""
+    global _sweeper_pid
+    if not SWEEPER_ENABLED:
+        return
+    with _sweeper_lock:
+        if _sweeper_pid == os.getpid():
+            return
+        _sweeper_pid = os.getpid()
+    threading.Thread(target=_sweep_loop, name='disk-cache-sweeper', daemon=True).start()
+
+
+def init_app(app):
+    """Start the sweeper lazily on the first request of each worker process."""
+    app.before_request(start_sweeper)
@@ -0,0 +1,140 @@
+"""
+Shared outbound HTTP client for the external integrations.
+
+Persona360 (16PF), the AIO/Q3 result callback, the Q3 cluster metadata sync and
+the Trajectorie attempt post each called requests.post directly, paying a DNS
+lookup and a TCP (and TLS) handshake on every call. They now go through one
+keep-alive requests.Session per scheme://host:port, created on first use and
+shared by all threads of the worker process, so repeated calls to the same host
+reuse pooled connections.
+
+- Sessions do not retry on their own; callers keep their own retry policy
+  (e.g. the 16PF job queue).
+- Sessions never store cookies (reject-all cookie policy): a Set-Cookie from one
+  call, e.g. a tenant's callback URL, is not replayed on later calls to that host.
+- At most HTTP_MAX_HOSTS sessions are kept; the least recently used one is
+  dropped to make room, so one-off callback hosts do not hold a slot for good.
+- resolve_with_fallback() caches whether a hostname resolves, for HTTP_DNS_TTL
+  seconds, in the 'dns' metadata cache, so a DNS fallback decision (Persona360's
+  direct-IP route) costs one lookup per TTL instead of one per call.
+- Every call is timed per host: requests, errors (exceptions and 5xx), average
+  and slowest latency and the last error; see get_http_stats() and
+  /admin/cache-stats.
+
+Configuration (environment):
+    HTTP_POOL_MAXSIZE     keep-alive connections kept per host (default 10)
+    HTTP_DNS_TTL          seconds a DNS / fallback decision is reused (default 300)
+    HTTP_MAX_HOSTS        hosts with a pooled session per process (default 32)
+"""
+
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.metadata_cache import get_cache
+
+POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 10))
+DNS_TTL = int(os.getenv('HTTP_DNS_TTL', 300))
+MAX_HOSTS = int(os.getenv('HTTP_MAX_HOSTS', 32))
+
+_dns_cache = get_cache('dns', ttl=DNS_TTL)
+_sessions = OrderedDict()  # scheme://host:port -> requests.Session, least recently used first
+_lock = threading.Lock()
+HTTP_STATS = {}  # host -> counters
+
+
+def _origin(url):
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    return f"{parts.scheme}://{parts.hostname}:{port}"
+
+
+def session_for(url):
+    """The pooled keep-alive session for the URL's host (cookie-less)."""
+    origin = _origin(url)
+    with _lock:
+        session = _sessions.get(origin)
+        if session is not None:
+            _sessions.move_to_end(origin)
+            return session
+        session = requests.Session()
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _sessions[origin] = session
+        while len(_sessions) > MAX_HOSTS:
+            # In-flight calls keep their reference; the idle connections close when it is collected
+            _sessions.popitem(last=False)
+        return session
+
+
+def _record(host, elapsed_ms, status=None, error=None):
+    with _lock:
+        stats = HTTP_STATS.setdefault(host, {'requests': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                                             'last_status': None, 'last_error': None})
+        stats['requests'] += 1
+        stats['total_ms'] += elapsed_ms
+        stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+        if status is not None:
+            stats['last_status'] = status
+        if error is not None:
+            stats['errors'] += 1
+            stats['last_error'] = error
+
+
+def request(method, url, **kwargs):
+    """requests.request() over the host's pooled session, timed per host. Raises like requests does."""
+    host = urlsplit(url).hostname or url
+    # A Host header override (DNS fallback to an IP) names the real service
+    host_header = (kwargs.get('headers') or {}).get('Host')
+    if host_header:
+        host = host_header.split(':')[0]
+    started = time.monotonic()
+    try:
+        response = session_for(url).request(method, url, **kwargs)
+    except requests.exceptions.RequestException as e:
+        _record(host, (time.monotonic() - started) * 1000, error=f"{type(e).__name__}: {e}"[:300])
+        raise
+    error = f"HTTP {response.status_code}" if response.status_code >= 500 else None
+    _record(host, (time.monotonic() - started) * 1000, status=response.status_code, error=error)
+    return response
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
+
+
+def head(url, **kwargs):
+    return request('HEAD', url, **kwargs)
+
+
+def resolve_with_fallback(hostname, fallback):
+    """hostname if it resolves, else fallback; the answer is reused for HTTP_DNS_TTL seconds."""
+    resolved = _dns_cache.get(hostname, None)
+    if resolved is None:
+        try:
+            socket.gethostbyname(hostname)
+            resolved = hostname
+        except socket.gaierror:
+            print(f"[HTTP] DNS resolution failed for {hostname}, using {fallback} for {DNS_TTL}s")
+            resolved = fallback
+        _dns_cache.set(hostname, resolved)
+    return resolved
+
+
+def get_http_stats():
+    with _lock:
+        hosts = {host: dict(stats) for host, stats in HTTP_STATS.items()}
+        pooled = sorted(_sessions)
+    for stats in hosts.values():
+        stats['avg_ms'] = round(stats.pop('total_ms') / stats['requests'], 1) if stats['requests'] else None
+        stats['max_ms'] = round(stats['max_ms'], 1)
+    return {'hosts': hosts, 'sessions': pooled, 'pool_maxsize': POOL_MAXSIZE}
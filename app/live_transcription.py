@@ -0,0 +1,258 @@
+"""
+Live transcription of spoken answers while the player is still recording.
+
+Instead of uploading one recording after the player stops, the chatbot page
+cycles its MediaRecorder every LIVE_STT_CHUNK_SECONDS and posts each standalone
+.webm chunk to /api/transcribe-chunk as part of a "take" (one recording, id
+chosen by the page). Each chunk is transcribed with Whisper
+(LLMInteractor.transcribe_audio) on a bounded thread pool as soon as it arrives,
+and its text is written next to it. On submit, process_response calls
+finish_take(), which only has to wait for the last chunk or two and then joins
+the chunk texts in order; that transcript goes to Conversation.chat.
+
+Chunks are transcribed independently so they can run concurrently; a word cut at
+a chunk boundary can come out slightly differently than in a single pass.
+
+State is on disk (temp/live_stt/<play_id>/<take_id>/chunk_<seq>.webm|.txt), so
+chunks and the submit may land on different worker processes. A .claim file
+created with O_EXCL marks the process transcribing a chunk. Chunks refused by a
+full pool, or never claimed, are transcribed by finish_take() itself. If a chunk
+still has no text when the wait runs out, finish_take() returns None and the
+typed/browser transcript is used instead.
+
+Configuration (environment):
+    LIVE_STT                  1/0, transcribe voice answers in chunks (default 1)
+    LIVE_STT_WORKERS          concurrent Whisper calls per worker process (default 4)
+    LIVE_STT_MAX_PENDING      queued + running chunks before new ones wait for submit (default 32)
+    LIVE_STT_CHUNK_SECONDS    chunk length recorded by the page (default 8)
+    LIVE_STT_FINISH_WAIT      seconds submit waits for outstanding chunks (default 20)
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+ENABLED = os.getenv('LIVE_STT', '1') == '1'
+WORKERS = int(os.getenv('LIVE_STT_WORKERS', 4))
+MAX_PENDING = int(os.getenv('LIVE_STT_MAX_PENDING', 32))
+CHUNK_SECONDS = int(os.getenv('LIVE_STT_CHUNK_SECONDS', 8))
+FINISH_WAIT = float(os.getenv('LIVE_STT_FINISH_WAIT', 20))
+STALE_AFTER = 3600  # abandoned takes (re-records, closed tabs) are removed after an hour
+POLL_INTERVAL = 0.2
+
+LIVE_DIR = os.path.join(os.path.dirname(__file__), 'temp', 'live_stt')
+TAKE_ID_RE = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+
+_executor = None
+_interactor = None
+_slots = threading.BoundedSemaphore(MAX_PENDING)
+_lock = threading.Lock()
+_inflight = {}  # chunk audio path -> Future
+
+LIVE_STT_STATS = {
+    'chunks': 0,
+    'transcribed': 0,
+    'deferred': 0,       # pool full; left for finish_take()
+    'inline': 0,         # transcribed by finish_take() on the request thread
+    'failed': 0,
+    'takes_finished': 0,
+    'takes_incomplete': 0,
+    'finish_wait_ms_total': 0.0,
+}
+
+
+def _count(stat, amount=1):
+    with _lock:
+        LIVE_STT_STATS[stat] += amount
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='live-stt')
+        return _executor
+
+
+def _get_interactor():
+    global _interactor
+    with _lock:
+        if _interactor is None:
+            import interface.interact
+            _interactor = interface.interact.LLMInteractor()
+        return _interactor
+
+
+def take_dir(play_id, take_id):
+    """Directory of one take; raises ValueError for a malformed take id."""
+    if not TAKE_ID_RE.match(take_id or ''):
+        raise ValueError("Invalid take id")
+    return os.path.join(LIVE_DIR, str(int(play_id)), take_id)
+
+
+def _chunk_paths(directory, seq):
+    base = os.path.join(directory, f'chunk_{int(seq):05d}')
+    return base + '.webm', base + '.txt', base + '.claim'
+
+
+def _claim(claim_path):
+    try:
+        os.close(os.open(claim_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        return False
+
+
+def _transcribe_chunk(audio_path, text_path, language):
+    """Transcribe one chunk and store its text. Returns the text, or None on failure."""
+    from app.audio_vad import trim_silence
+
+    # Whisper tends to invent a phrase for pure silence, so skip chunks without speech
+    if trim_silence(audio_path).get('reason') == 'no speech detected':
+        text = ''
+    else:
+        text = _get_interactor().transcribe_audio(audio_path, language)
+    if text is None:
+        _count('failed')
+        return None
+
+    tmp_fd, tmp_path = tempfile.mkstemp(suffix='.part', dir=os.path.dirname(text_path))
+    with os.fdopen(tmp_fd, 'w', encoding='utf-8') as fh:
+        fh.write(text.strip())
+    os.replace(tmp_path, text_path)
+    _count('transcribed')
+    return text
+
+
+def _run(audio_path, text_path, language):
+    try:
+        return _transcribe_chunk(audio_path, text_path, language)
+    except Exception as e:
+        _count('failed')
+        print(f"[LIVE_STT] Could not transcribe {audio_path}: {e}")
+        return None
+    finally:
+        with _lock:
+            _inflight.pop(audio_path, None)
+        _slots.release()
+
+
+def _sweep_stale(play_dir):
+    cutoff = time.time() - STALE_AFTER
+    try:
+        with os.scandir(play_dir) as it:
+            for entry in it:
+                if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+    except OSError:
+        pass
+
+
+def _stitch(directory, chunk_count):
+    texts = []
+    for seq in range(chunk_count):
+        _, text_path, _ = _chunk_paths(directory, seq)
+        with open(text_path, 'r', encoding='utf-8') as fh:
+            text = fh.read().strip()
+        if text:
+            texts.append(text)
+    return ' '.join(texts)
+
+
+def partial_transcript(directory):
+    """Text of the leading chunks already transcribed, in order."""
+    texts, seq = [], 0
+    while True:
+        _, text_path, _ = _chunk_paths(directory, seq)
+        try:
+            with open(text_path, 'r', encoding='utf-8') as fh:
+                text = fh.read().strip()
+        except OSError:
+            break
+        if text:
+            texts.append(text)
+        seq += 1
+    return ' '.join(texts)
+
+
+def add_chunk(play_id, take_id, seq, audio_file, language='English'):
+    """Store an uploaded chunk and start transcribing it. Returns the take's partial transcript."""
+    directory = take_dir(play_id, take_id)
+    if int(seq) == 0:
+        _sweep_stale(os.path.dirname(directory))
+    os.makedirs(directory, exist_ok=True)
+    audio_path, text_path, claim_path = _chunk_paths(directory, seq)
+    audio_file.save(audio_path)
+    _count('chunks')
+
+    if _slots.acquire(blocking=False):
+        if _claim(claim_path):
+            executor = _get_executor()
+            with _lock:
+                _inflight[audio_path] = executor.submit(_run, audio_path, text_path, language)
+        else:
+            _slots.release()
+    else:
+        _count('deferred')
+    return partial_transcript(directory)
+
+
+def finish_take(play_id, take_id, chunk_count, language='English'):
+    """The take's full transcript once every chunk is transcribed, or None if that
+    could not happen within LIVE_STT_FINISH_WAIT. The take is removed either way."""
+    try:
+        directory = take_dir(play_id, take_id)
+        chunk_count = int(chunk_count)
+    except (TypeError, ValueError):
+        return None
+    if chunk_count <= 0 or not os.path.isdir(directory):
+        return None
+
+    started = time.monotonic()
+    deadline = started + FINISH_WAIT
+    try:
+        for seq in range(chunk_count):
+            audio_path, text_path, claim_path = _chunk_paths(directory, seq)
+            if os.path.exists(text_path) or not os.path.exists(audio_path):
+                continue
+            with _lock:
+                future = _inflight.get(audio_path)
+            if future is not None:
+                try:
+                    future.result(timeout=max(0.0, deadline - time.monotonic()))
+                except FutureTimeout:
+                    pass
+            elif _claim(claim_path):
+                _count('inline')
+                _transcribe_chunk(audio_path, text_path, language)
+            else:
+                # Another worker process is transcribing it
+                while not os.path.exists(text_path) and time.monotonic() < deadline:
+                    time.sleep(POLL_INTERVAL)
+
+        try:
+            transcript = _stitch(directory, chunk_count)
+        except OSError:
+            _count('takes_incomplete')
+            print(f"[LIVE_STT] Take {take_id} of play {play_id} incomplete, using the submitted text")
+            return None
+        _count('takes_finished')
+        return transcript
+    finally:
+        _count('finish_wait_ms_total', (time.monotonic() - started) * 1000)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def get_live_stt_stats():
+    with _lock:
+        stats = dict(LIVE_STT_STATS)
+        stats['in_flight'] = len(_inflight)
+    finished = stats['takes_finished'] + stats['takes_incomplete']
+    stats['avg_finish_wait_ms'] = round(stats['finish_wait_ms_total'] / finished, 1) if finished else None
+    stats['enabled'] = ENABLED
+    stats['workers'] = WORKERS
+    return stats
@@ -0,0 +1,136 @@
+"""
+In-process TTL cache for cluster / roleplay metadata.
+
+Cluster rows, cluster -> roleplay lists and roleplay_config rows are read on every
+launch, chatbot render and dashboard view but only change from the admin pages.
+Query functions in app.queries are wrapped with @cached(...) and the admin write
+paths call invalidate(...) so the editing worker sees its own changes immediately;
+other worker processes pick them up when the short TTL expires.
+
+Configuration (environment):
+    METADATA_CACHE_TTL   seconds an entry stays valid (default 60, 0 disables caching)
+"""
+
+import os
+import threading
+import time
+from functools import wraps
+
+DEFAULT_TTL = int(os.getenv('METADATA_CACHE_TTL', 60))
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Small thread-safe key/value cache with per-entry expiry and hit/miss counters."""
+
+    def __init__(self, name, ttl=DEFAULT_TTL, maxsize=1024):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key, default=_MISSING):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if len(self._data) >= self.maxsize:
+                # Drop the entry closest to expiry; metadata sets are small so this is rare
+                oldest = min(self._data, key=lambda k: self._data[k][0])
+                del self._data[oldest]
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key=_MISSING):
+        """Drop one key, or everything when called without a key."""
+        with self._lock:
+            if key is _MISSING:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'name': self.name,
+                'ttl': self.ttl,
+                'size': len(self._data),
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / total, 3) if total else None,
+            }
+
+
+_caches = {}
+_registry_lock = threading.Lock()
+
+
+def get_cache(name, ttl=DEFAULT_TTL):
+    """Return the named cache, creating it on first use."""
+    with _registry_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            cache = _caches[name] = TTLCache(name, ttl=ttl)
+        return cache
+
+
+def invalidate(*names):
+    """Clear the named caches (all caches when no names are given)."""
+    for name in names or list(_caches):
+        cache = _caches.get(name)
+        if cache is not None:
+            cache.invalidate()
+
+
+def invalidate_key(name, key):
+    cache = _caches.get(name)
+    if cache is not None:
+        cache.invalidate(key)
+
+
+def cache_stats():
+    """Hit/miss counters for every registered cache."""
+    return {name: cache.stats() for name, cache in sorted(_caches.items())}
+
+
+def cached(name, key=None):
+    """Decorator: cache a lookup's result in the named cache.
+
+    key maps the call arguments to a cache key (default: the first positional
+    argument as a string). Empty results (None / []) are never cached: the query
+    functions return those on DB errors too, and a transient failure must not stick.
+    """
+    cache = get_cache(name)
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs) if key else str(args[0])
+            value = cache.get(cache_key)
+            if value is not _MISSING:
+                return value
+            value = func(*args, **kwargs)
+            if value:
+                cache.set(cache_key, value)
+            return value
+        wrapper.cache = cache
+        return wrapper
+    return decorator
@@ -13,22 +13,18 @@ API Documentation:
 """
 
 import os
-import socket
 import requests
 from typing import Dict, Optional, Tuple, Any
 import json
 
+from app import http_client
+
 
 # Custom DNS resolution - fallback to known IP if DNS fails
 def _resolve_persona360_host():
-    """Try to resolve the Persona360 host, fall back to known IP if DNS fails."""
-    hostname = "api.persona360.rapeti.dev"
-    try:
-        socket.gethostbyname(hostname)
-        return hostname  # DNS works, use hostname
-    except socket.gaierror:
-        print(f"[Persona360] DNS resolution failed for {hostname}, using direct IP")
-        return "217.164.6.105"  # Known IP fallback
+    """Try to resolve the Persona360 host, fall back to known IP if DNS fails.
+    The decision is cached for HTTP_DNS_TTL seconds (see app/http_client.py)."""
+    return http_client.resolve_with_fallback("api.persona360.rapeti.dev", "217.164.6.105")  # Known IP fallback
 
 
 class Persona360Service:
@@ -125,7 +121,7 @@ class Persona360Service:
         return original_url, extra_headers
     
     def analyze_audio(self, file_path: str, age: int = None, gender: str = None,
-                      mode: str = "audio") -> Tuple[bool, Dict[str, Any]]:
+                      mode: str = "audio", timeout: Optional[int] = None) -> Tuple[bool, Dict[str, Any]]:
         """
         Analyze audio file for 16PF personality traits.
         
@@ -134,6 +130,7 @@ class Persona360Service:
             age: User's age (optional - not required by API)
             gender: "Male" or "Female" (optional - not required by API)
             mode: Analysis mode - "audio", "video", or "multimodal" (default: "audio")
+            timeout: Upload timeout in seconds (default: PERSONA360_TIMEOUT)
         
         Returns:
             Tuple of (success: bool, result: dict)
@@ -143,6 +140,7 @@ class Persona360Service:
         # Validate file exists
         if not os.path.exists(file_path):
             return False, {"error": f"File not found: {file_path}"}
+        timeout = timeout or self.timeout
         
         try:
             # Get URL with DNS fallback
@@ -181,12 +179,12 @@ class Persona360Service:
                 print(f"[Persona360] API URL: {api_url}")
                 print(f"[Persona360] Parameters: {data}")
                 
-                response = requests.post(
+                response = http_client.post(
                     api_url,
                     headers=headers,
                     files=files,
                     data=data,
-                    timeout=self.timeout
+                    timeout=timeout
                 )
             
             # Check response status
@@ -202,7 +200,7 @@ class Persona360Service:
                 return False, {"error": error_msg}
                 
         except requests.exceptions.Timeout:
-            error_msg = f"Request timed out after {self.timeout} seconds"
+            error_msg = f"Request timed out after {timeout} seconds"
             print(f"[Persona360] Error: {error_msg}")
             return False, {"error": error_msg}
             
@@ -371,7 +369,7 @@ class Persona360Service:
         """
         try:
             # Try a simple HEAD request to check availability
-            response = requests.head(self.api_url, timeout=5)
+            response = http_client.head(self.api_url, timeout=5)
             return response.status_code in [200, 405]  # 405 = Method Not Allowed is OK for HEAD
         except:
             return False
@@ -389,7 +387,8 @@ def get_persona360_service() -> Persona360Service:
     return _persona360_service
 
 
-def analyze_audio_for_16pf(file_path: str, age: int = None, gender: str = None) -> Tuple[bool, Dict]:
+def analyze_audio_for_16pf(file_path: str, age: int = None, gender: str = None,
+                           timeout: Optional[int] = None) -> Tuple[bool, Dict]:
     """
     Convenience function to analyze audio for 16PF traits.
     
@@ -397,9 +396,10 @@ def analyze_audio_for_16pf(file_path: str, age: int = None, gender: str = None)
         file_path: Path to audio/video file
         age: User's age (optional)
         gender: "Male" or "Female" (optional)
+        timeout: Upload timeout in seconds (optional)
     
     Returns:
         Tuple of (success, result_dict)
     """
     service = get_persona360_service()
-    return service.analyze_audio(file_path, age=age, gender=gender)
+    return service.analyze_audio(file_path, age=age, gender=gender, timeout=timeout)
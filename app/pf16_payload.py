@@ -0,0 +1,228 @@
+"""
+Compact, size-bounded audio payloads for Persona360.
+
+merge_audio_files_for_play() may hand the 16PF analysis a raw concatenated .webm
+(its METHOD 3) or the largest single recording, at whatever bitrate and length
+the browser produced. prepare_payload() re-encodes it to mono
+PF16_PAYLOAD_CODEC at PF16_PAYLOAD_BITRATE / PF16_PAYLOAD_SAMPLE_RATE with
+ffmpeg before it is uploaded:
+
+- Silence is dropped in the same encode: the caller passes the speech segments
+  from audio_vad.find_speech() and they become an aselect filter, so the upload
+  is one lossy generation away from the source rather than two.
+
+- Audio longer than PF16_PAYLOAD_MAX_SECONDS is sampled rather than cut:
+  windows of PF16_PAYLOAD_WINDOW_SECONDS spread evenly over the whole play are
+  kept (ffmpeg aselect), so the payload covers the beginning, middle and end.
+- The result is written to static/merged_audio/pf16_play<id>.<ext> (under the
+  merged_audio disk budget) with a .json sidecar recording the source file, its
+  mtime, the segments and the settings; while those match, retries of the play's
+  analysis reuse the file instead of encoding again.
+- The upload timeout never drops below PERSONA360_TIMEOUT; payloads long enough
+  to need more get PF16_TIMEOUT_PER_MINUTE per minute of audio sent, up to
+  PF16_TIMEOUT_MAX.
+
+If ffmpeg is missing or the encode fails, the source file is sent as before.
+
+Configuration (environment):
+    PF16_PAYLOAD                 1/0, prepare payloads (default 1)
+    PF16_PAYLOAD_CODEC           mp3 or opus (default mp3)
+    PF16_PAYLOAD_BITRATE         encoder bitrate (default 32k)
+    PF16_PAYLOAD_SAMPLE_RATE     output sample rate (default 16000)
+    PF16_PAYLOAD_MAX_SECONDS     longest audio sent; longer plays are sampled (default 600)
+    PF16_PAYLOAD_WINDOW_SECONDS  length of each sampled window (default 30)
+    PF16_TIMEOUT_PER_MINUTE      upload timeout per minute of audio (default 20)
+    PF16_TIMEOUT_MAX             longest upload timeout in seconds (default 300)
+"""
+
+import json
+import math
+import os
+import subprocess
+import tempfile
+import threading
+
+from app.audio_vad import segments_filter
+
+ENABLED = os.getenv('PF16_PAYLOAD', '1') == '1'
+CODEC = os.getenv('PF16_PAYLOAD_CODEC', 'mp3').lower()
+BITRATE = os.getenv('PF16_PAYLOAD_BITRATE', '32k')
+SAMPLE_RATE = int(os.getenv('PF16_PAYLOAD_SAMPLE_RATE', 16000))
+MAX_SECONDS = float(os.getenv('PF16_PAYLOAD_MAX_SECONDS', 600))
+WINDOW_SECONDS = float(os.getenv('PF16_PAYLOAD_WINDOW_SECONDS', 30))
+TIMEOUT_PER_MINUTE = float(os.getenv('PF16_TIMEOUT_PER_MINUTE', 20))
+MIN_TIMEOUT = int(os.getenv('PERSONA360_TIMEOUT', 120))
+MAX_TIMEOUT = max(MIN_TIMEOUT, int(os.getenv('PF16_TIMEOUT_MAX', 300)))
+FFMPEG_TIMEOUT = 300
+
+CODECS = {
+    'mp3': ('.mp3', ['-acodec', 'libmp3lame']),
+    'opus': ('.ogg', ['-acodec', 'libopus', '-application', 'voip']),
+}
+
+PAYLOAD_DIR = os.path.join(os.path.dirname(__file__), 'static', 'merged_audio')
+
+_lock = threading.Lock()
+_play_locks = [threading.Lock() for _ in range(16)]  # striped by play, so one play is encoded once at a time
+
+PAYLOAD_STATS = {
+    'prepared': 0,
+    'sampled': 0,       # longer than MAX_SECONDS; windows kept
+    'trimmed': 0,       # silence dropped in the encode
+    'reused': 0,        # cached payload still matched its source
+    'passthrough': 0,   # disabled, ffmpeg missing or encode failed
+    'source_bytes': 0,
+    'payload_bytes': 0,
+}
+
+
+def _count(stat, amount=1):
+    with _lock:
+        PAYLOAD_STATS[stat] += amount
+
+
+def upload_timeout(seconds):
+    """Persona360 timeout for a payload of this many seconds of audio (unknown: the longest)."""
+    if not seconds:
+        return MAX_TIMEOUT
+    return int(min(MAX_TIMEOUT, max(MIN_TIMEOUT, TIMEOUT_PER_MINUTE * seconds / 60.0)))
+
+
+def probe_duration(path):
+    """Duration in seconds from ffprobe, or None if it cannot tell."""
+    result = subprocess.run(['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+                             '-of', 'default=noprint_wrappers=1:nokey=1', path],
+                            capture_output=True, text=True, timeout=60)
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        return None
+
+
+def sample_filter(duration):
+    """ffmpeg filter keeping evenly spread windows totalling MAX_SECONDS, or None if it all fits."""
+    if not duration or duration <= MAX_SECONDS:
+        return None
+    windows = max(1, math.ceil(MAX_SECONDS / WINDOW_SECONDS))
+    window = MAX_SECONDS / windows
+    period = duration / windows
+    return f"aselect='lt(mod(t\\,{period:.3f})\\,{window:.3f})',asetpts=N/SR/TB"
+
+
+def _payload_paths(play_id):
+    extension = CODECS.get(CODEC, CODECS['mp3'])[0]
+    base = os.path.join(PAYLOAD_DIR, f'pf16_play{int(play_id)}')
+    return base + extension, base + '.json'
+
+
+def _settings():
+    return {'codec': CODEC, 'bitrate': BITRATE, 'sample_rate': SAMPLE_RATE,
+            'max_seconds': MAX_SECONDS, 'window_seconds': WINDOW_SECONDS}
+
+
+def _passthrough(source_path, reason):
+    _count('passthrough')
+    return {'path': source_path, 'prepared': False, 'reused': False, 'reason': reason,
+            'trimmed': False, 'sampled': False,
+            'source_seconds': None, 'payload_seconds': None,
+            'source_bytes': os.path.getsize(source_path), 'payload_bytes': os.path.getsize(source_path),
+            'timeout': MAX_TIMEOUT}
+
+
+def _encode(source_path, output_path, audio_filter):
+    tmp_fd, tmp_path = tempfile.mkstemp(suffix='.part' + os.path.splitext(output_path)[1], dir=PAYLOAD_DIR)
+    os.close(tmp_fd)
+    try:
+        command = ['ffmpeg', '-y', '-v', 'error', '-i', source_path, '-vn', '-ac', '1', '-ar', str(SAMPLE_RATE)]
+        if audio_filter:
+            command += ['-af', audio_filter]
+        command += CODECS.get(CODEC, CODECS['mp3'])[1] + ['-b:a', BITRATE, tmp_path]
+        result = subprocess.run(command, capture_output=True, timeout=FFMPEG_TIMEOUT)
+        if result.returncode != 0 or os.path.getsize(tmp_path) == 0:
+            raise RuntimeError(f"ffmpeg encode failed: {result.stderr.decode(errors='replace')[:300]}")
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _play_lock(play_id):
+    return _play_locks[int(play_id) % len(_play_locks)]
+
+
+def prepare_payload(play_id, source_path, segments=None):
+    """The file to upload to Persona360 for a play, prepared once per source.
+
+    segments are audio_vad.find_speech() segments of source_path to keep (None:
+    all of it). Returns a dict: path, prepared, trimmed, sampled, source/payload
+    seconds and bytes, reused (an earlier encode was still valid) and timeout
+    (seconds to allow the upload).
+    """
+    if not ENABLED:
+        return _passthrough(source_path, 'disabled')
+
+    output_path, meta_path = _payload_paths(play_id)
+    source = {'source': os.path.abspath(source_path), 'source_mtime': os.path.getmtime(source_path),
+              'segments': segments or None}
+    with _play_lock(play_id):
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as fh:
+                report = json.load(fh)
+            if (os.path.exists(output_path) and report.get('settings') == _settings()
+                    and all(report.get(key) == value for key, value in source.items())):
+                _count('reused')
+                report['reused'] = True
+                report['path'] = output_path
+                report['timeout'] = upload_timeout(report.get('payload_seconds'))
+                return report
+        except (OSError, ValueError):
+            pass
+
+        try:
+            os.makedirs(PAYLOAD_DIR, exist_ok=True)
+            duration = probe_duration(source_path)
+            kept = sum(segment['end'] - segment['start'] for segment in segments) if segments else duration
+            filters = [segments_filter(segments)] if segments else []
+            if sample_filter(kept):
+                filters.append(sample_filter(kept))
+            _encode(source_path, output_path, ','.join(filters) or None)
+        except FileNotFoundError:
+            return _passthrough(source_path, 'ffmpeg not found in PATH')
+        except Exception as e:
+            print(f"[PF16_PAYLOAD] Could not prepare {source_path}: {e}")
+            return _passthrough(source_path, str(e))
+
+        payload_seconds = min(kept, MAX_SECONDS) if kept else None
+        report = dict(source, settings=_settings(), prepared=True, trimmed=bool(segments),
+                      sampled=sample_filter(kept) is not None,
+                      source_seconds=round(duration, 2) if duration else None,
+                      payload_seconds=round(payload_seconds, 2) if payload_seconds else None,
+                      source_bytes=os.path.getsize(source_path), payload_bytes=os.path.getsize(output_path))
+        with open(meta_path, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh)
+
+    _count('prepared')
+    if report['trimmed']:
+        _count('trimmed')
+    if report['sampled']:
+        _count('sampled')
+    _count('source_bytes', report['source_bytes'])
+    _count('payload_bytes', report['payload_bytes'])
+    print(f"[PF16_PAYLOAD] play {play_id}: {report['source_seconds']}s / {report['source_bytes']} bytes -> "
+          f"{report['payload_seconds']}s / {report['payload_bytes']} bytes"
+          f"{' (trimmed)' if report['trimmed'] else ''}{' (sampled)' if report['sampled'] else ''}")
+    report['reused'] = False
+    report['path'] = output_path
+    report['timeout'] = upload_timeout(report['payload_seconds'])
+    return report
+
+
+def get_payload_stats():
+    with _lock:
+        stats = dict(PAYLOAD_STATS)
+    stats['compression'] = round(stats['payload_bytes'] / stats['source_bytes'], 3) if stats['source_bytes'] else None
+    stats['enabled'] = ENABLED
+    stats['codec'] = CODEC
+    stats['bitrate'] = BITRATE
+    stats['max_seconds'] = MAX_SECONDS
+    return stats
@@ -0,0 +1,196 @@
+"""
+Job queue for 16PF voice analyses.
+
+Triggers (end of a play, /api/16pf/trigger) used to start a thread per request
+running the Persona360 call. Now they only queue the analysis: the
+pf16_analysis_results row itself is the job (migrations/add_pf16_job_queue.sql).
+
+- enqueue() keeps one analysis per play: re-triggering a play that is already
+  queued, running or analysed returns the existing row. An admin re-trigger
+  (force) resets a finished row to 'pending'; a running one is left alone.
+- Each worker process runs PF16_QUEUE_WORKERS threads that claim the oldest due
+  'pending' row with a single UPDATE, so rows are never run twice across
+  processes and at most PF16_QUEUE_WORKERS Persona360 calls run per process.
+- A failed Persona360 call goes back to 'pending' with an exponential backoff
+  (PF16_RETRY_BASE * 2^(attempt-1), capped at PF16_RETRY_MAX) until
+  PF16_MAX_ATTEMPTS; errors that cannot improve on retry (missing file, 4xx other
+  than 408/429, unsupported source) fail at once.
+- Rows left 'processing' by a crashed or restarted worker are requeued once their
+  lock is older than PF16_STALE_AFTER, checked at worker start and then every
+  few polls. Queued work therefore survives restarts.
+
+Configuration (environment):
+    PF16_QUEUE_WORKERS      concurrent analyses per worker process (default 2)
+    PF16_MAX_ATTEMPTS       Persona360 attempts per analysis (default 4)
+    PF16_RETRY_BASE         seconds before the first retry (default 30)
+    PF16_RETRY_MAX          longest retry delay in seconds (default 900)
+    PF16_POLL_INTERVAL      seconds an idle worker waits before looking again (default 5)
+    PF16_STALE_AFTER        seconds before a 'processing' row is presumed lost (default 900)
+"""
+
+import os
+import re
+import socket
+import threading
+import uuid
+
+from app.pf16_status import refresh as refresh_status
+
+WORKERS = int(os.getenv('PF16_QUEUE_WORKERS', 2))
+MAX_ATTEMPTS = int(os.getenv('PF16_MAX_ATTEMPTS', 4))
+RETRY_BASE = int(os.getenv('PF16_RETRY_BASE', 30))
+RETRY_MAX = int(os.getenv('PF16_RETRY_MAX', 900))
+POLL_INTERVAL = float(os.getenv('PF16_POLL_INTERVAL', 5))
+STALE_AFTER = int(os.getenv('PF16_STALE_AFTER', 900))  # well above PERSONA360_TIMEOUT
+RECOVER_EVERY = 12  # idle polls between stale-row checks
+
+NON_RETRYABLE_STATUS_RE = re.compile(r'API returned status (4(?!08|29)\d\d)')
+
+_lock = threading.Lock()
+_wakeup = threading.Event()
+_workers_pid = None
+
+PF16_QUEUE_STATS = {
+    'enqueued': 0,
+    'deduplicated': 0,   # triggers answered with an existing analysis
+    'claimed': 0,
+    'completed': 0,
+    'retried': 0,
+    'failed': 0,
+    'recovered': 0,      # lost 'processing' rows put back in the queue
+}
+
+
+def _count(stat, amount=1):
+    with _lock:
+        PF16_QUEUE_STATS[stat] += amount
+
+
+def retry_delay(attempt):
+    """Seconds to wait before retrying after the given (1-based) failed attempt."""
+    return min(RETRY_MAX, RETRY_BASE * 2 ** max(0, attempt - 1))
+
+
+def is_retryable(error):
+    if not error:
+        return True
+    if error.startswith('File not found') or error.startswith('Unsupported analysis source'):
+        return False
+    return not NON_RETRYABLE_STATUS_RE.search(error)
+
+
+def enqueue(play_id, user_id, roleplay_id, audio_file_path, user_age=None, user_gender=None,
+            analysis_source='persona360', force=False):
+    """Queue the play's analysis. Returns (analysis_id, queued); see enqueue_16pf_analysis."""
+    from app.queries import enqueue_16pf_analysis
+
+    analysis_id, queued = enqueue_16pf_analysis(play_id, user_id, roleplay_id, audio_file_path,
+                                                user_age, user_gender, analysis_source, force=force)
+    if analysis_id is None:
+        return None, False
+    _count('enqueued' if queued else 'deduplicated')
+    if queued:
+        refresh_status(play_id)
+        start_workers()
+        _wakeup.set()
+    return analysis_id, queued
+
+
+def recover_stale():
+    from app.queries import recover_stale_16pf_jobs
+
+    requeued, failed = recover_stale_16pf_jobs(STALE_AFTER, MAX_ATTEMPTS)
+    if requeued or failed:
+        _count('recovered', requeued)
+        _count('failed', failed)
+        print(f"[16PF_QUEUE] Recovered lost analyses: {requeued} requeued, {failed} out of attempts")
+        _wakeup.set()
+
+
+def _run_job(job):
+    """One attempt at a claimed analysis; the row ends completed, failed or pending again."""
+    from app.routes import run_16pf_analysis
+    from app.queries import update_16pf_analysis_result, schedule_16pf_retry
+
+    analysis_id = job['id']
+    refresh_status(job['play_id'])  # now 'processing'
+    try:
+        success, error = run_16pf_analysis(analysis_id, job['play_id'], job['audio_file_path'], job['user_age'],
+                                           job['user_gender'], job['analysis_source'])
+    except Exception as e:
+        success, error = False, f"Unexpected error: {e}"
+    if success:
+        _count('completed')
+        refresh_status(job['play_id'])
+        return
+
+    attempt = job.get('attempts') or 1
+    if attempt < MAX_ATTEMPTS and is_retryable(error):
+        delay = retry_delay(attempt)
+        _count('retried')
+        print(f"[16PF_QUEUE] Analysis {analysis_id} attempt {attempt}/{MAX_ATTEMPTS} failed, "
+              f"retrying in {delay}s: {error}")
+        schedule_16pf_retry(analysis_id, delay, error)
+    else:
+        _count('failed')
+        print(f"[16PF_QUEUE] Analysis {analysis_id} failed after {attempt} attempt(s): {error}")
+        update_16pf_analysis_result(analysis_id=analysis_id, status='failed', error_message=error)
+    refresh_status(job['play_id'])
+
+
+def _worker_loop(index):
+    from app.queries import claim_16pf_job
+
+    identity = f"{socket.gethostname()[:32]}:{os.getpid()}:{index}"
+    idle_polls = 0
+    while True:
+        try:
+            job = claim_16pf_job(f"{identity}:{uuid.uuid4().hex[:12]}")
+            if job:
+                idle_polls = 0
+                _count('claimed')
+                _run_job(job)
+                continue
+            idle_polls += 1
+            if index == 0 and idle_polls % RECOVER_EVERY == 0:
+                recover_stale()
+        except Exception as e:
+            print(f"[16PF_QUEUE] Worker {identity} error: {e}")
+        _wakeup.wait(POLL_INTERVAL)
+        _wakeup.clear()
+
+
+def start_workers():
+    """Start this process's worker threads (once per pid, so forked workers get their own)."""
+    global _workers_pid
+    with _lock:
+        if _workers_pid == os.getpid() or WORKERS <= 0:
+            return
+        _workers_pid = os.getpid()
+
+    def run():
+        # Pick up what a previous process left behind before taking new work
+        try:
+            recover_stale()
+        except Exception as e:
+            print(f"[16PF_QUEUE] Recovery failed: {e}")
+        for index in range(WORKERS):
+            threading.Thread(target=_worker_loop, args=(index,), name=f'pf16-worker-{index}', daemon=True).start()
+
+    threading.Thread(target=run, name='pf16-queue-start', daemon=True).start()
+
+
+def init_app(app):
+    """Start the workers lazily on the first request of each worker process."""
+    app.before_request(start_workers)
+
+
+def get_pf16_queue_stats():
+    from app.queries import get_16pf_queue_counts
+
+    with _lock:
+        stats = dict(PF16_QUEUE_STATS)
+    stats['workers'] = WORKERS if _workers_pid == os.getpid() else 0
+    stats['max_attempts'] = MAX_ATTEMPTS
+    stats['rows'] = get_16pf_queue_counts()
+    return stats
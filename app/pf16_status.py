@@ -0,0 +1,166 @@
+"""
+In-process cache of 16PF analysis status for /api/16pf/status/<play_id>.
+
+Pages poll the status endpoint while an analysis runs, and every poll used to
+open a DB connection for get_16pf_analysis_by_play_id. The endpoint now serves
+from this cache:
+
+- An entry is reused for PF16_STATUS_TTL seconds while the analysis is queued or
+  running, and PF16_STATUS_FINAL_TTL once it is completed or failed (or absent
+  for a short TTL too, so polling before the trigger stays cheap). The 16PF job
+  queue calls refresh() whenever this process queues, retries or finishes an
+  analysis, so its own changes show up at once; other processes' changes show
+  up within the TTL. FINAL_TTL is kept short because a finished analysis can be
+  reset to 'pending' by an admin re-trigger in another process.
+- A DB error is never cached: the last known status is served if there is one,
+  otherwise the error reaches the endpoint (500, not a cached 404).
+- Each status carries an ETag (hash of the response body). A request with a
+  matching If-None-Match gets 304 Not Modified.
+- Long-poll (opt-in): with PF16_STATUS_MAX_WAIT > 0, ?wait=<seconds> and a
+  matching If-None-Match, the request blocks until the status changes or the
+  wait (at most PF16_STATUS_MAX_WAIT) runs out, then answers 200 with the new
+  status or 304. Waiters on a play share one DB read per TTL. Each waiting
+  request holds a web worker for the whole wait, so only enable it where the
+  server runs threaded workers, or enough sync workers to cover the pages that
+  poll at once plus normal traffic (PythonAnywhere's sync workers do not).
+  With the default 0, ?wait is ignored and clients poll as before.
+
+Configuration (environment):
+    PF16_STATUS_TTL          seconds a pending/processing status is reused (default 3)
+    PF16_STATUS_FINAL_TTL    seconds a completed/failed status is reused (default 15)
+    PF16_STATUS_MAX_WAIT     longest long-poll in seconds, 0 disables it (default 0)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+TTL = float(os.getenv('PF16_STATUS_TTL', 3))
+FINAL_TTL = float(os.getenv('PF16_STATUS_FINAL_TTL', 15))
+MAX_WAIT = float(os.getenv('PF16_STATUS_MAX_WAIT', 0))
+MAX_ENTRIES = 2048
+
+FINAL_STATUSES = ('completed', 'failed')
+
+_lock = threading.Lock()
+_changed = threading.Condition(_lock)
+_entries = {}  # play_id -> {'payload', 'etag', 'fetched'}
+_loading = set()  # play ids being read from the DB
+
+PF16_STATUS_STATS = {
+    'hits': 0,
+    'loads': 0,          # DB reads
+    'load_errors': 0,    # DB reads that failed (not cached)
+    'not_modified': 0,   # 304 answers
+    'long_polls': 0,
+    'long_poll_changed': 0,
+}
+
+
+def _count(stat, amount=1):
+    with _lock:
+        PF16_STATUS_STATS[stat] += amount
+
+
+def status_payload(result):
+    """The status endpoint's body for a pf16_analysis_results row."""
+    return {
+        "status": result.get('status'),
+        "personality_scores": result.get('personality_scores', {}),
+        "composite_scores": result.get('composite_scores', {}),
+        "overall_role_fit": result.get('overall_role_fit'),
+        "analysis_confidence": result.get('analysis_confidence'),
+        "error_message": result.get('error_message'),
+        "created_at": str(result.get('created_at')) if result.get('created_at') else None,
+        "completed_at": str(result.get('completed_at')) if result.get('completed_at') else None
+    }
+
+
+def _ttl(payload):
+    return FINAL_TTL if payload and payload['status'] in FINAL_STATUSES else TTL
+
+
+def _load(play_id):
+    from app.queries import get_16pf_analysis_by_play_id
+
+    _count('loads')
+    result = get_16pf_analysis_by_play_id(play_id, raise_errors=True)
+    payload = status_payload(result) if result else None
+    body = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+    return payload, hashlib.sha1(body).hexdigest()[:20]
+
+
+def _store(play_id, payload, etag):
+    with _changed:
+        old = _entries.pop(play_id, None)
+        _entries[play_id] = {'payload': payload, 'etag': etag, 'fetched': time.monotonic()}
+        while len(_entries) > MAX_ENTRIES:
+            _entries.pop(next(iter(_entries)))  # dicts keep insertion order: oldest load first
+        if old is None or old['etag'] != etag:
+            _changed.notify_all()
+
+
+def get_status(play_id):
+    """(payload, etag) for the play; payload is None when it has no analysis."""
+    with _lock:
+        entry = _entries.get(play_id)
+        fresh = entry and time.monotonic() - entry['fetched'] < _ttl(entry['payload'])
+        if fresh or (entry and play_id in _loading):
+            # Expired but another thread is already reading it: serve the last status
+            PF16_STATUS_STATS['hits'] += 1
+            return entry['payload'], entry['etag']
+        _loading.add(play_id)
+    try:
+        payload, etag = _load(play_id)
+        _store(play_id, payload, etag)
+    except Exception:
+        _count('load_errors')
+        if entry:
+            return entry['payload'], entry['etag']  # stale beats an error; retried on the next poll
+        raise
+    finally:
+        with _lock:
+            _loading.discard(play_id)
+    return payload, etag
+
+
+def refresh(play_id):
+    """Reload the play's status after this process changed it, waking its long-polls."""
+    try:
+        payload, etag = _load(play_id)
+        _store(play_id, payload, etag)
+    except Exception as e:
+        print(f"[16PF_STATUS] Could not refresh play {play_id}: {e}")
+
+
+def wait_for_change(play_id, etag, timeout):
+    """Block until the play's ETag differs from etag or timeout passes. Returns (payload, etag)."""
+    _count('long_polls')
+    deadline = time.monotonic() + min(timeout, MAX_WAIT)
+    while True:
+        payload, current = get_status(play_id)
+        remaining = deadline - time.monotonic()
+        if current != etag:
+            _count('long_poll_changed')
+            return payload, current
+        if remaining <= 0:
+            return payload, current
+        with _changed:
+            # Woken by refresh() in this process; otherwise re-read once the entry expires
+            _changed.wait(min(remaining, _ttl(payload)))
+
+
+def count_not_modified():
+    _count('not_modified')
+
+
+def get_status_stats():
+    with _lock:
+        stats = dict(PF16_STATUS_STATS)
+        stats['entries'] = len(_entries)
+    served = stats['hits'] + stats['loads']
+    stats['hit_rate'] = round(stats['hits'] / served, 3) if served else None
+    stats['max_wait'] = MAX_WAIT
+    return stats
@@ -10,6 +10,8 @@ import secrets
 import string
 import re
 import sys
+import threading
+from app.metadata_cache import cached, invalidate as invalidate_metadata, invalidate_key as invalidate_metadata_key
 
 
 from dotenv import load_dotenv
@@ -159,6 +161,7 @@ def create_or_update(id, name, person_name, scenario, roleplay_file_path, image_
         # Commit everything together
         dbconn.commit()
         debug_log(f"✅ Transaction committed for roleplay {id}")
+        invalidate_roleplay_metadata(id)
         
         # Verify config was saved by reading it back
         if config_data:
@@ -260,6 +263,7 @@ def delete_roleplay(id):
 
             # Commit the transaction
             dbconn.commit()
+            invalidate_roleplay_metadata(id)
 
             return True
 
@@ -661,52 +665,53 @@ def query_showreport(play_id):
                         debug_log(f"Tags sheet traceback: {traceback.format_exc()}")
                         pass  # Continue with empty dict
 
-            cur.execute("select * from chathistory where play_id=%s order by id asc", (play_id,))
-            df = cur.fetchall()
+            # One round trip for the whole transcript (previously one scoremaster and
+            # one scorebreakdown query per chathistory row)
+            cur.execute("""
+                SELECT ch.id, ch.user_text, ch.response_text, sm.id, sm.overall_score,
+                       sb.score_name, sb.score
+                FROM chathistory ch
+                LEFT JOIN scoremaster sm ON sm.chathistory_id = ch.id
+                LEFT JOIN scorebreakdown sb ON sb.scoremaster_id = sm.id
+                WHERE ch.play_id = %s
+                ORDER BY ch.id ASC, sm.id ASC, sb.id ASC
+            """, (play_id,))
+            rows = cur.fetchall()
+            
+            chat_ids = []
+            entries = {}  # chathistory_id -> {"user", "computer", "scoremaster_id", "score", "competencies"}
+            for ch_id, user_text, response_text, sm_id, overall_score, score_name, score in rows:
+                entry = entries.get(ch_id)
+                if entry is None:
+                    chat_ids.append(ch_id)
+                    # Only the first scoremaster row per chat entry counts
+                    entry = entries[ch_id] = {"user": user_text, "computer": response_text,
+                                              "scoremaster_id": sm_id, "score": overall_score,
+                                              "competencies": []}
+                if sm_id is None or sm_id != entry["scoremaster_id"] or score_name is None:
+                    continue
+                entry["competencies"].append({"name": score_name, "score": score})
             
-            debug_log(f"query_showreport: play_id={play_id}, chathistory rows found={len(df)}")
+            debug_log(f"query_showreport: play_id={play_id}, chathistory rows found={len(chat_ids)}")
             
-            if not df or len(df) == 0:
+            if not chat_ids:
                 debug_log(f"WARNING: No chathistory entries found for play_id={play_id}")
                 return None
             
             results = []
             scoremaster_found_count = 0
-            for row in df:
-                chathistory_id = row[0]
-                data = {}
-                data["user"] = row[2]
-                data["computer"] = row[3]
-
-                cur.execute("select * from scoremaster where chathistory_id=%s", (chathistory_id,))
-                df2 = cur.fetchall()
-                
-                if not df2:
-                    debug_log(f"WARNING: No scoremaster entry for chathistory_id={chathistory_id}")
+            for ch_id in chat_ids:
+                entry = entries[ch_id]
+                if entry["scoremaster_id"] is None:
+                    debug_log(f"WARNING: No scoremaster entry for chathistory_id={ch_id}")
                     continue
-                
                 scoremaster_found_count += 1
-                    
-                scoremaster_data = df2[0]
-                data["score"] = scoremaster_data[2]
-
-                cur.execute("select * from scorebreakdown where scoremaster_id=%s", (scoremaster_data[0],))
-                df3 = cur.fetchall()
-
-                scoredata = []
-                for row2 in df3:
-                    # scorebreakdown columns: id(0), scoremaster_id(1), score_name(2), score(3)
-                    # Add safety check for tuple length
-                    if len(row2) >= 4:
-                        scoredata.append({"name": row2[2], "score": row2[3]})
-                    elif len(row2) >= 3:
-                        # Fallback: might be (id, score_name, score) without scoremaster_id
-                        scoredata.append({"name": row2[1], "score": row2[2]})
-                    else:
-                        debug_log(f"WARNING: scorebreakdown row has unexpected format: {row2}")
-                data["competencies"] = scoredata
-
-                results.append(data)
+                results.append({
+                    "user": entry["user"],
+                    "computer": entry["computer"],
+                    "score": entry["score"],
+                    "competencies": entry["competencies"],
+                })
 
             debug_log(f"query_showreport: results count={len(results)}, scoremaster entries found={scoremaster_found_count}")
             
@@ -865,7 +870,13 @@ def query_showreport(play_id):
 
 
 def mark_play_completed(play_id):
-    """Mark a play session as completed"""
+    """Mark a play session as completed and materialise its play_summary row.
+
+    The summary is written in the same transaction as the status update so the
+    completed play and its totals become visible together. It starts with the
+    per-turn maxima; the Tags-sheet maxima need query_showreport's workbook parse,
+    so a background thread rebuilds the row with them once the request is done.
+    """
     try:
         conn = mysql.connector.connect(
             host=host,
@@ -881,16 +892,589 @@ def mark_play_completed(play_id):
             SET status = 'completed', end_time = NOW()
             WHERE id = %s
         """, (play_id,))
-        
+
+        try:
+            write_play_summary(cur, play_id)
+        except Exception as e:
+            # Never block completion on the summary; backfill_play_summaries() repairs it
+            debug_log(f"Could not write play_summary for play {play_id}: {e}")
+
         conn.commit()
         cur.close()
         conn.close()
+        # Until this lands (or if it fails) tags_maxima stays 0 and readers that need
+        # the Tags maxima use query_showreport; backfill_play_summaries() retries it
+        threading.Thread(target=rebuild_play_summary, args=(play_id,), daemon=True).start()
         return True
     except Exception as e:
         print(f"Error marking play as completed: {e}")
         return False
 
 
+# =============================================
+# PLAY SUMMARY (materialised per-play totals)
+# =============================================
+
+# Max score a single interaction can earn (matches query_showreport's final_score)
+PLAY_SUMMARY_TURN_MAX = 3
+
+
+def _aggregate_play_scores(cur, play_id):
+    """Aggregate chathistory -> scoremaster -> scorebreakdown for one play.
+
+    Returns a dict shaped like a play_summary row (competencies as an ordered list).
+    """
+    cur.execute("""
+        SELECT p.user_id, p.roleplay_id, p.cluster_id, p.start_time, p.end_time,
+               (SELECT COUNT(*) FROM chathistory ch WHERE ch.play_id = p.id)
+        FROM play p
+        WHERE p.id = %s
+    """, (play_id,))
+    play_row = cur.fetchone()
+    if not play_row:
+        return None
+    user_id, roleplay_id, cluster_id, start_time, end_time, interaction_count = play_row
+
+    cur.execute("""
+        SELECT COUNT(sm.id), COALESCE(SUM(sm.overall_score), 0),
+               SUBSTRING_INDEX(GROUP_CONCAT(sm.overall_score ORDER BY sm.id DESC), ',', 1)
+        FROM chathistory ch
+        JOIN scoremaster sm ON sm.chathistory_id = ch.id
+        WHERE ch.play_id = %s
+    """, (play_id,))
+    scored_count, total_score, last_overall = cur.fetchone()
+
+    cur.execute("""
+        SELECT sb.score_name, SUM(sb.score), COUNT(*), MAX(sb.score), MIN(sb.id) AS first_id
+        FROM chathistory ch
+        JOIN scoremaster sm ON sm.chathistory_id = ch.id
+        JOIN scorebreakdown sb ON sb.scoremaster_id = sm.id
+        WHERE ch.play_id = %s
+        GROUP BY sb.score_name
+        ORDER BY first_id
+    """, (play_id,))
+    competencies = []
+    for name, score_sum, count, max_turn, _ in cur.fetchall():
+        if not name:
+            continue
+        competencies.append({
+            "name": name,
+            "score": int(score_sum or 0),
+            "count": int(count),
+            "max_turn_score": int(max_turn or 0),
+            "total_possible": None,
+        })
+
+    duration_seconds = None
+    if start_time and end_time:
+        duration_seconds = int((end_time - start_time).total_seconds())
+
+    scored_count = int(scored_count or 0)
+    total_score = int(total_score or 0)
+    return {
+        "play_id": play_id,
+        "user_id": user_id,
+        "roleplay_id": roleplay_id,
+        "cluster_id": cluster_id,
+        "interaction_count": int(interaction_count or 0),
+        "scored_interaction_count": scored_count,
+        "total_score": total_score,
+        "max_total_score": scored_count * PLAY_SUMMARY_TURN_MAX,
+        "avg_overall_score": round(total_score / scored_count, 2) if scored_count else None,
+        "last_overall_score": int(last_overall) if last_overall is not None else None,
+        "competencies": competencies,
+        "duration_seconds": duration_seconds,
+        "completed_at": end_time,
+    }
+
+
+def write_play_summary(cur, play_id, report_totals=None):
+    """Recompute and upsert the play_summary row for play_id using the caller's cursor.
+
+    report_totals is query_showreport()'s processed_score_totals; when given, the
+    Tags-sheet maxima are stored as each competency's total_possible and the row
+    is flagged tags_maxima. Otherwise total_possible is the per-turn maximum.
+    Does not commit.
+    """
+    import json
+    summary = _aggregate_play_scores(cur, play_id)
+    if summary is None:
+        return None
+
+    maxima = {}
+    for comp in report_totals or []:
+        if isinstance(comp, dict) and comp.get('name'):
+            maxima[str(comp['name'])] = comp.get('total_possible')
+    for comp in summary["competencies"]:
+        comp["total_possible"] = maxima.get(comp["name"], PLAY_SUMMARY_TURN_MAX * comp["count"])
+
+    cur.execute("""
+        INSERT INTO play_summary
+            (play_id, user_id, roleplay_id, cluster_id, interaction_count,
+             scored_interaction_count, total_score, max_total_score, avg_overall_score,
+             last_overall_score, competency_scores, duration_seconds, completed_at, tags_maxima)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            user_id = VALUES(user_id),
+            roleplay_id = VALUES(roleplay_id),
+            cluster_id = VALUES(cluster_id),
+            interaction_count = VALUES(interaction_count),
+            scored_interaction_count = VALUES(scored_interaction_count),
+            total_score = VALUES(total_score),
+            max_total_score = VALUES(max_total_score),
+            avg_overall_score = VALUES(avg_overall_score),
+            last_overall_score = VALUES(last_overall_score),
+            competency_scores = VALUES(competency_scores),
+            duration_seconds = VALUES(duration_seconds),
+            completed_at = VALUES(completed_at),
+            tags_maxima = VALUES(tags_maxima)
+    """, (
+        play_id, summary["user_id"], summary["roleplay_id"], summary["cluster_id"],
+        summary["interaction_count"], summary["scored_interaction_count"],
+        summary["total_score"], summary["max_total_score"], summary["avg_overall_score"],
+        summary["last_overall_score"], json.dumps(summary["competencies"]),
+        summary["duration_seconds"], summary["completed_at"], 1 if report_totals is not None else 0,
+    ))
+    return summary
+
+
+def apply_turn_to_play_summary(play_id, overall_score, score_breakdown):
+    """Fold one persisted turn into the play's running play_summary row.
+
+    score_breakdown is {competency_name: score}. If the play has no summary row
+    yet it is seeded from the transcript (which already contains this turn), so
+    plays started before the table existed catch up on their next turn.
+    """
+    import json
+    if not play_id:
+        return False
+    try:
+        with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
+            cur = dbconn.cursor()
+            cur.execute("""
+                SELECT competency_scores, interaction_count, scored_interaction_count, total_score
+                FROM play_summary WHERE play_id = %s FOR UPDATE
+            """, (play_id,))
+            row = cur.fetchone()
+            if row is None:
+                write_play_summary(cur, play_id)
+                dbconn.commit()
+                cur.close()
+                return True
+
+            raw, interaction_count, scored_count, total_score = row
+            if isinstance(raw, (bytes, bytearray)):
+                raw = raw.decode('utf-8')
+            competencies = json.loads(raw) if isinstance(raw, str) else (raw or [])
+            by_name = {c['name']: c for c in competencies}
+            for name, score in (score_breakdown or {}).items():
+                if not name:
+                    continue
+                try:
+                    score = int(float(score))
+                except (ValueError, TypeError):
+                    score = 0
+                comp = by_name.get(name)
+                if comp is None:
+                    comp = {"name": name, "score": 0, "count": 0, "max_turn_score": 0, "total_possible": 0}
+                    by_name[name] = comp
+                    competencies.append(comp)
+                comp["score"] += score
+                comp["count"] += 1
+                comp["max_turn_score"] = max(comp["max_turn_score"], score)
+                comp["total_possible"] = PLAY_SUMMARY_TURN_MAX * comp["count"]
+
+            overall_score = int(overall_score or 0)
+            interaction_count += 1
+            scored_count += 1
+            total_score += overall_score
+            cur.execute("""
+                UPDATE play_summary
+                SET interaction_count = %s, scored_interaction_count = %s, total_score = %s,
+                    max_total_score = %s, avg_overall_score = %s, last_overall_score = %s,
+                    competency_scores = %s, tags_maxima = 0
+                WHERE play_id = %s
+            """, (interaction_count, scored_count, total_score,
+                  scored_count * PLAY_SUMMARY_TURN_MAX, round(total_score / scored_count, 2),
+                  overall_score, json.dumps(competencies), play_id))
+            dbconn.commit()
+            cur.close()
+        return True
+    except Exception as e:
+        debug_log(f"Error updating running play_summary for play {play_id}: {e}")
+        return False
+
+
+def _play_summary_from_row(row):
+    """Normalise a dictionary-cursor play_summary row (decode JSON, cast decimals)."""
+    import json
+    summary = dict(row)
+    raw = summary.pop('competency_scores', None)
+    if isinstance(raw, (bytes, bytearray)):
+        raw = raw.decode('utf-8')
+    summary['competencies'] = json.loads(raw) if isinstance(raw, str) else (raw or [])
+    if summary.get('avg_overall_score') is not None:
+        summary['avg_overall_score'] = float(summary['avg_overall_score'])
+    summary['tags_maxima'] = bool(summary.get('tags_maxima'))
+    return summary
+
+
+def get_play_summary(play_id):
+    """Return the play_summary row for a play as a dict, or None."""
+    summaries = get_play_summaries([play_id])
+    return summaries.get(play_id)
+
+
+def get_play_summaries(play_ids):
+    """Return {play_id: summary_dict} for the given plays in a single query."""
+    play_ids = [pid for pid in play_ids if pid is not None]
+    if not play_ids:
+        return {}
+    try:
+        with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
+            cur = dbconn.cursor(dictionary=True)
+            placeholders = ','.join(['%s'] * len(play_ids))
+            cur.execute(f"SELECT * FROM play_summary WHERE play_id IN ({placeholders})", tuple(play_ids))
+            rows = cur.fetchall()
+            cur.close()
+        return {row['play_id']: _play_summary_from_row(row) for row in rows}
+    except Exception as e:
+        debug_log(f"Error fetching play summaries: {e}")
+        return {}
+
+
+def rebuild_play_summary(play_id):
+    """Recompute one play's summary from the transcript tables (own transaction)."""
+    report = query_showreport(play_id)
+    try:
+        with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
+            cur = dbconn.cursor()
+            summary = write_play_summary(cur, play_id, report_totals=report[1] if report else None)
+            dbconn.commit()
+            cur.close()
+        return summary is not None
+    except Exception as e:
+        debug_log(f"Error rebuilding play summary for play {play_id}: {e}")
+        return False
+
+
+def backfill_play_summaries(only_missing=True, statuses=('completed', 'optimal_viewed')):
+    """Rebuild play_summary for finished plays. Returns (rebuilt, failed) counts.
+
+    only_missing also covers rows still without their Tags-sheet maxima.
+    """
+    try:
+        with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
+            cur = dbconn.cursor()
+            placeholders = ','.join(['%s'] * len(statuses))
+            query = f"SELECT p.id FROM play p WHERE p.status IN ({placeholders})"
+            if only_missing:
+                query += " AND NOT EXISTS (SELECT 1 FROM play_summary ps WHERE ps.play_id = p.id AND ps.tags_maxima = 1)"
+            cur.execute(query + " ORDER BY p.id", tuple(statuses))
+            play_ids = [row[0] for row in cur.fetchall()]
+            cur.close()
+    except Exception as e:
+        debug_log(f"Error listing plays for summary backfill: {e}")
+        return 0, 0
+
+    rebuilt = failed = 0
+    for play_id in play_ids:
+        if rebuild_play_summary(play_id):
+            rebuilt += 1
+        else:
+            failed += 1
+    return rebuilt, failed
+
+
+# =============================================
+# TTS PRE-RENDER JOBS (see app/tts_prerender.py)
+# =============================================
+
+PRERENDER_JOB_FIELDS = ('status', 'total_lines', 'rendered_lines', 'cached_lines',
+                        'failed_lines', 'last_error', 'started_at', 'finished_at')
+
+
+def create_prerender_job(roleplay_id, languages):
+    """Insert a queued pre-render job; returns its id or None."""
+    import json
+    try:
+        with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
+            cur = dbconn.cursor()
+            cur.execute("""
+                INSERT INTO tts_prerender_job (roleplay_id, status, languages)
+                VALUES (%s, 'queued', %s)
+            """, (roleplay_id, json.dumps(list(languages))))
+            dbconn.commit()
+            job_id = cur.lastrowid
+            cur.close()
+        return job_id
+    except Exception as e:
+        debug_log(f"Error creating prerender job for {roleplay_id}: {e}")
+        return None
+
+
+def update_prerender_job(job_id, **fields):
+    """Update progress columns of a pre-render job (unknown keys are ignored)."""
+    fields = {k: v for k, v in fields.items() if k in PRERENDER_JOB_FIELDS}
+    if not fields:
+        return
+    try:
+        with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
+            cur = dbconn.cursor()
+            assignments = ', '.join(f"{k} = %s" for k in fields)
+            cur.execute(f"UPDATE tts_prerender_job SET {assignments} WHERE id = %s",
+                        tuple(fields.values()) + (job_id,))
+            dbconn.commit()
+            cur.close()
+    except Exception as e:
+        debug_log(f"Error updating prerender job {job_id}: {e}")
+
+
+def get_latest_prerender_jobs(roleplay_ids):
+    """Return {roleplay_id: latest job dict} for the given roleplays in a single query."""
+    import json
+    roleplay_ids = [rid for rid in roleplay_ids if rid]
+    if not roleplay_ids:
+        return {}
+    try:
+        with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
+            cur = dbconn.cursor(dictionary=True)
+            placeholders = ','.join(['%s'] * len(roleplay_ids))
+            cur.execute(f"""
+                SELECT j.* FROM tts_prerender_job j
+                JOIN (SELECT roleplay_id, MAX(id) AS id FROM tts_prerender_job
+                      WHERE roleplay_id IN ({placeholders}) GROUP BY roleplay_id) latest
+                  ON latest.id = j.id
+            """, tuple(roleplay_ids))
+            rows = cur.fetchall()
+            cur.close()
+        for row in rows:
+            if isinstance(row.get('languages'), str):
+                row['languages'] = json.loads(row['languages'])
+        return {row['roleplay_id']: row for row in rows}
+    except Exception as e:
+        debug_log(f"Error fetching prerender jobs: {e}")
+        return {}
+
+
+def get_latest_prerender_job(roleplay_id):
+    return get_latest_prerender_jobs([roleplay_id]).get(roleplay_id)
+
+
+# =============================================
+# ROLEPLAY TRANSLATION BUNDLES (see app/roleplay_bundles.py)
+# =============================================
+
+BUNDLE_FIELDS = ('status', 'total_lines', 'translated_lines', 'failed_lines',
+                 'last_error', 'started_at', 'finished_at')
+
+
+def update_translation_bundle(roleplay_id, language, **fields):
+    """Create or update the status row of one (roleplay, language) bundle (unknown keys are ignored)."""
+    fields = {k: v for k, v in fields.items() if k in BUNDLE_FIELDS}
+    try:
+        with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
+            cur = dbconn.cursor()
+            columns = ', '.join(['roleplay_id', 'language'] + list(fields))
+            placeholders = ', '.join(['%s'] * (len(fields) + 2))
+            assignments = ', '.join(f"{k} = VALUES({k})" for k in fields) or 'language = language'
+            cur.execute(f"""
+                INSERT INTO roleplay_translation_bundle ({columns}) VALUES ({placeholders})
+                ON DUPLICATE KEY UPDATE {assignments}
+            """, (roleplay_id, language) + tuple(fields.values()))
+            dbconn.commit()
+            cur.close()
+    except Exception as e:
+        debug_log(f"Error updating translation bundle {roleplay_id}/{language}: {e}")
+
+
+def get_translation_bundles(roleplay_id):
+    """Status rows of every language bundle of a roleplay."""
+    try:
+        with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
+            cur = dbconn.cursor(dictionary=True)
+            cur.execute("""
+                SELECT * FROM roleplay_translation_bundle WHERE roleplay_id = %s ORDER BY language
+            """, (roleplay_id,))
+            rows = cur.fetchall()
+            cur.close()
+        return rows
+    except Exception as e:
+        debug_log(f"Error fetching translation bundles for {roleplay_id}: {e}")
+        return []
+
+
+def save_roleplay_translations(roleplay_id, language, lines):
+    """Store a bundle build: lines is [(source_hash, source_text, machine_text)].
+
+    Admin overrides are kept; lines no longer in the roleplay are removed.
+    """
+    try:
+        with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
+            cur = dbconn.cursor()
+            if lines:
+                cur.executemany("""
+                    INSERT INTO roleplay_translation
+                        (roleplay_id, language, source_hash, source_text, machine_text)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                        machine_text = COALESCE(VALUES(machine_text), machine_text)
+                """, [(roleplay_id, language) + tuple(line) for line in lines])
+                placeholders = ','.join(['%s'] * len(lines))
+                cur.execute(f"""
+                    DELETE FROM roleplay_translation
+                    WHERE roleplay_id = %s AND language = %s AND source_hash NOT IN ({placeholders})
+                """, (roleplay_id, language) + tuple(line[0] for line in lines))
+            else:
+                cur.execute("DELETE FROM roleplay_translation WHERE roleplay_id = %s AND language = %s",
+                            (roleplay_id, language))
+            dbconn.commit()
+            cur.close()
+        return True
+    except Exception as e:
+        debug_log(f"Error saving translations for {roleplay_id}/{language}: {e}")
+        return False
+
+
+def get_roleplay_translations(roleplay_id, language):
+    """Every line of a bundle, for review."""
+    try:
+        with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
+            cur = dbconn.cursor(dictionary=True)
+            cur.execute("""
+                SELECT id, source_hash, source_text, machine_text, override_text, reviewed_at
+                FROM roleplay_translation WHERE roleplay_id = %s AND language = %s ORDER BY id
+            """, (roleplay_id, language))
+            rows = cur.fetchall()
+            cur.close()
+        return rows
+    except Exception as e:
+        debug_log(f"Error fetching translations for {roleplay_id}/{language}: {e}")
+        return []
+
+
+def get_roleplay_bundle_map(roleplay_id, language):
+    """{source_hash: text to show} for a bundle; None on a DB error."""
+    try:
+        with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
+            cur = dbconn.cursor()
+            cur.execute("""
+                SELECT source_hash, COALESCE(override_text, machine_text) FROM roleplay_translation
+                WHERE roleplay_id = %s AND language = %s
+                  AND (override_text IS NOT NULL OR machine_text IS NOT NULL)
+            """, (roleplay_id, language))
+            rows = cur.fetchall()
+            cur.close()
+        return dict(rows)
+    except Exception as e:
+        debug_log(f"Error loading translation bundle {roleplay_id}/{language}: {e}")
+        return None
+
+
+def set_roleplay_translation_override(translation_id, roleplay_id, override_text):
+    """Set (or clear, with an empty text) an admin override. Returns the row's language, or None."""
+    try:
+        with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
+            cur = dbconn.cursor()
+            cur.execute("""
+                UPDATE roleplay_translation SET override_text = %s, reviewed_at = NOW()
+                WHERE id = %s AND roleplay_id = %s
+            """, (override_text or None, translation_id, roleplay_id))
+            cur.execute("SELECT language FROM roleplay_translation WHERE id = %s AND roleplay_id = %s",
+                        (translation_id, roleplay_id))
+            row = cur.fetchone()
+            dbconn.commit()
+            cur.close()
+        return row[0] if row else None
+    except Exception as e:
+        debug_log(f"Error saving translation override {translation_id}: {e}")
+        return None
+
+
+# =============================================
+# USER RECORDINGS (manifest of static/user_recordings/<play_id>/)
+# =============================================
+
+def create_user_recording(play_id, interaction_number, file_path, size_bytes,
+                          duration_ms=None, mime_type=None):
+    """Record one saved recording; file_path is relative to the app static dir. Returns the row id."""
+    try:
+        with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
+            cur = dbconn.cursor()
+            cur.execute("""
+                INSERT INTO user_recording
+                    (play_id, interaction_number, file_path, size_bytes, duration_ms, mime_type)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE size_bytes = VALUES(size_bytes), duration_ms = VALUES(duration_ms)
+            """, (play_id, interaction_number, file_path, size_bytes, duration_ms, mime_type))
+            dbconn.commit()
+            recording_id = cur.lastrowid
+            cur.close()
+        return recording_id
+    except Exception as e:
+        debug_log(f"Error recording user audio for play {play_id}: {e}")
+        return None
+
+
+def get_user_recordings(play_id):
+    """Recordings of a play in interaction order (oldest first within an interaction)."""
+    try:
+        with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
+            cur = dbconn.cursor(dictionary=True)
+            cur.execute("""
+                SELECT id, play_id, interaction_number, file_path, size_bytes, duration_ms,
+                       mime_type, created_at, transcode_status, transcoded_path, transcode_error,
+                       transcode_updated_at
+                FROM user_recording
+                WHERE play_id = %s
+                ORDER BY interaction_number, id
+            """, (play_id,))
+            rows = cur.fetchall()
+            cur.close()
+        return rows
+    except Exception as e:
+        debug_log(f"Error fetching recordings for play {play_id}: {e}")
+        return []
+
+
+def get_user_recording(recording_id):
+    """One recording row (with its transcode status) or None."""
+    try:
+        with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
+            cur = dbconn.cursor(dictionary=True)
+            cur.execute("""
+                SELECT id, play_id, interaction_number, file_path, size_bytes, duration_ms,
+                       mime_type, created_at, transcode_status, transcoded_path, transcode_error,
+                       transcode_updated_at
+                FROM user_recording WHERE id = %s
+            """, (recording_id,))
+            row = cur.fetchone()
+            cur.close()
+        return row
+    except Exception as e:
+        debug_log(f"Error fetching recording {recording_id}: {e}")
+        return None
+
+
+def update_user_recording_transcode(recording_id, status, transcoded_path=None, error=None):
+    """Record a transcode job transition (queued/running/done/failed)."""
+    try:
+        with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
+            cur = dbconn.cursor()
+            cur.execute("""
+                UPDATE user_recording
+                SET transcode_status = %s,
+                    transcoded_path = COALESCE(%s, transcoded_path),
+                    transcode_error = %s,
+                    transcode_updated_at = NOW()
+                WHERE id = %s
+            """, (status, transcoded_path, error, recording_id))
+            dbconn.commit()
+            cur.close()
+    except Exception as e:
+        debug_log(f"Error updating transcode status of recording {recording_id}: {e}")
+
+
 def query_create_chat_entry(user_text, response_text):
     try:
         if 'play_id' not in session:
@@ -1339,6 +1923,7 @@ def create_or_update_roleplay_config(roleplay_id, config_data):
         # Explicit commit
         dbconn.commit()
         debug_log(f"✅ Database commit successful for roleplay_id={roleplay_id}")
+        invalidate_roleplay_metadata(roleplay_id)
         
         # Verify the save by reading back
         cursor.execute("SELECT input_type, available_languages FROM roleplay_config WHERE roleplay_id = %s", (roleplay_id,))
@@ -1366,8 +1951,9 @@ def create_or_update_roleplay_config(roleplay_id, config_data):
         if dbconn:
             dbconn.close()
 
+@cached('roleplay_config')
 def get_roleplay_config(roleplay_id):
-    """Get roleplay configuration"""
+    """Get roleplay configuration (cached; invalidated by create_or_update_roleplay_config)"""
     try:
         with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
             cursor = dbconn.cursor()
@@ -1403,6 +1989,17 @@ def get_roleplay_with_config(roleplay_id):
 
 # Cluster management functions
 
+def invalidate_cluster_metadata():
+    """Drop cached cluster rows and cluster roleplay lists after an admin write."""
+    invalidate_metadata('cluster', 'cluster_by_id_or_external', 'cluster_roleplays')
+
+
+def invalidate_roleplay_metadata(roleplay_id):
+    """Drop a roleplay's cached config and any cluster lists that embed its row."""
+    invalidate_metadata_key('roleplay_config', str(roleplay_id))
+    invalidate_metadata('cluster_roleplays')
+
+
 def create_cluster(name, cluster_id=None, cluster_type='assessment'):
     """Create a new roleplay cluster. If cluster_id not provided, auto-generate a short uuid."""
     try:
@@ -1417,6 +2014,7 @@ def create_cluster(name, cluster_id=None, cluster_type='assessment'):
             """
             cursor.execute(insert_query, (name, cluster_id, cluster_type))
             dbconn.commit()
+            invalidate_cluster_metadata()
             return cursor.lastrowid
     except Exception as e:
         print(f"Error creating cluster: {str(e)}")
@@ -1434,6 +2032,7 @@ def update_cluster(id, name, cluster_type='assessment'):
             """
             cursor.execute(update_query, (name, cluster_type, id))
             dbconn.commit()
+            invalidate_cluster_metadata()
             return True
     except Exception as e:
         print(f"Error updating cluster: {str(e)}")
@@ -1450,6 +2049,7 @@ def get_clusters():
         print(f"Error getting clusters: {str(e)}")
         return []
 
+@cached('cluster')
 def get_cluster(cluster_id):
     """Get specific cluster by internal id (use get_cluster_by_id_or_external for id or external cluster_id)."""
     try:
@@ -1462,6 +2062,7 @@ def get_cluster(cluster_id):
         return None
 
 
+@cached('cluster_by_id_or_external')
 def get_cluster_by_id_or_external(id_or_external):
     """Get cluster by internal id (int) or external cluster_id (string)."""
     try:
@@ -1488,6 +2089,7 @@ def add_roleplay_to_cluster(cluster_id, roleplay_id, order_sequence=1):
             """
             cursor.execute(insert_query, (cluster_id, roleplay_id, order_sequence, order_sequence))
             dbconn.commit()
+            invalidate_metadata_key('cluster_roleplays', str(cluster_id))
             return True
     except Exception as e:
         print(f"Error adding roleplay to cluster: {str(e)}")
@@ -1501,20 +2103,18 @@ def remove_roleplay_from_cluster(cluster_id, roleplay_id):
             cursor.execute("DELETE FROM cluster_roleplay WHERE cluster_id = %s AND roleplay_id = %s", 
                          (cluster_id, roleplay_id))
             dbconn.commit()
+            invalidate_metadata_key('cluster_roleplays', str(cluster_id))
             return True
     except Exception as e:
         print(f"Error removing roleplay from cluster: {str(e)}")
         return False
 
+@cached('cluster_roleplays')
 def get_cluster_roleplays(cluster_id):
     """Get all roleplays in a cluster"""
     try:
         with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
             cursor = dbconn.cursor()
-            # First check if cluster_roleplay entries exist
-            cursor.execute("SELECT COUNT(*) FROM cluster_roleplay WHERE cluster_id = %s", (cluster_id,))
-            count = cursor.fetchone()[0]
-            
             query = """
             SELECT r.*, cr.order_sequence
             FROM roleplay r
@@ -1557,6 +2157,7 @@ def delete_cluster(cluster_id):
             print(f"Deleted cluster with id={cluster_id}")
             
             dbconn.commit()
+            invalidate_cluster_metadata()
             return True
     except Exception as e:
         print(f"Error deleting cluster: {str(e)}")
@@ -1801,8 +2402,38 @@ def update_16pf_analysis_result(analysis_id, status, raw_response=None,
         return False
 
 
-def get_16pf_analysis_by_play_id(play_id):
-    """Get 16PF analysis result for a specific play session"""
+def update_16pf_vad_report(analysis_id, report):
+    """Record what silence trimming saved on the audio sent for a 16PF analysis"""
+    import json
+    try:
+        with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
+            cursor = dbconn.cursor()
+            cursor.execute("""
+                UPDATE pf16_analysis_results SET
+                    vad_original_seconds = %s,
+                    vad_seconds_saved = %s,
+                    vad_bytes_saved = %s,
+                    vad_segments = %s
+                WHERE id = %s
+            """, (
+                report.get('original_seconds'),
+                report.get('seconds_saved'),
+                report.get('bytes_saved'),
+                json.dumps(report['segments']) if report.get('segments') else None,
+                analysis_id
+            ))
+            dbconn.commit()
+            return True
+    except Exception as e:
+        print(f"Error saving 16PF VAD report: {str(e)}")
+        return False
+
+
+def get_16pf_analysis_by_play_id(play_id, raise_errors=False):
+    """Get 16PF analysis result for a specific play session
+
+    Returns None when there is none, or on a DB error unless raise_errors is set.
+    """
     import json
     try:
         with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
@@ -1819,9 +2450,13 @@ def get_16pf_analysis_by_play_id(play_id):
                     result['personality_scores'] = json.loads(result['personality_scores'])
                 if result.get('composite_scores'):
                     result['composite_scores'] = json.loads(result['composite_scores'])
+                if result.get('vad_segments'):
+                    result['vad_segments'] = json.loads(result['vad_segments'])
             return result
     except Exception as e:
         print(f"Error getting 16PF analysis: {str(e)}")
+        if raise_errors:
+            raise
         return None
 
 
@@ -1850,3 +2485,148 @@ def get_16pf_config_for_roleplay(roleplay_id):
         traceback.print_exc()
         return None
 
+
+
+# =============================================
+# 16PF Analysis Job Queue (see app/pf16_queue.py)
+# =============================================
+
+def enqueue_16pf_analysis(play_id, user_id, roleplay_id, audio_file_path,
+                          user_age=None, user_gender=None, analysis_source='persona360', force=False):
+    """Queue a 16PF analysis for a play, at most one per play.
+
+    Returns (analysis_id, queued). An existing analysis of the play is returned
+    as is (queued=False) unless force is set, in which case a finished one is
+    reset to 'pending' with the new inputs; a 'processing' one is never touched.
+    """
+    try:
+        with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
+            cursor = dbconn.cursor(dictionary=True)
+            # Serialise triggers for the same play across workers
+            cursor.execute("SELECT id FROM play WHERE id = %s FOR UPDATE", (play_id,))
+            cursor.fetchall()
+            cursor.execute("""
+                SELECT id, status FROM pf16_analysis_results
+                WHERE play_id = %s ORDER BY created_at DESC, id DESC LIMIT 1
+            """, (play_id,))
+            existing = cursor.fetchone()
+            if existing and (not force or existing['status'] in ('pending', 'processing')):
+                dbconn.commit()
+                return existing['id'], False
+            if existing:
+                cursor.execute("""
+                    UPDATE pf16_analysis_results SET
+                        status = 'pending', audio_file_path = %s, analysis_source = %s,
+                        user_age = %s, user_gender = %s, attempts = 0, next_attempt_at = NULL,
+                        locked_by = NULL, locked_at = NULL, error_message = NULL, completed_at = NULL
+                    WHERE id = %s
+                """, (audio_file_path, analysis_source, user_age, user_gender, existing['id']))
+                analysis_id = existing['id']
+            else:
+                cursor.execute("""
+                    INSERT INTO pf16_analysis_results 
+                    (play_id, user_id, roleplay_id, audio_file_path, analysis_source, 
+                     user_age, user_gender, status)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, 'pending')
+                """, (play_id, user_id, roleplay_id, audio_file_path,
+                      analysis_source, user_age, user_gender))
+                analysis_id = cursor.lastrowid
+            dbconn.commit()
+            return analysis_id, True
+    except Exception as e:
+        print(f"Error queueing 16PF analysis for play {play_id}: {str(e)}")
+        return None, False
+
+
+def claim_16pf_job(worker_id):
+    """Atomically move the oldest due 'pending' analysis to 'processing' for this worker.
+
+    worker_id must be unique per claim. Returns the claimed row, or None.
+    """
+    try:
+        with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
+            cursor = dbconn.cursor(dictionary=True)
+            cursor.execute("""
+                UPDATE pf16_analysis_results SET
+                    status = 'processing', locked_by = %s, locked_at = NOW(),
+                    attempts = attempts + 1
+                WHERE status = 'pending' AND (next_attempt_at IS NULL OR next_attempt_at <= NOW())
+                ORDER BY id LIMIT 1
+            """, (worker_id,))
+            dbconn.commit()
+            if cursor.rowcount == 0:
+                return None
+            cursor.execute("""
+                SELECT id, play_id, audio_file_path, analysis_source, user_age, user_gender, attempts
+                FROM pf16_analysis_results WHERE locked_by = %s AND status = 'processing'
+            """, (worker_id,))
+            return cursor.fetchone()
+    except Exception as e:
+        debug_log(f"Error claiming 16PF job: {e}")
+        return None
+
+
+def schedule_16pf_retry(analysis_id, delay_seconds, error_message):
+    """Put a failed analysis back in the queue, due after delay_seconds"""
+    try:
+        with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
+            cursor = dbconn.cursor()
+            cursor.execute("""
+                UPDATE pf16_analysis_results SET
+                    status = 'pending', error_message = %s, locked_by = NULL, locked_at = NULL,
+                    next_attempt_at = NOW() + INTERVAL %s SECOND
+                WHERE id = %s
+            """, (error_message, int(delay_seconds), analysis_id))
+            dbconn.commit()
+            return True
+    except Exception as e:
+        print(f"Error scheduling 16PF retry: {str(e)}")
+        return False
+
+
+def recover_stale_16pf_jobs(stale_seconds, max_attempts):
+    """Requeue 'processing' analyses whose worker has not finished within stale_seconds
+    (crash, restart, pre-queue threads). Ones out of attempts are failed instead.
+    Returns (requeued, failed)."""
+    try:
+        with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
+            cursor = dbconn.cursor()
+            stale = "status = 'processing' AND (locked_at IS NULL OR locked_at < NOW() - INTERVAL %s SECOND)"
+            cursor.execute(f"""
+                UPDATE pf16_analysis_results SET
+                    status = 'failed', error_message = 'Worker lost during analysis; out of attempts',
+                    locked_by = NULL, locked_at = NULL, completed_at = CURRENT_TIMESTAMP
+                WHERE {stale} AND attempts >= %s
+            """, (int(stale_seconds), int(max_attempts)))
+            failed = cursor.rowcount
+            cursor.execute(f"""
+                UPDATE pf16_analysis_results SET
+                    status = 'pending', locked_by = NULL, locked_at = NULL, next_attempt_at = NULL
+                WHERE {stale}
+            """, (int(stale_seconds),))
+            requeued = cursor.rowcount
+            dbconn.commit()
+            return requeued, failed
+    except Exception as e:
+        debug_log(f"Error recovering stale 16PF jobs: {e}")
+        return 0, 0
+
+
+def get_16pf_queue_counts():
+    """Number of 16PF analyses per status, plus how many pending ones are waiting on a retry"""
+    try:
+        with ms.connect(host=host, user=user, password=password, database=database) as dbconn:
+            cursor = dbconn.cursor()
+            cursor.execute("""
+                SELECT status, COUNT(*), SUM(next_attempt_at > NOW())
+                FROM pf16_analysis_results GROUP BY status
+            """)
+            counts = {}
+            for status, count, waiting in cursor.fetchall():
+                counts[status] = count
+                if status == 'pending':
+                    counts['retry_wait'] = int(waiting or 0)
+            return counts
+    except Exception as e:
+        debug_log(f"Error counting 16PF jobs: {e}")
+        return None
@@ -0,0 +1,211 @@
+"""
+Incremental merge of a play's voice recordings.
+
+Each finished transcode (app/recording_transcode.py) schedules
+update_running_merge() for its play on a small background pool, which appends
+the recording's normalised MP3 - all encoded with identical settings and no
+header, so their frames concatenate - to
+static/merged_audio/merged_play<id>_incremental.mp3. When the play completes,
+merge_audio_files_for_play() calls finalize_merge(), which only has to append
+whatever arrived after the last background run - usually nothing or one
+recording - instead of re-merging the whole session.
+
+static/merged_audio/.state/<play_id>/state.json lists the recording ids already
+in the running file, in order. If the manifest order stops matching that prefix
+(a late upload for an earlier interaction) or the running file has been evicted,
+it is rebuilt from the transcoded copies, which is a byte copy, not an encode.
+A file lock per play keeps two workers from appending at once.
+
+Without ffmpeg nothing can be transcoded and finalize_merge() returns None, so
+merge_audio_files_for_play falls back to its synchronous merge.
+
+Configuration (environment):
+    RECORDING_MERGE                 1/0, merge in the background as recordings arrive (default 1)
+    RECORDING_MERGE_WORKERS         background merge threads per worker process (default 2)
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl  # Per-play lock across worker processes (not available on Windows)
+except ImportError:
+    fcntl = None
+
+ENABLED = os.getenv('RECORDING_MERGE', '1') == '1'
+WORKERS = int(os.getenv('RECORDING_MERGE_WORKERS', 2))
+
+MERGED_DIR = os.path.join(os.path.dirname(__file__), 'static', 'merged_audio')
+
+_executor = None
+_lock = threading.Lock()
+_scheduled = {}  # play_id -> True if more recordings arrived while its merge was running
+_play_locks = {}  # play_id -> threading.Lock
+
+MERGE_STATS = {
+    'scheduled': 0,
+    'recordings_appended': 0,
+    'rebuilds': 0,
+    'failures': 0,
+    'finalized': 0,
+    'finalize_ms_total': 0.0,
+}
+
+
+def _count(stat, amount=1):
+    with _lock:
+        MERGE_STATS[stat] += amount
+
+
+def merged_path_for_play(play_id):
+    return os.path.join(MERGED_DIR, f'merged_play{int(play_id)}_incremental.mp3')
+
+
+def _state_dir(play_id):
+    return os.path.join(MERGED_DIR, '.state', str(int(play_id)))
+
+
+def _load_state(play_id):
+    try:
+        with open(os.path.join(_state_dir(play_id), 'state.json'), 'r', encoding='utf-8') as fh:
+            return json.load(fh).get('merged_ids', [])
+    except (OSError, ValueError):
+        return []
+
+
+def _save_state(play_id, merged_ids):
+    directory = _state_dir(play_id)
+    tmp_fd, tmp_path = tempfile.mkstemp(suffix='.part', dir=directory)
+    with os.fdopen(tmp_fd, 'w', encoding='utf-8') as fh:
+        json.dump({'merged_ids': merged_ids, 'updated_at': time.time()}, fh)
+    os.replace(tmp_path, os.path.join(directory, 'state.json'))
+
+
+class _PlayLock:
+    """Serialise merges of one play within the process and across workers."""
+
+    def __init__(self, play_id):
+        with _lock:
+            self._thread_lock = _play_locks.setdefault(play_id, threading.Lock())
+        self._path = os.path.join(_state_dir(play_id), '.lock')
+        self._fh = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if fcntl is not None:
+            self._fh = open(self._path, 'a+')
+            fcntl.flock(self._fh, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        self._thread_lock.release()
+
+
+def update_running_merge(play_id):
+    """Append recordings not yet in the running merge. Returns its path, or None if
+    some recording could not be transcoded (the running file is then incomplete)."""
+    from app.routes import get_play_recordings
+    from app.recording_transcode import ensure_transcoded
+
+    os.makedirs(_state_dir(play_id), exist_ok=True)
+    with _PlayLock(play_id):
+        recordings = get_play_recordings(play_id)
+        if not recordings:
+            return None
+        expected = [r['id'] for r in recordings]
+        merged_ids = _load_state(play_id)
+        output = merged_path_for_play(play_id)
+
+        if merged_ids != expected[:len(merged_ids)] or (merged_ids and not os.path.exists(output)):
+            # Order changed or the file was evicted: rebuild from the transcoded copies
+            _count('rebuilds')
+            merged_ids = []
+        if merged_ids == expected and os.path.exists(output):
+            return output
+
+        pending = recordings[len(merged_ids):]
+        with open(output, 'ab' if merged_ids else 'wb') as out:
+            for recording in pending:
+                transcoded = ensure_transcoded(recording)
+                if transcoded is None:
+                    _count('failures')
+                    _save_state(play_id, merged_ids)
+                    return None
+                with open(transcoded, 'rb') as fh:
+                    out.write(fh.read())
+                out.flush()
+                merged_ids.append(recording['id'])
+                _save_state(play_id, merged_ids)
+                _count('recordings_appended')
+        print(f"[MERGE] play {play_id}: {len(merged_ids)} recordings in {os.path.basename(output)}")
+        return output
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='recording-merge')
+        return _executor
+
+
+def _run(play_id):
+    while True:
+        try:
+            update_running_merge(play_id)
+        except Exception as e:
+            _count('failures')
+            print(f"[MERGE] Background merge of play {play_id} failed: {e}")
+        with _lock:
+            if _scheduled.get(play_id):
+                _scheduled[play_id] = False  # more uploads arrived meanwhile; go again
+                continue
+            _scheduled.pop(play_id, None)
+            return
+
+
+def schedule_merge(play_id):
+    """Bring the play's running merge up to date in the background (coalesced per play)."""
+    if not ENABLED:
+        return
+    with _lock:
+        if play_id in _scheduled:
+            _scheduled[play_id] = True
+            return
+        _scheduled[play_id] = False
+        MERGE_STATS['scheduled'] += 1
+    _get_executor().submit(_run, play_id)
+
+
+def finalize_merge(play_id):
+    """The play's complete merged MP3, appending only what the background runs have not."""
+    if not ENABLED:
+        return None
+    started = time.monotonic()
+    try:
+        path = update_running_merge(play_id)
+    except Exception as e:
+        _count('failures')
+        print(f"[MERGE] Final merge of play {play_id} failed: {e}")
+        return None
+    if path:
+        _count('finalized')
+        _count('finalize_ms_total', (time.monotonic() - started) * 1000)
+    return path
+
+
+def get_merge_stats():
+    with _lock:
+        stats = dict(MERGE_STATS)
+        stats['running'] = len(_scheduled)
+    stats['avg_finalize_ms'] = (round(stats['finalize_ms_total'] / stats['finalized'], 1)
+                                if stats['finalized'] else None)
+    stats['enabled'] = ENABLED
+    return stats
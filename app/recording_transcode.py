@@ -0,0 +1,209 @@
+"""
+Transcoding queue for uploaded voice recordings.
+
+/api/upload-user-audio saves the browser's raw .webm and hands the recording to
+submit_transcode(), which runs ffmpeg on a bounded pool right away and writes a
+normalised copy next to it (<recording>.mp3: mono, 22.05 kHz, 64 kbps,
+loudness-normalised, no ID3/Xing header so copies can be byte-appended). The
+job status lives on the user_recording row (transcode_status / transcoded_path /
+transcode_error, see migrations/add_user_recording_transcode.sql).
+
+Back-pressure: at most TRANSCODE_MAX_PENDING jobs are queued or running per
+worker process. An upload that cannot get a slot within TRANSCODE_SUBMIT_WAIT
+seconds is left 'queued' and picked up as soon as a running job finishes.
+ensure_transcoded() also converts it when the merge or 16PF path asks for it.
+The merge (app/recording_merge.py) and 16PF only ever read transcoded files.
+
+Configuration (environment):
+    TRANSCODE_WORKERS         concurrent ffmpeg processes per worker process (default 2)
+    TRANSCODE_MAX_PENDING     queued + running jobs before uploads are deferred (default 16)
+    TRANSCODE_SUBMIT_WAIT     seconds an upload waits for a queue slot (default 0.5)
+    TRANSCODE_TIMEOUT         seconds allowed for one ffmpeg run (default 120)
+"""
+
+import collections
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+WORKERS = int(os.getenv('TRANSCODE_WORKERS', 2))
+MAX_PENDING = int(os.getenv('TRANSCODE_MAX_PENDING', 16))
+SUBMIT_WAIT = float(os.getenv('TRANSCODE_SUBMIT_WAIT', 0.5))
+TIMEOUT = int(os.getenv('TRANSCODE_TIMEOUT', 120))
+
+# Same settings for every recording: merges append the frames without re-encoding
+TRANSCODE_FFMPEG_ARGS = ['-vn', '-ac', '1', '-ar', '22050',
+                         '-af', 'loudnorm=I=-16:TP=-1.5:LRA=11',
+                         '-acodec', 'libmp3lame', '-ab', '64k',
+                         '-write_xing', '0', '-id3v2_version', '0']
+TRANSCODED_SUFFIX = '.mp3'
+
+STATIC_DIR = os.path.join(os.path.dirname(__file__), 'static')
+
+_executor = None
+_slots = threading.BoundedSemaphore(MAX_PENDING)
+_lock = threading.Lock()
+_futures = {}  # recording id -> Future of the job in this process
+_deferred = collections.deque()  # recordings refused a slot, oldest first
+
+TRANSCODE_STATS = {
+    'submitted': 0,
+    'deferred': 0,
+    'completed': 0,
+    'failed': 0,
+    'inline': 0,       # transcoded on the consumer's thread by ensure_transcoded()
+    'ffmpeg_ms_total': 0.0,
+}
+
+
+def _count(stat, amount=1):
+    with _lock:
+        TRANSCODE_STATS[stat] += amount
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='transcode')
+        return _executor
+
+
+def transcoded_rel_path(recording):
+    """Static-relative path of a recording's normalised copy."""
+    return os.path.splitext(recording['file_path'])[0] + TRANSCODED_SUFFIX
+
+
+def transcode_file(source_path, output_path):
+    """Run ffmpeg; returns None on success or an error message."""
+    tmp_fd, tmp_path = tempfile.mkstemp(suffix='.part' + TRANSCODED_SUFFIX, dir=os.path.dirname(output_path))
+    os.close(tmp_fd)
+    started = time.monotonic()
+    try:
+        result = subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', '-i', source_path]
+                                + TRANSCODE_FFMPEG_ARGS + [tmp_path],
+                                capture_output=True, text=True, timeout=TIMEOUT)
+        if result.returncode != 0 or not os.path.exists(tmp_path) or os.path.getsize(tmp_path) == 0:
+            return f"ffmpeg failed: {(result.stderr or 'no output')[:300]}"
+        os.replace(tmp_path, output_path)
+        return None
+    except FileNotFoundError:
+        return "ffmpeg not found in PATH"
+    except subprocess.TimeoutExpired:
+        return f"ffmpeg timed out after {TIMEOUT}s"
+    except Exception as e:
+        return str(e)
+    finally:
+        _count('ffmpeg_ms_total', (time.monotonic() - started) * 1000)
+        if os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+def _transcode(recording):
+    """Transcode one recording and record the outcome on its row. Returns the static-relative path or None."""
+    from app.queries import update_user_recording_transcode
+
+    source = os.path.join(STATIC_DIR, recording['file_path'])
+    rel_path = transcoded_rel_path(recording)
+    update_user_recording_transcode(recording['id'], 'running')
+    error = transcode_file(source, os.path.join(STATIC_DIR, rel_path))
+    if error:
+        _count('failed')
+        print(f"[TRANSCODE] recording {recording['id']} ({recording['file_path']}): {error}")
+        update_user_recording_transcode(recording['id'], 'failed', error=error)
+        return None
+    _count('completed')
+    update_user_recording_transcode(recording['id'], 'done', transcoded_path=rel_path)
+    return rel_path
+
+
+def _run_job(recording):
+    try:
+        rel_path = _transcode(recording)
+        if rel_path:
+            # Fold it into the play's running merge
+            from app.recording_merge import schedule_merge
+            schedule_merge(recording['play_id'])
+        return rel_path
+    finally:
+        with _lock:
+            _futures.pop(recording['id'], None)
+            nxt = _deferred.popleft() if _deferred else None
+        if nxt is not None:
+            # Hand our slot straight to the oldest deferred upload
+            _start(nxt)
+        else:
+            _slots.release()
+
+
+def _start(recording):
+    executor = _get_executor()
+    with _lock:
+        TRANSCODE_STATS['submitted'] += 1
+        # Registered under the lock so ensure_transcoded() never misses a starting job;
+        # _run_job's cleanup also takes the lock, so it cannot run before this
+        _futures[recording['id']] = executor.submit(_run_job, recording)
+
+
+def submit_transcode(recording):
+    """Queue a freshly uploaded recording (a user_recording row dict). Returns 'queued' or 'deferred'."""
+    if not _slots.acquire(timeout=SUBMIT_WAIT):
+        with _lock:
+            _deferred.append(recording)
+            TRANSCODE_STATS['deferred'] += 1
+        print(f"[TRANSCODE] queue full, deferring recording {recording['id']}")
+        return 'deferred'
+    _start(recording)
+    return 'queued'
+
+
+def ensure_transcoded(recording):
+    """Absolute path of the recording's transcoded copy, producing it now if no job has.
+
+    Waits for a job already running in this process; otherwise (deferred, failed
+    earlier, or queued in a worker that died) transcodes on the caller's thread.
+    Returns None if ffmpeg cannot convert it.
+    """
+    # The copy only appears through an atomic rename, so if it exists it is complete
+    # (the row passed in may predate the job that wrote it)
+    path = os.path.join(STATIC_DIR, recording.get('transcoded_path') or transcoded_rel_path(recording))
+    if os.path.exists(path):
+        return path
+
+    with _lock:
+        future = _futures.get(recording['id'])
+        if future is None:
+            # Still waiting for a slot: take it off the queue and convert it here
+            for deferred in list(_deferred):
+                if deferred['id'] == recording['id']:
+                    _deferred.remove(deferred)
+    if future is not None:
+        try:
+            rel_path = future.result(timeout=TIMEOUT)
+        except FutureTimeout:
+            rel_path = None
+        return os.path.join(STATIC_DIR, rel_path) if rel_path else None
+
+    # A job another worker process owns may still finish, but converting again is
+    # harmless (atomic replace) and never leaves the caller waiting on a dead worker
+    _count('inline')
+    rel_path = _transcode(recording)
+    return os.path.join(STATIC_DIR, rel_path) if rel_path else None
+
+
+def get_transcode_stats():
+    with _lock:
+        stats = dict(TRANSCODE_STATS)
+        stats['in_flight'] = len(_futures)
+        stats['deferred_waiting'] = len(_deferred)
+    done = stats['completed'] + stats['failed']
+    stats['avg_ffmpeg_ms'] = round(stats['ffmpeg_ms_total'] / done, 1) if done else None
+    stats['workers'] = WORKERS
+    stats['max_pending'] = MAX_PENDING
+    return stats
@@ -0,0 +1,218 @@
+"""
+Pre-localised roleplay bundles.
+
+After a roleplay upload (or from its admin translations page) a background job
+walks the compiled roleplay - every interaction reachable from interaction 1 -
+and machine-translates each fixed line the chatbot shows into every non-English
+language configured on the roleplay: the scenario, the tips and the timeout
+reply. Lines are translated concurrently,
+with at most BUNDLE_TRANSLATE_CONCURRENCY translator calls at a time, through the
+translation memory (app/translation_memory.py), so lines shared with other
+roleplays cost nothing.
+
+Each (roleplay, language) bundle is stored in roleplay_translation
+(migrations/create_roleplay_translation.sql), one row per source line, with a
+status row in roleplay_translation_bundle. Admins review the lines on
+/admin/roleplay/<id>/translations and can override any of them; a rebuild keeps
+the overrides.
+
+translate_text(text, language, roleplay_id=...) looks the line up in the bundle
+first, which the chatbot render and the TTS prefetch/pre-render paths do, so for
+a bundled roleplay the fixed lines are not translated live. The computer's
+replies are not bundled: the chatbot shows the LLM-rephrased reply, not the
+sheet's wording, so each reply is translated once when it is produced
+(routes.localize_reply, through the translation memory) and the render reads
+that. A line edited after the build falls back to live translation.
+
+Configuration (environment):
+    BUNDLE_TRANSLATE_CONCURRENCY   translator calls at once per build (default 4)
+    BUNDLE_TRANSLATE_ATTEMPTS      attempts per line, with exponential backoff (default 3)
+    BUNDLE_BUILD_ON_UPLOAD         1/0, build bundles after a roleplay upload (default 1)
+    BUNDLE_CACHE_TTL               seconds a loaded bundle is reused per worker (default 300)
+"""
+
+import datetime
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.metadata_cache import get_cache, invalidate_key
+from app.translation_memory import lookup as memory_lookup, store as memory_store, source_hash
+
+CONCURRENCY = int(os.getenv('BUNDLE_TRANSLATE_CONCURRENCY', 4))
+MAX_ATTEMPTS = int(os.getenv('BUNDLE_TRANSLATE_ATTEMPTS', 3))
+ON_UPLOAD = os.getenv('BUNDLE_BUILD_ON_UPLOAD', '1') == '1'
+CACHE_TTL = int(os.getenv('BUNDLE_CACHE_TTL', 300))
+STALE_AFTER = 900  # a running build not updated for this long is treated as dead
+
+_bundle_cache = get_cache('roleplay_bundle', ttl=CACHE_TTL)
+_running = set()  # roleplay ids building in this process
+_running_lock = threading.Lock()
+_stats_lock = threading.Lock()
+
+BUNDLE_STATS = {
+    'hits': 0,     # lines served from a bundle
+    'misses': 0,   # lines of a bundled roleplay that were not in it
+}
+
+
+def _usable(text):
+    return text is not None and str(text).strip() not in ('', 'nan')
+
+
+def roleplay_source_lines(roleplay_id):
+    """Every distinct fixed English line the chatbot shows for the roleplay, in flow order.
+
+    The sheet's computer replies are left out: what is shown is their rephrased form.
+    """
+    from app.routes import TIMEOUT_REPLY
+    from app.tts_prerender import load_roleplay_reader, reachable_interactions
+
+    reader_obj = load_roleplay_reader(roleplay_id)
+    lines, seen = [], set()
+
+    def add(text):
+        if _usable(text) and str(text) not in seen:
+            seen.add(str(text))
+            lines.append(str(text))
+
+    add(reader_obj.get_system_prompt())
+    for number in reachable_interactions(reader_obj):
+        data = reader_obj.get_interaction(number)
+        if not data:
+            continue
+        add(data.get('tip'))
+    add(TIMEOUT_REPLY)
+    return lines
+
+
+def _translate_line(text, language):
+    """Machine translation of one line, via the translation memory. Raises after MAX_ATTEMPTS failures."""
+    from app.routes import google_translate
+
+    translated = memory_lookup(text, language)
+    if translated is not None:
+        return translated
+    last_error = None
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            translated = google_translate(text, language)
+            if translated:
+                return memory_store(text, language, translated)
+            last_error = RuntimeError("translator returned no text")
+        except Exception as e:
+            last_error = e
+        time.sleep(2 ** attempt)
+    raise last_error
+
+
+def build_bundle(roleplay_id, language, lines=None):
+    """Translate the roleplay into one language and store the bundle. Returns the counters."""
+    from app.queries import update_translation_bundle, save_roleplay_translations
+
+    counts = {'total_lines': 0, 'translated_lines': 0, 'failed_lines': 0}
+    update_translation_bundle(roleplay_id, language, status='running', started_at=datetime.datetime.now(),
+                              finished_at=None, last_error=None, **counts)
+    try:
+        lines = lines if lines is not None else roleplay_source_lines(roleplay_id)
+        counts['total_lines'] = len(lines)
+        update_translation_bundle(roleplay_id, language, **counts)
+
+        rows, last_error = [], None
+        with ThreadPoolExecutor(max_workers=CONCURRENCY, thread_name_prefix='bundle-translate') as pool:
+            futures = [(text, pool.submit(_translate_line, text, language)) for text in lines]
+            for text, future in futures:
+                try:
+                    rows.append((source_hash(text), text, future.result()))
+                    counts['translated_lines'] += 1
+                except Exception as e:
+                    # Stored untranslated; the player path translates it live
+                    rows.append((source_hash(text), text, None))
+                    counts['failed_lines'] += 1
+                    last_error = str(e)
+
+        if not save_roleplay_translations(roleplay_id, language, rows):
+            raise RuntimeError("could not store the bundle")
+        status = 'ready' if counts['failed_lines'] == 0 else 'partial'  # partial bundles are used too
+        update_translation_bundle(roleplay_id, language, status=status, last_error=last_error,
+                                  finished_at=datetime.datetime.now(), **counts)
+        print(f"[BUNDLE] {roleplay_id}/{language}: {status} {counts}")
+    except Exception as e:
+        print(f"[BUNDLE] {roleplay_id}/{language}: failed: {e}")
+        update_translation_bundle(roleplay_id, language, status='failed', last_error=str(e),
+                                  finished_at=datetime.datetime.now(), **counts)
+        counts['error'] = str(e)
+    invalidate_key('roleplay_bundle', (roleplay_id, language))
+    return counts
+
+
+def bundle_languages(roleplay_id):
+    from app.tts_prerender import roleplay_languages
+    return [language for language in roleplay_languages(roleplay_id) if language != 'English']
+
+
+def _build_is_active(bundle):
+    if bundle.get('status') not in ('queued', 'running'):
+        return False
+    updated = bundle.get('updated_at')
+    return updated is None or (datetime.datetime.now() - updated).total_seconds() < STALE_AFTER
+
+
+def start_bundle_build(roleplay_id, languages=None):
+    """Build (or rebuild) the roleplay's bundles in the background. Returns (languages, started)."""
+    from app.queries import get_translation_bundles
+
+    languages = languages or bundle_languages(roleplay_id)
+    if not languages:
+        return [], False
+    with _running_lock:
+        if roleplay_id in _running or any(_build_is_active(bundle) for bundle in get_translation_bundles(roleplay_id)):
+            return languages, False
+        _running.add(roleplay_id)
+
+    def run():
+        try:
+            # The source lines are the same for every language
+            lines = roleplay_source_lines(roleplay_id)
+            for language in languages:
+                build_bundle(roleplay_id, language, lines)
+        except Exception as e:
+            print(f"[BUNDLE] {roleplay_id}: could not read the roleplay: {e}")
+        finally:
+            with _running_lock:
+                _running.discard(roleplay_id)
+
+    threading.Thread(target=run, name=f'bundle-build-{roleplay_id}', daemon=True).start()
+    return languages, True
+
+
+def bundle_text(roleplay_id, language, text):
+    """The bundled translation of a line, or None if the roleplay has no bundle entry for it."""
+    key = (roleplay_id, language)
+    bundle = _bundle_cache.get(key, None)
+    if bundle is None:
+        from app.queries import get_roleplay_bundle_map
+        bundle = get_roleplay_bundle_map(roleplay_id, language)
+        if bundle is None:
+            return None  # DB error: translate live, retry on the next line
+        # Cached even when empty so roleplays without a bundle cost one query per TTL
+        _bundle_cache.set(key, bundle)
+    if not bundle:
+        return None
+    translated = bundle.get(source_hash(text))
+    with _stats_lock:
+        BUNDLE_STATS['hits' if translated is not None else 'misses'] += 1
+    return translated
+
+
+def invalidate_bundle(roleplay_id, language):
+    invalidate_key('roleplay_bundle', (roleplay_id, language))
+
+
+def get_bundle_stats():
+    with _stats_lock:
+        stats = dict(BUNDLE_STATS)
+    served = stats['hits'] + stats['misses']
+    stats['hit_rate'] = round(stats['hits'] / served, 3) if served else None
+    return stats
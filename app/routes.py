@@ -1,4 +1,4 @@
-from flask import render_template, request, session, redirect, url_for, flash, abort, send_file, jsonify
+from flask import render_template, request, session, redirect, url_for, flash, abort, send_file, jsonify, Response
 import mysql.connector
 from app import app, csrf
 from app.forms import PostForm
@@ -8,12 +8,15 @@ import reader.excel
 import interface.openai
 import interface.interact
 import os
+import re
 import json
-import threading
 import datetime
-from app.queries import get_roleplay_file_path, old_query_showreport, get_play_info, query_create_chat_entry, query_create_score_master, query_create_score_breakdown, query_update, query_showreport, create_or_update, get_roleplays, get_roleplay, delete_roleplay, create_or_update_roleplay_config, get_roleplay_config, get_roleplay_with_config, create_cluster, update_cluster, get_clusters, get_cluster, add_roleplay_to_cluster, remove_roleplay_from_cluster, get_cluster_roleplays, delete_cluster, get_all_users, get_user, assign_cluster_to_user, remove_cluster_from_user, get_user_clusters, get_cluster_users, get_user_id, create_user_account, get_user_by_email, create_user, validate_password, get_16pf_config_for_roleplay, save_16pf_analysis_result, update_16pf_analysis_result, get_16pf_analysis_by_play_id
+from app.queries import get_roleplay_file_path, get_play_info, query_create_chat_entry, query_create_score_master, query_create_score_breakdown, query_update, query_showreport, create_or_update, get_roleplays, get_roleplay, delete_roleplay, create_or_update_roleplay_config, get_roleplay_config, get_roleplay_with_config, create_cluster, update_cluster, get_clusters, get_cluster, add_roleplay_to_cluster, remove_roleplay_from_cluster, get_cluster_roleplays, delete_cluster, get_all_users, get_user, assign_cluster_to_user, remove_cluster_from_user, get_user_clusters, get_cluster_users, get_user_id, create_user_account, get_user_by_email, create_user, validate_password, get_16pf_config_for_roleplay, update_16pf_analysis_result, get_16pf_analysis_by_play_id, mark_play_completed, get_play_summary, apply_turn_to_play_summary, PLAY_SUMMARY_TURN_MAX, create_user_recording, get_user_recordings, get_user_recording, update_16pf_vad_report
 from gtts import gTTS
-from deep_translator import GoogleTranslator
+try:
+    from deep_translator import GoogleTranslator
+except ImportError:  # translate_text then serves the translation memory only
+    GoogleTranslator = None
 from dotenv import load_dotenv, find_dotenv
 import uuid
 import time
@@ -23,7 +26,9 @@ from functools import wraps
 from app.report_generator_v2 import generate_roleplay_report
 from app.email_service import send_report_email
 from app.persona360_service import get_persona360_service, analyze_audio_for_16pf
+from app import http_client
 from app.api_integration import sync_cluster_metadata_to_q3
+from app.metadata_cache import cache_stats
 
 load_dotenv(find_dotenv())
 openai.api_key = os.getenv('OPENAI_API_KEY')
@@ -66,74 +71,329 @@ else:
     master_obj = reader.master.MasterLoader(comp_path)
     competency_descriptions = master_obj.get_competencies_as_list()
 
-def cumul_score(roleplay_id):
-    play_data_df = old_query_showreport(roleplay_id)
+def _running_score_state():
+    """Return the session's running score state for the current play.
 
-    if play_data_df is None:
-        return {}
-
-    results = []
-
-    for row in play_data_df.itertuples():
-        if not results or results[-1]["user"] != row.user_text:
-            results.append({
-                "user": row.user_text,
-                "comp": row.response_text,
-                "scores": [{"name": row.score_name, "score": row.score}]
-            })
-        else:
-            results[-1]["scores"].append({"name": row.score_name, "score": row.score})
+    State is {'play_id': ..., 'scores': {competency: {'score', 'total'}}}. It is
+    seeded once per play from play_summary (a single-row lookup) and afterwards
+    only updated in memory by record_turn_score().
+    """
+    play_id = session.get('play_id')
+    state = session.get('running_score')
+    if not state or state.get('play_id') != play_id:
+        scores = {}
+        summary = get_play_summary(play_id) if play_id else None
+        if summary:
+            for comp in summary.get('competencies', []):
+                scores[comp['name']] = {'score': comp['score'], 'total': PLAY_SUMMARY_TURN_MAX * comp['count']}
+        state = {'play_id': play_id, 'scores': scores}
+        session['running_score'] = state
+    return state
+
+
+def running_score():
+    """Per-competency running totals for the current play (no SQL after the first turn)."""
+    return dict(_running_score_state()['scores'])
+
+
+def record_turn_score(overall_score, score_breakdown):
+    """Add a just-persisted turn to the session running score and to play_summary."""
+    state = _running_score_state()
+    scores = state['scores']
+    for name, score in score_breakdown.items():
+        try:
+            score = int(float(score))
+        except (ValueError, TypeError):
+            score = 0
+        entry = scores.setdefault(name, {'score': 0, 'total': 0})
+        entry['score'] += score
+        entry['total'] += PLAY_SUMMARY_TURN_MAX
+    session['running_score'] = state
+    session.modified = True
+    apply_turn_to_play_summary(state['play_id'], overall_score, score_breakdown)
 
-        results[-1]["scores"].append({"name": "Final Score", "score": row.overall_score})
+import datetime
 
-    # Calculate score totals
-    score_totals = {}
-    for entry in results:
-        for score in entry["scores"]:
-            if score["name"] in score_totals:
-                score_totals[score["name"]]["score"] += score["score"]
-                score_totals[score["name"]]["total"] += 3
-            else:
-                score_totals[score["name"]] = {"score": score["score"], "total": 3}
-    if "Final Score" in score_totals:
-        score_totals.pop("Final Score")
-    return score_totals
+# Language code mapping for Google Translator
+TRANSLATOR_LANGUAGE_CODES = {
+    'Hindi': 'hi',
+    'Tamil': 'ta',
+    'Telugu': 'te',
+    'Kannada': 'kn',
+    'Marathi': 'mr',
+    'Bengali': 'bn',
+    'Malayalam': 'ml',
+    'French': 'fr',
+    'Arabic': 'ar',
+    'Gujarati': 'gu',
+    'English': 'en'
+}
+
+
+def google_translate(text, target_language):
+    """One live Google Translator call; raises if the translator is unavailable or fails."""
+    if GoogleTranslator is None:
+        raise RuntimeError("deep_translator is not installed")
+    target_code = TRANSLATOR_LANGUAGE_CODES.get(target_language, 'en')
+    return GoogleTranslator(source='auto', target=target_code).translate(text)
 
-import datetime
 
 # Translation helper function
-def translate_text(text, target_language='English'):
+def translate_text(text, target_language='English', roleplay_id=None):
     """
     Translate text to target language using Google Translator.
     Returns original text if target is English or if translation fails.
+    With a roleplay_id the roleplay's pre-localised bundle (app/roleplay_bundles.py)
+    is used first; otherwise translations come from the translation memory
+    (app/translation_memory.py) when it already has them.
     """
     if not text or target_language == 'English':
         return text
     
-    # Language code mapping for Google Translator
-    language_codes = {
-        'Hindi': 'hi',
-        'Tamil': 'ta',
-        'Telugu': 'te',
-        'Kannada': 'kn',
-        'Marathi': 'mr',
-        'Bengali': 'bn',
-        'Malayalam': 'ml',
-        'French': 'fr',
-        'Arabic': 'ar',
-        'Gujarati': 'gu',
-        'English': 'en'
+    if roleplay_id:
+        from app.roleplay_bundles import bundle_text
+        localized = bundle_text(roleplay_id, target_language, text)
+        if localized is not None:
+            return localized
+    
+    from app.translation_memory import translate
+    return translate(text, target_language,  # Original text if translation fails
+                     lambda source_text: google_translate(source_text, target_language))
+
+def localize_reply(dialogue, target_language='English'):
+    """Translate a generated computer reply (and its team segments) once, when it is produced.
+    
+    The LLM-rephrased reply is never in a roleplay bundle; storing its translation
+    in the translation memory here lets the renders that show and voice it
+    (translate_text, resolve_dialogue_voice) read it instead of translating live.
+    """
+    if not dialogue or target_language == 'English':
+        return
+    translate_text(dialogue, target_language)
+    segments, _, _ = parse_dialogue_segments(dialogue)
+    for segment in segments:
+        if segment.get('text'):
+            translate_text(segment['text'], target_language)
+
+# Computer reply recorded and spoken when the interaction timer runs out
+TIMEOUT_REPLY = "Please provide a response next time."
+
+# Speaker / voice resolution for computer dialogue. Shared by the chatbot render
+# and the TTS prefetcher so both arrive at the same (text, voice) cache keys.
+SPEAKER_SKIP_WORDS = ['http', 'https', 'others nod', 'everyone nods', 'all nod', 'scenario']
+MALE_TITLES = ['mr.', 'mr', 'sir', 'mister', 'lord', 'king', 'prince']
+FEMALE_TITLES = ['ms.', 'mrs.', 'miss', 'madam', 'lady', 'queen', 'princess']
+# Common Indian male names
+MALE_NAMES = [
+    'bheem', 'satyam', 'rahul', 'amit', 'suresh', 'mahesh', 'rajesh', 'vijay',
+    'anil', 'kumar', 'ravi', 'sanjay', 'deepak', 'ajay', 'prakash', 'mohan',
+    'gopal', 'krishna', 'ram', 'shyam', 'arjun', 'karan', 'rohan', 'varun',
+    'john', 'david', 'michael', 'james', 'robert', 'william', 'richard',
+    'prabhat', 'vinod', 'ashok', 'sunil', 'manoj', 'rakesh', 'pradeep'
+]
+# Common Indian female names
+FEMALE_NAMES = [
+    'kalyani', 'priya', 'anita', 'sunita', 'geeta', 'meena', 'seema', 'rekha',
+    'kavita', 'neeta', 'pooja', 'rani', 'lakshmi', 'durga', 'radha', 'sita',
+    'swati', 'anjali', 'divya', 'nisha', 'ritu', 'sneha', 'neha', 'shruti',
+    'mary', 'patricia', 'jennifer', 'linda', 'elizabeth', 'susan', 'jessica',
+    'deepa', 'shanti', 'asha', 'lata', 'usha', 'savita', 'mamta'
+]
+
+
+def detect_speaker_gender(speaker_text):
+    """
+    Detect gender from speaker name/text using markers in the cell:
+    Formats supported:
+    - "Bheem (M): Hello" → Male
+    - "Kalyani (F): Hello" → Female
+    - "Mr. Smith: Hello" → Male (title detection)
+    - "Ms. Jones: Hello" → Female (title detection)
+    - Common Indian male names → Male
+    - Common Indian female names → Female
+    Default: Male
+    """
+    if not speaker_text:
+        return "male"  # default
+    
+    text_lower = str(speaker_text).strip().lower()
+    
+    # Method 1: Explicit gender markers (M), (F), (Male), (Female)
+    if '(m)' in text_lower or '(male)' in text_lower:
+        return "male"
+    if '(f)' in text_lower or '(female)' in text_lower:
+        return "female"
+    
+    # Method 2: Title/prefix detection in speaker name
+    for title in MALE_TITLES:
+        if text_lower.startswith(title) or f' {title} ' in text_lower:
+            return "male"
+    for title in FEMALE_TITLES:
+        if text_lower.startswith(title) or f' {title} ' in text_lower:
+            return "female"
+    
+    # Method 3: Common name detection on the first word (punctuation stripped)
+    first_word = text_lower.split()[0] if text_lower.split() else ''
+    first_word = first_word.rstrip(':').rstrip('.')
+    if first_word in MALE_NAMES:
+        return "male"
+    if first_word in FEMALE_NAMES:
+        return "female"
+    
+    # Method 4: Default fallback - male for most professional settings
+    return "male"
+
+
+def parse_dialogue_segments(dialogue):
+    """Split computer dialogue into speaker segments for multi-voice team roleplays.
+    
+    Format: "Bheem: Hello Sir | Satyam: Good morning" (lines may also be newline separated)
+    Returns (segments, speakers, primary_speaker).
+    """
+    segments = []
+    speakers = []
+    primary_speaker = None
+    if not dialogue:
+        return segments, speakers, primary_speaker
+    
+    for line in dialogue.replace('\n', '|').split('|'):
+        line = line.strip()
+        if not line:
+            continue
+        
+        # Check if line has "Name: dialogue" format
+        if ':' in line:
+            parts = line.split(':', 1)  # Split only on first colon
+            speaker_name_raw = parts[0].strip()
+            speaker_text = parts[1].strip() if len(parts) > 1 else ""
+            
+            # Validate it's a name (not "Others nod", URLs, etc.) and has actual dialogue
+            if not (speaker_name_raw and len(speaker_name_raw) < 50 and not speaker_name_raw.isdigit()
+                    and not any(skip in speaker_name_raw.lower() for skip in SPEAKER_SKIP_WORDS)
+                    and speaker_text):
+                print(f"❌ SKIPPED LINE: Speaker='{speaker_name_raw}' - Failed validation (text='{speaker_text[:30] if speaker_text else 'EMPTY'}...')")
+                continue
+            
+            # Clean speaker name: Remove gender markers for display
+            # "Bheem (M)" → "Bheem"
+            speaker_name = re.sub(r'\s*\([MFmf]\)|\s*\((male|female|Male|Female)\)', '', speaker_name_raw).strip()
+            segments.append({
+                'speaker': speaker_name,
+                'text': speaker_text,
+                'gender': detect_speaker_gender(speaker_name_raw)
+            })
+            if speaker_name not in speakers:
+                speakers.append(speaker_name)
+            if not primary_speaker:
+                primary_speaker = speaker_name
+        elif line.lower() not in ['others nod', 'everyone nods', 'all nod']:
+            # Line without "Name:" format - add as a segment with no specific speaker
+            segments.append({'speaker': '', 'text': line, 'gender': 'female'})
+    
+    return segments, speakers, primary_speaker
+
+
+def resolve_dialogue_voice(dialogue, node_data, selected_language='English', roleplay_id=None):
+    """Work out who speaks the computer dialogue and in which voice.
+    
+    node_data is the interaction being rendered (reader get_interaction() result);
+    its Column B character / gender marker decides single-speaker voices.
+    Returns the chatbot context keys: dialogue_segments, has_multiple_speakers,
+    character, gender, is_team_roleplay (and all_speakers for team roleplays).
+    """
+    if not node_data:
+        # Completion page / no interaction: default voice for whatever is read out
+        return {"dialogue_segments": [], "character": "", "gender": "male"}
+    
+    # IMPORTANT: Player is always SINGLE person
+    # Column B is for COMPUTER RESPONSE characters (who speaks back to player)
+    # Computer response can have TEAM of people responding
+    character = node_data.get("character")
+    characters = node_data.get("characters", [])
+    
+    dialogue_segments, speakers, primary_speaker = parse_dialogue_segments(dialogue)
+    
+    # Fallback: Use character names from Excel column B if no segments parsed
+    if not dialogue_segments and characters and len(characters) > 0:
+        primary_speaker = characters[0]
+        speakers = characters
+    
+    # Check for gender marker from Excel Column B (single-speaker roleplays)
+    gender_marker = node_data.get("gender_marker")
+    
+    # Translate dialogue segments text if not in English
+    if dialogue_segments and selected_language != 'English':
+        for segment in dialogue_segments:
+            if segment.get('text'):
+                segment['text'] = translate_text(segment['text'], selected_language, roleplay_id)
+    
+    voice = {
+        "dialogue_segments": dialogue_segments,
+        "has_multiple_speakers": len(dialogue_segments) > 1,
     }
+    if dialogue_segments:
+        # Multi-speaker roleplay: Use first segment's speaker as primary
+        voice["character"] = dialogue_segments[0]['speaker']
+        voice["gender"] = dialogue_segments[0]['gender']
+        voice["all_speakers"] = speakers
+        voice["is_team_roleplay"] = len(speakers) > 1
+    elif gender_marker:
+        # Single-speaker roleplay: Use gender marker from Column B "other (M)" or "other (F)"
+        voice["character"] = ""
+        voice["gender"] = gender_marker
+        voice["is_team_roleplay"] = False
+    elif primary_speaker:
+        # Team roleplay with multiple people in computer response
+        voice["character"] = primary_speaker
+        voice["gender"] = detect_speaker_gender(primary_speaker)
+        voice["all_speakers"] = speakers
+        voice["is_team_roleplay"] = len(speakers) > 1
+    elif character:
+        # Single character in computer response (from Excel column B)
+        voice["character"] = character
+        voice["gender"] = detect_speaker_gender(character)
+        voice["is_team_roleplay"] = False
+    else:
+        # No character specified - use default male voice
+        voice["character"] = ""
+        voice["gender"] = "male"
+        voice["is_team_roleplay"] = False
+    return voice
+
+
+def dialogue_audio_lines(voice, text):
+    """(text, character, gender) for every clip the chatbot page plays.
     
-    target_code = language_codes.get(target_language, 'en')
+    voice is a resolve_dialogue_voice() result; text is the (translated) line read
+    out when there are no speaker segments.
+    """
+    if voice.get("dialogue_segments"):
+        return [(s['text'], s.get('speaker') or 'default', s.get('gender', 'male'))
+                for s in voice["dialogue_segments"] if s.get('text')]
+    if not text:
+        return []
+    return [(text, voice.get("character") or 'default', voice.get("gender", "male"))]
+
+def next_turn_audio_lines(reader_obj, interaction_number, node_data, selected_language, roleplay_id=None):
+    """(text, voice) pairs the next chatbot render is known to play verbatim.
+    
+    The score-matched replies in node_data['comp'] are rephrased by the LLM before
+    they are spoken (response_transition), so their audio cannot be known in
+    advance. Only the timeout reply is played as written; it is voiced using the
+    Column B data of the interaction the flow moves to (score 1).
+    """
+    from app.tts_service import select_voice_for_character
     
+    dialogue = TIMEOUT_REPLY
     try:
-        translator = GoogleTranslator(source='auto', target=target_code)
-        translated = translator.translate(text)
-        return translated
-    except Exception as e:
-        print(f"Translation error: {e}")
-        return text  # Return original text if translation fails
+        next_number = reader_obj.get_next_interaction(interaction_number, 1)
+        next_data = reader_obj.get_interaction(next_number) if next_number not in (-1, False, None) else False
+    except Exception:
+        next_data = False
+    voice = resolve_dialogue_voice(dialogue, next_data, selected_language, roleplay_id)
+    text = dialogue if voice["dialogue_segments"] else translate_text(dialogue, selected_language, roleplay_id)
+    return [(line_text, select_voice_for_character(character, gender, selected_language))
+            for line_text, character, gender in dialogue_audio_lines(voice, text)]
 
 # Utility: resolve a stored file path that may point to an old absolute location.
 def resolve_file_path(db_path, upload_dirs=None):
@@ -227,7 +487,7 @@ def post_attempt_data(play_id):
 
     post_url = "http://codrive.sgate.in/api/web/v1/coursejsons/data"
     try:
-        r = requests.post(post_url, json=final_json, timeout=30)
+        r = http_client.post(post_url, json=final_json, timeout=30)
         print(f"DEBUG: Trajectorie API response status: {r.status_code}", flush=True)
         print(f"DEBUG: Trajectorie API response body: {r.text[:500] if r.text else 'empty'}", flush=True)
         
@@ -272,44 +532,62 @@ def post_attempt_data(play_id):
         traceback.print_exc()
 
 
+# Voice recordings live in one directory per play (static/user_recordings/<play_id>/)
+# and every upload gets a user_recording row, so finding a play's recordings is an
+# indexed query rather than a scan of every recording ever made.
+
+def play_recordings_dir(play_id):
+    """Directory holding the recordings of one play."""
+    return os.path.join(app.root_path, 'static', 'user_recordings', str(int(play_id)))
+
+
+def get_play_recordings(play_id):
+    """Manifest rows for a play's recordings that are still on disk, in interaction order.
+
+    Each row gets 'abs_path' alongside the stored static-relative 'file_path'.
+    """
+    recordings = []
+    for row in get_user_recordings(play_id):
+        abs_path = os.path.join(app.root_path, 'static', row['file_path'])
+        if os.path.exists(abs_path):
+            row['abs_path'] = abs_path
+            recordings.append(row)
+        else:
+            print(f"[16PF] Recording listed in manifest is missing on disk: {row['file_path']}")
+    return recordings
+
+
 def merge_audio_files_for_play(play_id):
     """Merge all user audio recordings for a play session into a single file.
     
     Returns the path to the merged audio file, or None if no files to merge.
     """
-    import re
     import subprocess
     
     try:
         print(f"[16PF] ========== MERGE AUDIO FILES ==========", flush=True)
         print(f"[16PF] merge_audio_files_for_play called for play_id={play_id}", flush=True)
-        user_recordings_dir = os.path.join(app.root_path, 'static', 'user_recordings')
-        print(f"[16PF] Looking for recordings in: {user_recordings_dir}", flush=True)
-        if not os.path.exists(user_recordings_dir):
-            print(f"[16PF] User recordings directory does not exist: {user_recordings_dir}", flush=True)
-            return None
         
-        # List ALL files in directory for debugging
-        all_files = os.listdir(user_recordings_dir)
-        print(f"[16PF] All files in user_recordings ({len(all_files)}): {all_files[:20]}", flush=True)  # Show first 20
-        
-        # Find all audio files for this play_id
-        audio_files = []
-        for filename in os.listdir(user_recordings_dir):
-            if filename.endswith(('.webm', '.mp3', '.wav', '.m4a', '.ogg')):
-                # Match patterns: user_audio_play{id}_int... or play{id}_ or play_{id}
-                if f'play{play_id}_' in filename or f'play_{play_id}' in filename:
-                    file_path = os.path.join(user_recordings_dir, filename)
-                    file_size = os.path.getsize(file_path)
-                    # Get modification time for sorting
-                    audio_files.append((file_path, os.path.getmtime(file_path), file_size))
-                    print(f"[16PF] Found matching file: {filename} (size: {file_size} bytes)", flush=True)
+        # Recordings for this play, already in interaction order
+        recordings = get_play_recordings(play_id)
+        audio_files = [(r['abs_path'], r['interaction_number'], r['size_bytes']) for r in recordings]
+        for r in recordings:
+            print(f"[16PF] Found recording: {r['file_path']} (size: {r['size_bytes']} bytes)", flush=True)
         
         if not audio_files:
             print(f"[16PF] ❌ No audio files found for play_id {play_id}", flush=True)
-            print(f"[16PF] Searched for patterns: 'play{play_id}_' or 'play_{play_id}'")
             return None
         
+        # Normally the recordings were merged in the background as they were uploaded
+        # (app/recording_merge.py) and only the last one or two still need appending
+        from app.recording_merge import finalize_merge
+        incremental_path = finalize_merge(play_id)
+        if incremental_path:
+            print(f"[16PF] ✅ Using incremental merge: {incremental_path}", flush=True)
+            return incremental_path
+        # Past this point the recordings could not be transcoded (normally: no ffmpeg
+        # on this host), so fall back to merging the raw uploads synchronously
+        
         # Create merged audio directory early
         merged_dir = os.path.join(app.root_path, 'static', 'merged_audio')
         os.makedirs(merged_dir, exist_ok=True)
@@ -345,17 +623,6 @@ def merge_audio_files_for_play(play_id):
             else:
                 return single_file
         
-        # Sort by filename to maintain interaction order (int1, int2, int3, etc.)
-        def get_interaction_num(file_tuple):
-            filename = os.path.basename(file_tuple[0])
-            # Extract interaction number from filename like "user_audio_play258_int3_..."
-            match = re.search(r'_int(\d+)_', filename)
-            if match:
-                return int(match.group(1))
-            # Fallback to modification time
-            return file_tuple[1]
-        
-        audio_files.sort(key=get_interaction_num)
         file_paths = [f[0] for f in audio_files]
         
         print(f"[16PF] Found {len(file_paths)} audio files to merge for play_id {play_id}")
@@ -530,6 +797,12 @@ def trigger_16pf_analysis_if_enabled(play_id, user_id, roleplay_id):
         user_age = session.get('user_age', pf16_config.get('pf16_default_age', 30))
         user_gender = session.get('user_gender', 'Male')
         
+        # A play is analysed once; skip the merge when it is already queued or done
+        existing = get_16pf_analysis_by_play_id(play_id)
+        if existing:
+            print(f"[16PF] Analysis {existing['id']} already exists for play_id {play_id} ({existing['status']})", flush=True)
+            return
+        
         # First, try to merge all audio files from this play session
         merged_audio = merge_audio_files_for_play(play_id)
         
@@ -544,9 +817,9 @@ def trigger_16pf_analysis_if_enabled(play_id, user_id, roleplay_id):
         
         print(f"[16PF] Audio file exists: {os.path.exists(audio_file_path)}, size: {os.path.getsize(audio_file_path) if os.path.exists(audio_file_path) else 'N/A'}")
         
-        # Create a pending analysis record
-        print(f"[16PF] Creating analysis record...")
-        analysis_id = save_16pf_analysis_result(
+        # Queue the analysis; the pf16_queue workers run it
+        from app.pf16_queue import enqueue
+        analysis_id, queued = enqueue(
             play_id=play_id,
             user_id=user_id,
             roleplay_id=roleplay_id,
@@ -555,21 +828,11 @@ def trigger_16pf_analysis_if_enabled(play_id, user_id, roleplay_id):
             user_gender=user_gender,
             analysis_source=analysis_source
         )
-        print(f"[16PF] Analysis record created: analysis_id={analysis_id}")
         
         if not analysis_id:
-            print(f"[16PF] ❌ Failed to create analysis record")
+            print(f"[16PF] ❌ Failed to queue analysis")
             return
-        
-        # Run analysis in background thread
-        print(f"[16PF] Starting background analysis thread...")
-        thread = threading.Thread(
-            target=run_16pf_analysis_async,
-            args=(analysis_id, audio_file_path, user_age, user_gender, analysis_source)
-        )
-        thread.daemon = True
-        thread.start()
-        print(f"[16PF] ✅ Started background analysis thread for analysis_id {analysis_id}")
+        print(f"[16PF] ✅ Analysis {analysis_id} {'queued' if queued else 'already exists'} for play_id {play_id}")
         
     except Exception as e:
         import traceback
@@ -581,53 +844,33 @@ def get_audio_file_for_play(play_id):
     """Find the audio recording file for a specific play session.
     
     This function looks for recorded audio files associated with the play session.
-    Priority: user_recordings > audio_cache > other locations
+    Priority: user_recording manifest > merged_audio > chathistory.audio_file_path
     """
     try:
-        # PRIORITY 1: Check user recordings directory first (actual user voice recordings)
-        user_recordings_dir = os.path.join(app.root_path, 'static', 'user_recordings')
-        if os.path.exists(user_recordings_dir):
-            # Get all files for this play_id, sorted by modification time (newest first)
-            matching_files = []
-            for filename in os.listdir(user_recordings_dir):
-                if filename.endswith(('.webm', '.mp3', '.wav', '.m4a', '.ogg')):
-                    if f'play{play_id}_' in filename or f'play_{play_id}' in filename:
-                        file_path = os.path.join(user_recordings_dir, filename)
-                        matching_files.append((file_path, os.path.getmtime(file_path)))
-            
-            if matching_files:
-                # Return the most recent file
-                matching_files.sort(key=lambda x: x[1], reverse=True)
-                print(f"[16PF] Found user recording: {matching_files[0][0]}")
-                return matching_files[0][0]
-        
-        # PRIORITY 2: Check for concatenated/merged audio files for this play
+        # PRIORITY 1: The play's most recent user recording (manifest), transcoded
+        recordings = get_play_recordings(play_id)
+        if recordings:
+            from app.recording_transcode import ensure_transcoded
+            latest = ensure_transcoded(recordings[-1])
+            if not latest:
+                # No ffmpeg on this host: the raw upload is all there is
+                latest = recordings[-1]['abs_path']
+            print(f"[16PF] Found user recording: {latest}")
+            return latest
+        
+        # PRIORITY 2: A merged file for this play (merged_play<id>_<timestamp>.mp3 / merged_play<id>_raw.webm)
         merged_audio_dir = os.path.join(app.root_path, 'static', 'merged_audio')
         if os.path.exists(merged_audio_dir):
-            for filename in os.listdir(merged_audio_dir):
-                if filename.endswith(('.webm', '.mp3', '.wav', '.m4a', '.ogg')):
-                    if f'play{play_id}' in filename or f'play_{play_id}' in filename:
-                        return os.path.join(merged_audio_dir, filename)
-        
-        # PRIORITY 3: Check other common locations for audio files
-        audio_dirs = [
-            os.path.join(app.root_path, 'temp'),
-            os.path.join(os.path.dirname(app.root_path), 'uploads'),
-        ]
-        
-        # Look for files with play_id in the name
-        for audio_dir in audio_dirs:
-            if not os.path.exists(audio_dir):
-                continue
-            
-            for filename in os.listdir(audio_dir):
-                # Check for audio/video files
-                if filename.endswith(('.mp3', '.wav', '.mp4', '.m4a', '.webm', '.ogg')):
-                    # Check if play_id is in filename
-                    if str(play_id) in filename or f'play_{play_id}' in filename:
-                        return os.path.join(audio_dir, filename)
-        
-        # PRIORITY 4: Check chathistory table for audio_file_path
+            import glob
+            from app.audio_vad import TRIMMED_SUFFIX, SPEECH_SUFFIX
+            merged = sorted((path for path in glob.glob(os.path.join(merged_audio_dir, f'merged_play{int(play_id)}_*'))
+                             if TRIMMED_SUFFIX not in os.path.basename(path)
+                             and SPEECH_SUFFIX not in os.path.basename(path)),
+                            key=os.path.getmtime, reverse=True)
+            if merged:
+                return merged[0]
+        
+        # PRIORITY 3: Check chathistory table for audio_file_path
         import mysql.connector as ms
         from dotenv import load_dotenv
         load_dotenv()
@@ -659,70 +902,63 @@ def get_audio_file_for_play(play_id):
         return None
 
 
-def run_16pf_analysis_async(analysis_id, audio_file_path, user_age, user_gender, analysis_source):
-    """Run 16PF analysis in background and update the database with results."""
-    try:
-        print(f"[16PF] Starting analysis for analysis_id={analysis_id}")
-        
-        # Update status to processing
-        update_16pf_analysis_result(analysis_id, status='processing')
-        
-        if analysis_source == 'persona360':
-            # Use Persona360 API
-            success, result = analyze_audio_for_16pf(
-                file_path=audio_file_path,
-                age=user_age,
-                gender=user_gender
-            )
-            
-            if success:
-                update_16pf_analysis_result(
-                    analysis_id=analysis_id,
-                    status='completed',
-                    raw_response=result.get('raw_response'),
-                    personality_scores=result.get('personality_scores'),
-                    composite_scores=result.get('composite_scores'),
-                    overall_role_fit=result.get('overall_role_fit'),
-                    analysis_confidence=result.get('analysis_confidence')
-                )
-                print(f"[16PF] Analysis completed successfully for analysis_id={analysis_id}")
-            else:
-                error_msg = result.get('error', 'Unknown error')
-                update_16pf_analysis_result(
-                    analysis_id=analysis_id,
-                    status='failed',
-                    error_message=error_msg
-                )
-                print(f"[16PF] Analysis failed for analysis_id={analysis_id}: {error_msg}")
-        
-        elif analysis_source == 'third_party':
-            # Placeholder for third-party plugin integration
-            # This would be implemented based on the specific third-party API
-            update_16pf_analysis_result(
-                analysis_id=analysis_id,
-                status='failed',
-                error_message='Third-party plugin not yet implemented'
-            )
-            print(f"[16PF] Third-party plugin not implemented yet")
+def run_16pf_analysis(analysis_id, play_id, audio_file_path, user_age, user_gender, analysis_source):
+    """One attempt at a queued 16PF analysis (called by the app/pf16_queue.py workers).
+
+    Stores the results on success. Returns (success, error_message); the queue
+    decides whether a failure is retried or recorded.
+    """
+    print(f"[16PF] Starting analysis for analysis_id={analysis_id}")
+    
+    if analysis_source == 'persona360':
+        # The queued path may have been evicted from static/merged_audio (disk cache
+        # sweeper) while the job waited for a retry: rebuild / re-resolve it
+        if not os.path.exists(audio_file_path):
+            print(f"[16PF] {audio_file_path} is gone, resolving the play's audio again")
+            audio_file_path = merge_audio_files_for_play(play_id) or get_audio_file_for_play(play_id)
+            if not audio_file_path or not os.path.exists(audio_file_path):
+                return False, f"File not found: no audio for play {play_id}"
+        
+        # Send only the speech: find the silences locally, drop them in the payload encode
+        from app.audio_vad import find_speech, record_bytes_saved
+        vad = find_speech(audio_file_path)
+        
+        # Compact mono encode, sampled down to the duration cap; reused by retries
+        from app.pf16_payload import prepare_payload
+        payload = prepare_payload(play_id, audio_file_path, segments=vad['segments'])
+        if payload['trimmed']:
+            record_bytes_saved(vad, payload['source_bytes'], payload['payload_bytes'], count=not payload['reused'])
+            update_16pf_vad_report(analysis_id, vad)
+            print(f"[16PF] Trimmed silence: saved {vad['seconds_saved']}s / {vad['bytes_saved']} bytes")
+        
+        # Use Persona360 API
+        success, result = analyze_audio_for_16pf(
+            file_path=payload['path'],
+            age=user_age,
+            gender=user_gender,
+            timeout=payload['timeout']
+        )
         
-        else:
-            update_16pf_analysis_result(
-                analysis_id=analysis_id,
-                status='failed',
-                error_message=f'Unknown analysis source: {analysis_source}'
-            )
-            
-    except Exception as e:
-        error_msg = str(e)
-        print(f"[16PF] Error in async analysis: {error_msg}")
-        try:
-            update_16pf_analysis_result(
-                analysis_id=analysis_id,
-                status='failed',
-                error_message=error_msg
-            )
-        except:
-            pass
+        if not success:
+            return False, result.get('error', 'Unknown error')
+        update_16pf_analysis_result(
+            analysis_id=analysis_id,
+            status='completed',
+            raw_response=result.get('raw_response'),
+            personality_scores=result.get('personality_scores'),
+            composite_scores=result.get('composite_scores'),
+            overall_role_fit=result.get('overall_role_fit'),
+            analysis_confidence=result.get('analysis_confidence')
+        )
+        print(f"[16PF] Analysis completed successfully for analysis_id={analysis_id}")
+        return True, None
+    
+    if analysis_source == 'third_party':
+        # Placeholder for third-party plugin integration
+        # This would be implemented based on the specific third-party API
+        return False, 'Unsupported analysis source: third-party plugin not yet implemented'
+    
+    return False, f'Unsupported analysis source: {analysis_source}'
 
 
 @app.route("/api/upload-user-audio", methods=['POST'])
@@ -744,19 +980,42 @@ def upload_user_audio():
         if not play_id:
             return jsonify({"success": False, "error": "No play_id available"}), 400
         
-        # Create directory for user recordings
-        recordings_dir = os.path.join(app.root_path, 'static', 'user_recordings')
+        try:
+            play_id = int(play_id)
+            interaction_num = int(interaction_num)
+        except (TypeError, ValueError):
+            return jsonify({"success": False, "error": "Invalid play_id or interaction_number"}), 400
+        
+        # One directory per play
+        recordings_dir = play_recordings_dir(play_id)
         os.makedirs(recordings_dir, exist_ok=True)
         
         # Generate unique filename
         timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"user_audio_play{play_id}_int{interaction_num}_{timestamp}.webm"
+        filename = f"user_audio_play{play_id}_int{interaction_num}_{timestamp}_{uuid.uuid4().hex[:6]}.webm"
         file_path = os.path.join(recordings_dir, filename)
         
         # Save the audio file
         audio_file.save(file_path)
         print(f"[16PF] Saved user audio: {file_path}")
         
+        # Manifest row: all later lookups for this play go through it
+        duration_ms = request.form.get('duration_ms', type=int)
+        rel_path = os.path.relpath(file_path, os.path.join(app.root_path, 'static')).replace(os.sep, '/')
+        recording_id = create_user_recording(
+            play_id, interaction_num, rel_path,
+            os.path.getsize(file_path), duration_ms, audio_file.mimetype or 'audio/webm'
+        )
+        
+        # Normalise it right away (bounded ffmpeg queue); the finished job folds it
+        # into the play's running merge
+        transcode_status = None
+        if recording_id:
+            from app.recording_transcode import submit_transcode
+            transcode_status = submit_transcode({'id': recording_id, 'play_id': play_id,
+                                                 'interaction_number': interaction_num,
+                                                 'file_path': rel_path})
+        
         # Store the path in session for later use by 16PF analysis
         if 'user_audio_files' not in session:
             session['user_audio_files'] = []
@@ -769,6 +1028,8 @@ def upload_user_audio():
         return jsonify({
             "success": True,
             "audio_path": file_path,
+            "recording_id": recording_id,
+            "transcode_status": transcode_status,
             "message": "Audio uploaded successfully"
         })
         
@@ -777,6 +1038,55 @@ def upload_user_audio():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+@app.route("/api/user-audio/<int:recording_id>/status", methods=["GET"])
+def user_audio_status(recording_id):
+    """Transcode job status of an uploaded recording (its own play session, or an admin)."""
+    recording = get_user_recording(recording_id)
+    if not recording:
+        return jsonify({"success": False, "error": "Recording not found"}), 404
+    if session.get('is_admin') != 1 and str(session.get('play_id')) != str(recording['play_id']):
+        return jsonify({"success": False, "error": "Not allowed"}), 403
+    return jsonify({
+        "success": True,
+        "recording_id": recording_id,
+        "play_id": recording['play_id'],
+        "transcode_status": recording['transcode_status'],
+        "transcode_error": recording['transcode_error'],
+        "transcoded": bool(recording['transcoded_path']),
+        "updated_at": recording['transcode_updated_at'].isoformat() if recording['transcode_updated_at'] else None
+    })
+
+
+@app.route("/api/transcribe-chunk", methods=['POST'])
+@csrf.exempt
+def transcribe_chunk():
+    """
+    Receive one chunk of a spoken answer while the player is still recording.
+    Chunks are transcribed in the background (app/live_transcription.py) and
+    stitched on submit by process_response.
+    """
+    from app.live_transcription import add_chunk
+    
+    if 'audio' not in request.files:
+        return jsonify({"success": False, "error": "No audio chunk provided"}), 400
+    play_id = session.get('play_id')
+    if not play_id or str(request.form.get('play_id', '')) != str(play_id):
+        return jsonify({"success": False, "error": "Not allowed"}), 403
+    seq = request.form.get('seq', type=int)
+    if seq is None or seq < 0:
+        return jsonify({"success": False, "error": "Invalid chunk sequence number"}), 400
+    
+    try:
+        partial = add_chunk(play_id, request.form.get('take_id', ''), seq, request.files['audio'],
+                            language=session.get('selected_language', 'English'))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        print(f"[LIVE_STT] Error storing chunk: {str(e)}")
+        return jsonify({"success": False, "error": str(e)}), 500
+    return jsonify({"success": True, "partial": partial})
+
+
 @app.route("/api/debug-16pf/<int:play_id>")
 def debug_16pf(play_id):
     """Debug endpoint to check 16PF audio files and configuration for a play session."""
@@ -814,25 +1124,23 @@ def debug_16pf(play_id):
             result["pydub_available"] = False
             result["errors"].append("pydub not installed")
         
-        # Check user recordings
-        recordings_dir = os.path.join(app.root_path, 'static', 'user_recordings')
-        if os.path.exists(recordings_dir):
-            for filename in os.listdir(recordings_dir):
-                if f'play{play_id}_' in filename or f'play_{play_id}' in filename:
-                    file_path = os.path.join(recordings_dir, filename)
-                    result["user_recordings"].append({
-                        "filename": filename,
-                        "size": os.path.getsize(file_path),
-                        "modified": datetime.datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat()
-                    })
-        else:
-            result["errors"].append("user_recordings directory does not exist")
+        # Check user recordings (manifest)
+        for recording in get_play_recordings(play_id):
+            result["user_recordings"].append({
+                "filename": os.path.basename(recording['file_path']),
+                "interaction_number": recording['interaction_number'],
+                "size": recording['size_bytes'],
+                "duration_ms": recording['duration_ms'],
+                "transcode_status": recording['transcode_status'],
+                "transcode_error": recording['transcode_error'],
+                "modified": recording['created_at'].isoformat() if recording['created_at'] else None
+            })
         
         # Check merged audio
         merged_dir = os.path.join(app.root_path, 'static', 'merged_audio')
         if os.path.exists(merged_dir):
             for filename in os.listdir(merged_dir):
-                if f'play{play_id}' in filename:
+                if filename.startswith(f'merged_play{play_id}_'):
                     file_path = os.path.join(merged_dir, filename)
                     result["merged_audio"].append({
                         "filename": filename,
@@ -933,6 +1241,9 @@ def create_score_master(chathistory_id, overall_score):
 def create_score_breakdown(scoremaster_id, score_name, score):
     query_create_score_breakdown(scoremaster_id, score_name, score)
 
+# Stream uncached /make_audio syntheses instead of waiting for the full file (TTS_STREAMING=0 disables)
+TTS_STREAMING = os.getenv('TTS_STREAMING', '1') == '1'
+
 @app.route("/make_audio/", methods=["GET"])
 def make_audio():
     print(f"\n[MAKE_AUDIO] ========== ENDPOINT CALLED ==========")
@@ -944,10 +1255,6 @@ def make_audio():
             print(f"[MAKE_AUDIO] ERROR: No text provided")
             return "No text provided", 400
 
-        # Create cache directory
-        cache_dir = os.path.join(app.root_path, 'static', 'audio_cache')
-        os.makedirs(cache_dir, exist_ok=True)
-        
         # Get selected language from session, default to English
         selected_language = session.get('selected_language', 'English')
         
@@ -955,85 +1262,65 @@ def make_audio():
         gender = request.args.get('gender', 'female').lower()
         character = request.args.get('character', '').strip()
         
-        # Map language names to language codes
-        language_map = {
-            'English': 'en',
-            'Hindi': 'hi',
-            'Tamil': 'ta',
-            'Telugu': 'te',
-            'Kannada': 'kn',
-            'Marathi': 'mr',
-            'Bengali': 'bn',
-            'Malayalam': 'ml',
-            'French': 'fr',
-            'Arabic': 'ar',
-            'Gujarati': 'gu'
-        }
-        
-        lang_code = language_map.get(selected_language, 'en')
+        # Audio lives in the shared content-addressed TTS store (see app/tts_service.py),
+        # keyed by (text, voice, engine, language) so every worker hits the same files
+        from app.tts_service import (get_or_generate_tts, get_tts_stream, get_cached_tts_path,
+                                     get_cached_turn_path, select_voice_for_character, synthesize_turn,
+                                     TTS_SEGMENT_CHARS)
+        
+        # Select voice using the centralized voice selection
+        selected_voice = select_voice_for_character(
+            character if character else 'default',
+            gender,
+            selected_language
+        )
         
-        # Create unique filename based on text content, language, and gender/character
-        text_hash = abs(hash(text)) % (10 ** 10)
-        # Sanitize character for filename
-        if character:
-            import re
-            safe_char = re.sub(r"[^A-Za-z0-9._-]", "_", character)
-            gender_char = f"{gender}_{safe_char}"
+        # Long texts are served as a joined turn file, so look that up for them
+        if len(text) > TTS_SEGMENT_CHARS:
+            cached = get_cached_turn_path([(text, selected_voice)], language=selected_language)
         else:
-            gender_char = gender
-        filename = f'speech_{text_hash}_{lang_code}_{gender_char}.mp3'
-        filepath = os.path.join(cache_dir, filename)
+            cached = get_cached_tts_path(selected_voice, text, language=selected_language)
+        if cached is None:
+            # Check AWS credentials before attempting synthesis
+            aws_key = os.getenv('AWS_ACCESS_KEY_ID')
+            aws_secret = os.getenv('AWS_SECRET_ACCESS_KEY')
+            if not aws_key or not aws_secret:
+                print(f"[MAKE_AUDIO] ERROR: AWS credentials not configured!")
+                print(f"[MAKE_AUDIO] AWS_ACCESS_KEY_ID: {'SET' if aws_key else 'MISSING'}")
+                print(f"[MAKE_AUDIO] AWS_SECRET_ACCESS_KEY: {'SET' if aws_secret else 'MISSING'}")
+                return "AWS credentials not configured. Please contact administrator.", 500
+            print(f"[MAKE_AUDIO] Generating audio with AWS Polly: voice={selected_voice}, gender={gender}, lang={selected_language}")
         
-        # Check if audio file already exists in cache
-        if not os.path.exists(filepath):
-            try:
-                # Use AWS Polly for TTS
-                from app.tts_service import generate_polly_audio, select_voice_for_character
-                
-                # Check AWS credentials
-                aws_key = os.getenv('AWS_ACCESS_KEY_ID')
-                aws_secret = os.getenv('AWS_SECRET_ACCESS_KEY')
-                if not aws_key or not aws_secret:
-                    print(f"[MAKE_AUDIO] ERROR: AWS credentials not configured!")
-                    print(f"[MAKE_AUDIO] AWS_ACCESS_KEY_ID: {'SET' if aws_key else 'MISSING'}")
-                    print(f"[MAKE_AUDIO] AWS_SECRET_ACCESS_KEY: {'SET' if aws_secret else 'MISSING'}")
-                    return "AWS credentials not configured. Please contact administrator.", 500
-                
-                # Select voice using the centralized voice selection
-                selected_voice = select_voice_for_character(
-                    character if character else 'default',
-                    gender,
-                    selected_language
-                )
-                
-                print(f"[MAKE_AUDIO] Generating audio with AWS Polly: voice={selected_voice}, gender={gender}, lang={selected_language}")
-                
-                # Generate audio using AWS Polly
-                generate_polly_audio(text, selected_voice, filepath)
-                
-                if not os.path.exists(filepath):
-                    print(f"[MAKE_AUDIO] ERROR: Audio file was not created at {filepath}")
-                    return "Audio file generation failed", 500
-                    
-                print(f"[MAKE_AUDIO] ✅ Audio generated successfully: {filepath}")
-                    
-            except Exception as e:
-                import traceback
-                error_msg = str(e)
-                print(f"[MAKE_AUDIO] AWS Polly error: {error_msg}")
-                print(f"[MAKE_AUDIO] Traceback: {traceback.format_exc()}")
-                
-                # Check for specific AWS errors
-                if 'credentials' in error_msg.lower() or 'NoCredentialsError' in error_msg:
-                    return "AWS credentials are invalid or expired. Please contact administrator.", 500
-                elif 'timeout' in error_msg.lower():
-                    return "Audio generation is taking too long. Please try again.", 504
-                elif 'network' in error_msg.lower() or 'connection' in error_msg.lower():
-                    return "Network error during audio generation.", 503
-                else:
-                    return f"Audio generation failed: {error_msg}", 500
-        else:
-            print(f"[MAKE_AUDIO] Using cached audio: {filepath}")
+        try:
+            if len(text) > TTS_SEGMENT_CHARS:
+                # Too long for one Polly request: synthesise sentence chunks concurrently and join them
+                filepath = synthesize_turn([(text, selected_voice)], language=selected_language)
+            elif TTS_STREAMING:
+                # On a miss, pipe Polly's chunks straight to the client while they are
+                # written to the store, so playback starts before synthesis finishes
+                filepath, chunks = get_tts_stream(text, selected_voice, language=selected_language)
+                if chunks is not None:
+                    print(f"[MAKE_AUDIO] Streaming fresh synthesis to client")
+                    return Response(chunks, mimetype="audio/mpeg",
+                                    headers={'Cache-Control': 'no-store', 'X-TTS-Cache': 'miss'})
+            else:
+                filepath = get_or_generate_tts(text, voice_name=selected_voice, language=selected_language)
+            print(f"[MAKE_AUDIO] ✅ Audio ready: {filepath}")
+        except Exception as e:
+            import traceback
+            error_msg = str(e)
+            print(f"[MAKE_AUDIO] AWS Polly error: {error_msg}")
+            print(f"[MAKE_AUDIO] Traceback: {traceback.format_exc()}")
+            
+            # Check for specific AWS errors
+            if 'credentials' in error_msg.lower() or 'NoCredentialsError' in error_msg:
+                return "AWS credentials are invalid or expired. Please contact administrator.", 500
+            elif 'timeout' in error_msg.lower():
+                return "Audio generation is taking too long. Please try again.", 504
+            elif 'network' in error_msg.lower() or 'connection' in error_msg.lower():
+                return "Network error during audio generation.", 503
+            else:
+                return f"Audio generation failed: {error_msg}", 500
         
         # Return cached file
         return send_file(
@@ -1050,6 +1337,28 @@ def make_audio():
 
 
 
+
+@app.route("/turn_audio/<turn_key>.mp3", methods=["GET"])
+def turn_audio(turn_key):
+    """One MP3 for a multi-speaker turn planned by the chatbot render (see save_turn_plan)."""
+    from app.tts_service import load_turn_plan, synthesize_turn
+    plan = load_turn_plan(turn_key)
+    if plan is None:
+        return "Unknown turn", 404
+    segments, language = plan
+    try:
+        filepath = synthesize_turn(segments, language=language)
+    except Exception as e:
+        print(f"[TURN_AUDIO] Synthesis failed for turn {turn_key}: {e}")
+        return f"Audio generation failed: {e}", 500
+    return send_file(
+        filepath,
+        mimetype="audio/mpeg",
+        conditional=True,
+        etag=True,
+        max_age=3600
+    )
+
 @app.route('/')
 @app.route('/index')
 def index():
@@ -1513,7 +1822,7 @@ def chatbot(roleplay_id, interaction_num):
         context = {}
         context["scenario"] = reader_obj.get_system_prompt()
         context["image"] = reader_obj.get_system_prompt_image()
-        context["cumul_score"] = cumul_score(roleplay_id)
+        context["cumul_score"] = running_score()
         
         print(f"🖼️ DEBUG IMAGE: System prompt image URL = {context['image']}")
         
@@ -1523,7 +1832,8 @@ def chatbot(roleplay_id, interaction_num):
         context["dialogue_segments"] = []
         print(f"🎬 INITIAL SCENARIO: Set default gender=male for scenario audio")
         
-        # Get cluster type from database - ALWAYS fetch fresh, don't cache
+        # Get cluster type - served from the metadata cache, which the admin
+        # cluster create/update/delete paths invalidate on write
         cluster_type = 'training'  # Default
         cluster_id = session.get('cluster_id')
         user_id = session.get('user_id')
@@ -1535,53 +1845,14 @@ def chatbot(roleplay_id, interaction_num):
         print(f"   user_id: {user_id}")
         print(f"   roleplay_id: {session.get('roleplay_id')}")
         print(f"   cluster_id from session: {cluster_id}")
-        print(f"   All session keys: {list(session.keys())}")
         
-        # Always fetch fresh cluster type from database to avoid stale cached data
         if cluster_id:
-            try:
-                conn = mysql.connector.connect(
-                    host=os.getenv('DB_HOST', 'localhost'),
-                    user=os.getenv('DB_USER', 'root'),
-                    password=os.getenv('DB_PASSWORD'),
-                    database=os.getenv('DB_NAME', 'roleplay')
-                )
-                cur = conn.cursor()
-                
-                # First, let's see ALL data in the cluster
-                cur.execute("SELECT id, name, type FROM roleplay_cluster WHERE id = %s", (cluster_id,))
-                result = cur.fetchone()
-                if result:
-                    cluster_type = result[2]  # type is the 3rd column (index 2)
-                    print(f"\n✅ FOUND cluster in database:")
-                    print(f"   Cluster ID: {result[0]}")
-                    print(f"   Cluster Name: {result[1]}")
-                    print(f"   Cluster Type: '{result[2]}'")
-                    print(f"   Type datatype: {type(cluster_type)}")
-                    print(f"   Type repr: {repr(cluster_type)}")
-                else:
-                    print(f"\n❌ WARNING: No cluster found with id {cluster_id} in database!")
-                
-                # Also check which clusters this roleplay belongs to
-                cur.execute("""
-                    SELECT rc.id, rc.name, rc.type 
-                    FROM roleplay_cluster rc
-                    JOIN cluster_roleplay cr ON rc.id = cr.cluster_id
-                    WHERE cr.roleplay_id = %s
-                """, (session.get('roleplay_id'),))
-                all_clusters = cur.fetchall()
-                if all_clusters:
-                    print(f"\n📊 This roleplay exists in {len(all_clusters)} cluster(s):")
-                    for cluster in all_clusters:
-                        marker = "👉" if cluster[0] == cluster_id else "   "
-                        print(f"   {marker} ID: {cluster[0]}, Name: '{cluster[1]}', Type: '{cluster[2]}'")
-                
-                cur.close()
-                conn.close()
-            except Exception as e:
-                print(f"\n❌ ERROR fetching cluster type: {e}")
-                import traceback
-                traceback.print_exc()
+            result = get_cluster(cluster_id)
+            if result:
+                cluster_type = result[3]  # id, name, cluster_id, type, ...
+                print(f"\n✅ FOUND cluster: ID={result[0]}, Name='{result[1]}', Type='{cluster_type}'")
+            else:
+                print(f"\n❌ WARNING: No cluster found with id {cluster_id} in database!")
         
         # If no cluster_id in session, try to get it from user_cluster table
         elif user_id:
@@ -1631,7 +1902,7 @@ def chatbot(roleplay_id, interaction_num):
         
         # Translate scenario if not in English
         if selected_language != 'English':
-            context["scenario"] = translate_text(context["scenario"], selected_language)
+            context["scenario"] = translate_text(context["scenario"], selected_language, roleplay_id)
         
         # Calculate elapsed time for total timer
         if 'roleplay_start_time' in session:
@@ -1651,7 +1922,7 @@ def chatbot(roleplay_id, interaction_num):
             comp_dialogue = session["comp_dialogue"]
             # Translate AI dialogue if not in English
             if selected_language != 'English':
-                comp_dialogue = translate_text(comp_dialogue, selected_language)
+                comp_dialogue = translate_text(comp_dialogue, selected_language, roleplay_id)
             context["comp_dialogue"] = comp_dialogue
             context["last_round_result"] = session["last_round_result"]
             context["score"] = session["score"]
@@ -1664,206 +1935,9 @@ def chatbot(roleplay_id, interaction_num):
         
         # Extract character and determine gender for voice
         if context["data"]:
-            # Helper function to detect gender from speaker text
-            def detect_gender(speaker_text):
-                """
-                Detect gender from speaker name/text using markers in the cell:
-                Formats supported:
-                - "Bheem (M): Hello" → Male
-                - "Kalyani (F): Hello" → Female
-                - "Mr. Smith: Hello" → Male (title detection)
-                - "Ms. Jones: Hello" → Female (title detection)
-                - Common Indian male names → Male
-                - Common Indian female names → Female
-                Default: Male
-                """
-                if not speaker_text:
-                    return "male"  # default
-                
-                text = str(speaker_text).strip()
-                text_lower = text.lower()
-                
-                # Method 1: Explicit gender markers (M), (F), (Male), (Female)
-                if '(m)' in text_lower or '(male)' in text_lower:
-                    return "male"
-                
-                if '(f)' in text_lower or '(female)' in text_lower:
-                    return "female"
-                
-                # Method 2: Title/prefix detection in speaker name
-                male_titles = ['mr.', 'mr', 'sir', 'mister', 'lord', 'king', 'prince']
-                female_titles = ['ms.', 'mrs.', 'miss', 'madam', 'lady', 'queen', 'princess']
-                
-                for title in male_titles:
-                    if text_lower.startswith(title) or f' {title} ' in text_lower:
-                        return "male"
-                
-                for title in female_titles:
-                    if text_lower.startswith(title) or f' {title} ' in text_lower:
-                        return "female"
-                
-                # Method 3: Common name detection
-                # Common Indian male names
-                male_names = [
-                    'bheem', 'satyam', 'rahul', 'amit', 'suresh', 'mahesh', 'rajesh', 'vijay',
-                    'anil', 'kumar', 'ravi', 'sanjay', 'deepak', 'ajay', 'prakash', 'mohan',
-                    'gopal', 'krishna', 'ram', 'shyam', 'arjun', 'karan', 'rohan', 'varun',
-                    'john', 'david', 'michael', 'james', 'robert', 'william', 'richard',
-                    'prabhat', 'vinod', 'ashok', 'sunil', 'manoj', 'rakesh', 'pradeep'
-                ]
-                
-                # Common Indian female names
-                female_names = [
-                    'kalyani', 'priya', 'anita', 'sunita', 'geeta', 'meena', 'seema', 'rekha',
-                    'kavita', 'neeta', 'pooja', 'rani', 'lakshmi', 'durga', 'radha', 'sita',
-                    'swati', 'anjali', 'divya', 'nisha', 'ritu', 'sneha', 'neha', 'shruti',
-                    'mary', 'patricia', 'jennifer', 'linda', 'elizabeth', 'susan', 'jessica',
-                    'deepa', 'shanti', 'asha', 'lata', 'usha', 'savita', 'mamta'
-                ]
-                
-                # Check if the name (first word) matches
-                first_word = text_lower.split()[0] if text_lower.split() else ''
-                # Remove any punctuation
-                first_word = first_word.rstrip(':').rstrip('.')
-                
-                if first_word in male_names:
-                    return "male"
-                if first_word in female_names:
-                    return "female"
-                
-                # Method 4: Default fallback - male for most professional settings
-                return "male"
-            
-            # IMPORTANT: Player is always SINGLE person
-            # Column B is for COMPUTER RESPONSE characters (who speaks back to player)
-            # Computer response can have TEAM of people responding
-            
-            character = context["data"].get("character")
-            characters = context["data"].get("characters", [])
-            
-            # Get the computer dialogue that will be read out
-            dialogue = session.get("comp_dialogue", "")
-            
-            # Parse dialogue into speaker segments for multi-voice team roleplays
-            # Format: "Bheem: Hello Sir | Satyam: Good morning"
-            dialogue_segments = []
-            speakers = []
-            primary_speaker = None
-            
-            if dialogue:
-                # Split dialogue into lines (handle both \n and | separators)
-                lines = dialogue.replace('\n', '|').split('|')
-                print(f"DEBUG DIALOGUE PARSING: Total lines after split: {len(lines)}")
-                print(f"DEBUG DIALOGUE PARSING: Raw dialogue text:\n{dialogue}")
-                
-                for line in lines:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    print(f"DEBUG DIALOGUE PARSING: Processing line: '{line}'")
-                    
-                    # Check if line has "Name: dialogue" format
-                    if ':' in line:
-                        parts = line.split(':', 1)  # Split only on first colon
-                        speaker_name_raw = parts[0].strip()
-                        speaker_text = parts[1].strip() if len(parts) > 1 else ""
-                        
-                        # Validate it's a name (not "Others nod", URLs, etc.)
-                        skip_words = ['http', 'https', 'others nod', 'everyone nods', 'all nod', 'scenario']
-                        validation_passed = (speaker_name_raw and len(speaker_name_raw) < 50 and not speaker_name_raw.isdigit() 
-                            and not any(skip in speaker_name_raw.lower() for skip in skip_words)
-                            and speaker_text)  # Must have actual dialogue
-                        
-                        if not validation_passed:
-                            print(f"❌ SKIPPED LINE: Speaker='{speaker_name_raw}' - Failed validation (text='{speaker_text[:30] if speaker_text else 'EMPTY'}...')")
-                        
-                        if validation_passed:
-                            
-                            # Detect gender from speaker name (may contain markers like "(M)" or "(F)")
-                            speaker_gender = detect_gender(speaker_name_raw)
-                            
-                            # Clean speaker name: Remove gender markers for display
-                            # "Bheem (M)" → "Bheem"
-                            speaker_name = speaker_name_raw
-                            import re
-                            speaker_name = re.sub(r'\s*\([MFmf]\)|\s*\((male|female|Male|Female)\)', '', speaker_name).strip()
-                            
-                            # Add segment
-                            dialogue_segments.append({
-                                'speaker': speaker_name,
-                                'text': speaker_text,
-                                'gender': speaker_gender
-                            })
-                            
-                            if speaker_name not in speakers:
-                                speakers.append(speaker_name)
-                            
-                            if not primary_speaker:
-                                primary_speaker = speaker_name
-                    else:
-                        # Line without "Name:" format - add as generic text
-                        if line.lower() not in ['others nod', 'everyone nods', 'all nod']:
-                            # Add as a segment with no specific speaker
-                            dialogue_segments.append({
-                                'speaker': '',
-                                'text': line,
-                                'gender': 'female'  # default
-                            })
-                
-                if dialogue_segments:
-                    pass  # Segments parsed successfully
-            
-            # Fallback: Use character names from Excel column B if no segments parsed
-            if not dialogue_segments and characters and len(characters) > 0:
-                primary_speaker = characters[0]
-                speakers = characters
-            
-            # Check for gender marker from Excel Column B (single-speaker roleplays)
-            gender_marker = context["data"].get("gender_marker")
-            
-            # Translate dialogue segments text if not in English
-            if dialogue_segments and selected_language != 'English':
-                for segment in dialogue_segments:
-                    if segment.get('text'):
-                        segment['text'] = translate_text(segment['text'], selected_language)
-            
-            # Set dialogue segments for multi-voice audio playback
-            context["dialogue_segments"] = dialogue_segments
-            context["has_multiple_speakers"] = len(dialogue_segments) > 1
-            
-            # Determine character and gender for audio (for computer response voice)
-            if dialogue_segments:
-                # Multi-speaker roleplay: Use first segment's speaker as primary
-                first_segment = dialogue_segments[0]
-                context["character"] = first_segment['speaker']
-                context["gender"] = first_segment['gender']
-                context["all_speakers"] = speakers
-                context["is_team_roleplay"] = len(speakers) > 1
-            elif gender_marker:
-                # Single-speaker roleplay: Use gender marker from Column B "other (M)" or "other (F)"
-                context["character"] = ""
-                context["gender"] = gender_marker
-                context["is_team_roleplay"] = False
-                context["dialogue_segments"] = []  # Empty for single voice
-            elif primary_speaker:
-                # Team roleplay with multiple people in computer response
-                context["character"] = primary_speaker
-                context["gender"] = detect_gender(primary_speaker)
-                context["all_speakers"] = speakers
-                context["is_team_roleplay"] = len(speakers) > 1
-                context["dialogue_segments"] = []  # Empty for single voice
-            elif character:
-                # Single character in computer response (from Excel column B)
-                context["character"] = character
-                context["gender"] = detect_gender(character)
-                context["is_team_roleplay"] = False
-                context["dialogue_segments"] = []  # Empty for single voice
-            else:
-                # No character specified - use default male voice
-                context["character"] = ""
-                context["gender"] = "male"  # Default to male voice
-                context["is_team_roleplay"] = False
-                context["dialogue_segments"] = []  # Empty for single voice
+            # Who speaks the last computer line, and in which voice(s)
+            context.update(resolve_dialogue_voice(session.get("comp_dialogue", ""), context["data"], selected_language,
+                                                  roleplay_id))
         if context["data"] == False:
             
             print(f"[16PF] ========== ROLEPLAY COMPLETED ==========")
@@ -1881,12 +1955,7 @@ def chatbot(roleplay_id, interaction_num):
                     database=os.getenv('DB_NAME', 'roleplay')
                 )
                 cur = conn.cursor()
-                cur.execute("""
-                    UPDATE play 
-                    SET status = 'completed', end_time = CURRENT_TIMESTAMP
-                    WHERE id = %s
-                """, (session['play_id'],))
-                conn.commit()
+                mark_play_completed(session['play_id'])
                 
                 # Get roleplay config for attempts and ideal video info
                 roleplay_id_for_config = session.get('roleplay_id')
@@ -2006,7 +2075,7 @@ def chatbot(roleplay_id, interaction_num):
                 tip = context["data"]["tip"]
                 # Translate tip if not in English
                 if selected_language != 'English':
-                    tip = translate_text(tip, selected_language)
+                    tip = translate_text(tip, selected_language, roleplay_id)
                 context["tip"] = tip
 
         # Pass voice configuration to template
@@ -2017,6 +2086,11 @@ def chatbot(roleplay_id, interaction_num):
         context["max_interaction_time"] = session.get('max_interaction_time', 300)
         context["max_total_time"] = session.get('max_total_time', 1800)
         
+        # Chunked server-side transcription of spoken answers
+        from app.live_transcription import ENABLED as LIVE_STT_ENABLED, CHUNK_SECONDS as LIVE_STT_CHUNK_SECONDS
+        context["live_transcription"] = LIVE_STT_ENABLED and context["voice_enabled"]
+        context["live_chunk_seconds"] = LIVE_STT_CHUNK_SECONDS
+        
         # Pass play_id and interaction_number to template for 16PF audio upload
         context["play_id"] = session.get('play_id', '')
         context["interaction_number"] = session.get('interaction_number', 1)
@@ -2036,73 +2110,44 @@ def chatbot(roleplay_id, interaction_num):
         # PRE-GENERATE AUDIO: Create audio files before rendering template so they're cached when page loads
         # This eliminates the delay when loading the audio player
         try:
-            from app.tts_service import generate_polly_audio, select_voice_for_character
-            import re
+            from app.tts_service import (select_voice_for_character, plan_synthesis, save_turn_plan,
+                                         synthesize_turn, TTS_SEGMENT_CHARS)
+            from app.tts_prefetch import fetch_for_render, prefetch_async, prefetch_lines, PREFETCH_CANDIDATES
             
-            # Get language code
-            language_map = {
-                'English': 'en', 'Hindi': 'hi', 'Tamil': 'ta', 'Telugu': 'te',
-                'Kannada': 'kn', 'Marathi': 'mr', 'Bengali': 'bn', 'Malayalam': 'ml',
-                'French': 'fr', 'Arabic': 'ar', 'Gujarati': 'gu'
-            }
-            lang_code = language_map.get(selected_language, 'en')
-            
-            # Create cache directory
-            cache_dir = os.path.join(app.root_path, 'static', 'audio_cache')
-            os.makedirs(cache_dir, exist_ok=True)
+            # Team roleplays have one clip per speaker segment, single speakers the whole line (or the scenario)
+            audio_text = context.get('comp_dialogue') or context.get('scenario', '')
+            # Same voice resolution as the make_audio route, so every clip hits the same store entry
+            voiced_lines = [(line_text, select_voice_for_character(line_character, line_gender, selected_language))
+                            for line_text, line_character, line_gender in dialogue_audio_lines(context, audio_text)]
+            if len(voiced_lines) > 1:
+                # Multi-speaker turn: the page plays one MP3 built from concurrently synthesised segments
+                turn_key = save_turn_plan(voiced_lines, selected_language)
+                context["turn_audio_url"] = url_for('turn_audio', turn_key=turn_key)
+                if TTS_STREAMING:
+                    # Start the segments now; /turn_audio picks up whatever is done or in flight
+                    prefetch_lines(plan_synthesis(voiced_lines), selected_language)
+                else:
+                    synthesize_turn(voiced_lines, selected_language)
+            elif voiced_lines and len(voiced_lines[0][0]) > TTS_SEGMENT_CHARS:
+                # Long single line: /make_audio joins its sentence chunks; warm them in the background
+                prefetch_lines(plan_synthesis(voiced_lines), selected_language)
+            elif voiced_lines:
+                line_text, selected_voice = voiced_lines[0]
+                # With streaming on, a miss is left to /make_audio so the page renders
+                # now and playback starts on the first Polly chunks
+                fetch_for_render(line_text, selected_voice, selected_language,
+                                 post_turn=bool(context.get('comp_dialogue')),
+                                 synthesise=not TTS_STREAMING)
             
-            # Pre-generate audio for TEAM roleplays (multiple segments)
-            dialogue_segments = context.get('dialogue_segments', [])
-            if dialogue_segments and len(dialogue_segments) > 0:
-                for segment in dialogue_segments:
-                    segment_text = segment.get('text', '')
-                    segment_gender = segment.get('gender', 'male')
-                    segment_speaker = segment.get('speaker', '')
-                    
-                    if segment_text:
-                        # Generate filename (same logic as make_audio route)
-                        text_hash = abs(hash(segment_text)) % (10 ** 10)
-                        # Sanitize speaker name for filename
-                        if segment_speaker:
-                            safe_speaker = re.sub(r"[^A-Za-z0-9._-]", "_", segment_speaker)
-                            gender_char = f"{segment_gender}_{safe_speaker}"
-                        else:
-                            gender_char = segment_gender
-                        filename = f'speech_{text_hash}_{lang_code}_{gender_char}.mp3'
-                        filepath = os.path.join(cache_dir, filename)
-                        
-                        # Generate audio if not cached - use AWS Polly TTS
-                        if not os.path.exists(filepath):
-                            selected_voice = select_voice_for_character(
-                                segment_speaker if segment_speaker else 'default',
-                                segment_gender,
-                                selected_language
-                            )
-                            generate_polly_audio(segment_text, selected_voice, filepath)
-            else:
-                # Single speaker - pre-generate main audio
-                audio_text = context.get('comp_dialogue') or context.get('scenario', '')
-                audio_gender = context.get('gender', 'male')
-                audio_character = context.get('character', '')
-                
-                if audio_text:
-                    text_hash = abs(hash(audio_text)) % (10 ** 10)
-                    # Sanitize character for filename
-                    if audio_character:
-                        safe_char = re.sub(r"[^A-Za-z0-9._-]", "_", audio_character)
-                        gender_char = f"{audio_gender}_{safe_char}"
-                    else:
-                        gender_char = audio_gender
-                    filename = f'speech_{text_hash}_{lang_code}_{gender_char}.mp3'
-                    filepath = os.path.join(cache_dir, filename)
-                    
-                    if not os.path.exists(filepath):
-                        selected_voice = select_voice_for_character(
-                            audio_character if audio_character else 'default',
-                            audio_gender,
-                            selected_language
-                        )
-                        generate_polly_audio(audio_text, selected_voice, filepath)
+            # Prewarm the verbatim next-turn lines while the player answers. The lambda
+            # runs on the prefetch pool, outside the request context: plain values only
+            if context["data"] and PREFETCH_CANDIDATES:
+                interaction_number, node_data = session['interaction_number'], context["data"]
+                prefetch_async(
+                    lambda: next_turn_audio_lines(reader_obj, interaction_number, node_data,
+                                                  selected_language, roleplay_id),
+                    selected_language
+                )
         except Exception as e:
             print(f"[CHATBOT] TTS pre-gen error: {e}")
             pass  # Will generate on demand
@@ -2748,6 +2793,22 @@ def upload_files():
         print(f"Error saving roleplay config: {str(e)}")
         flash("Roleplay saved but configuration failed to save")
     
+    # Pre-render the roleplay's audio in the background (resumes if a previous run failed)
+    try:
+        from app.tts_prerender import ON_UPLOAD, start_prerender
+        if ON_UPLOAD:
+            start_prerender(new_id)
+    except Exception as e:
+        print(f"Could not start audio pre-render for {new_id}: {e}")
+    
+    # Translate the roleplay into its other languages for review (app/roleplay_bundles.py)
+    try:
+        from app.roleplay_bundles import ON_UPLOAD as BUNDLE_ON_UPLOAD, start_bundle_build
+        if BUNDLE_ON_UPLOAD:
+            start_bundle_build(new_id)
+    except Exception as e:
+        print(f"Could not start translation bundles for {new_id}: {e}")
+    
     # Show appropriate message based on whether it was an update or creation
     if id:
         flash(f'Roleplay has been successfully updated!')
@@ -2800,6 +2861,16 @@ def process_response():
         form = PostForm()
         if form.validate_on_submit():
             session['user_input'] = form.post.data.strip()
+        
+        # Spoken answer: use the server-side transcript of the chunks uploaded while
+        # recording (also when the browser produced no text of its own)
+        take_id = request.form.get('live_take_id')
+        if take_id and session.get('play_id') and 'csrf_token' not in form.errors:
+            from app.live_transcription import finish_take
+            transcript = finish_take(session['play_id'], take_id, request.form.get('live_chunk_count'),
+                                     language=session.get('selected_language', 'English'))
+            if transcript:
+                session['user_input'] = transcript
     
     # Check if user_input is in session
     if 'user_input' not in session:
@@ -2859,7 +2930,7 @@ def _process_ai_and_update_session():
             interaction_data = reader_obj.get_interaction(session["interaction_number"])
             
             # Create chat entry with 0 score
-            chathistory_id = create_chat_entry(session['user_input'], "Please provide a response next time.")
+            chathistory_id = create_chat_entry(session['user_input'], TIMEOUT_REPLY)
             scoremaster_id = create_score_master(chathistory_id, 0)
             
             # Get all competencies and set them to 0
@@ -2880,9 +2951,10 @@ def _process_ai_and_update_session():
             create_score_breakdown(scoremaster_id, "Aligned to best practice score", 0)
             session["last_round_result"]["Sentiment/Keyword Match Score"] = 0
             session["last_round_result"]["Aligned to best practice score"] = 0
+            record_turn_score(0, session["last_round_result"])
             
             session["score"] = 0
-            session["comp_dialogue"] = "Please provide a response next time."
+            session["comp_dialogue"] = TIMEOUT_REPLY
             session["image_interaction_number"] = session["interaction_number"]
             
             # Move to next interaction (using score of 1 for flow, but recorded score is 0)
@@ -2914,9 +2986,11 @@ def _process_ai_and_update_session():
                     score_name = name_change_dict[competency]
                 session["last_round_result"][score_name] = resp["score_breakdown"][competency]
                 create_score_breakdown(scoremaster_id, score_name, resp["score_breakdown"][competency])
+            record_turn_score(resp["score"], session["last_round_result"])
 
             session["score"] = resp["score"]
             session["comp_dialogue"] = resp["comp"]
+            localize_reply(resp["comp"], session.get('selected_language', 'English'))
             session["image_interaction_number"] = session["interaction_number"]
             session["interaction_number"] = resp["interaction_number"]
         
@@ -3029,13 +3103,107 @@ def admin_cluster_edit(cluster_id):
     # Pre-calculate assigned user IDs for simple template lookup
     assigned_user_ids = [cu[0] for cu in cluster_users]
     
+    # Latest audio pre-render job per roleplay in this cluster
+    from app.queries import get_latest_prerender_jobs
+    prerender_jobs = get_latest_prerender_jobs([cr[0] for cr in cluster_roleplays or []])
+    
     return render_template('admin_cluster_form.html', 
                          cluster=cluster, 
                          roleplays=roleplays, 
                          cluster_roleplays=cluster_roleplays,
                          users=users,
                          cluster_users=cluster_users,
-                         assigned_user_ids=assigned_user_ids)
+                         assigned_user_ids=assigned_user_ids,
+                         prerender_jobs=prerender_jobs)
+
+@app.route('/admin/clusters/<int:cluster_id>/prerender-audio', methods=['POST'])
+@admin_required
+def admin_cluster_prerender_audio(cluster_id):
+    """Start (or resume) audio pre-render jobs for every roleplay in the cluster"""
+    from app.tts_prerender import start_prerender
+    cluster_roleplays = get_cluster_roleplays(cluster_id) or []
+    started = 0
+    for roleplay in cluster_roleplays:
+        try:
+            _, is_new = start_prerender(roleplay[0])
+            started += 1 if is_new else 0
+        except Exception as e:
+            print(f"Could not start audio pre-render for {roleplay[0]}: {e}")
+    message = f'Audio pre-render started for {started} of {len(cluster_roleplays)} roleplays'
+    if started < len(cluster_roleplays):
+        message += ' (the rest are already running)'
+    flash(message)
+    return redirect(url_for('admin_cluster_edit', cluster_id=cluster_id))
+
+@app.route('/admin/roleplay/<path:roleplay_id>/prerender-audio', methods=['GET', 'POST'])
+@admin_required
+def admin_roleplay_prerender_audio(roleplay_id):
+    """POST starts/resumes the roleplay's audio pre-render; GET returns the latest job
+    and, with ?report=1, a per-language completeness report"""
+    from app.tts_prerender import start_prerender, prerender_report
+    from app.queries import get_latest_prerender_job
+    if request.method == 'POST':
+        job_id, started = start_prerender(roleplay_id)
+        return jsonify({'success': job_id is not None, 'job_id': job_id, 'started': started})
+    
+    result = {'success': True, 'job': get_latest_prerender_job(roleplay_id)}
+    if request.args.get('report') == '1':
+        try:
+            result['report'] = prerender_report(roleplay_id)
+        except Exception as e:
+            result['report_error'] = str(e)
+    return jsonify(result)
+
+@app.route('/admin/roleplay/<path:roleplay_id>/translations', methods=['GET'])
+@admin_required
+def admin_roleplay_translations(roleplay_id):
+    """Review a roleplay's pre-localised bundles: build status per language and every
+    line with its machine translation and admin override"""
+    from app.queries import get_translation_bundles, get_roleplay_translations
+    from app.roleplay_bundles import bundle_languages
+    roleplay = get_roleplay(roleplay_id)
+    if not roleplay:
+        flash('Roleplay not found')
+        return redirect(url_for('admin'))
+    bundles = get_translation_bundles(roleplay_id)
+    languages = sorted(set(bundle_languages(roleplay_id)) | {b['language'] for b in bundles})
+    language = request.args.get('language') or (languages[0] if languages else None)
+    lines = get_roleplay_translations(roleplay_id, language) if language else []
+    if request.args.get('format') == 'json':
+        return jsonify({'success': True, 'bundles': bundles, 'language': language, 'lines': lines})
+    return render_template('admin_roleplay_translations.html', roleplay=roleplay, bundles=bundles,
+                           languages=languages, language=language, lines=lines)
+
+@app.route('/admin/roleplay/<path:roleplay_id>/translations/build', methods=['POST'])
+@admin_required
+def admin_roleplay_translations_build(roleplay_id):
+    """Start (re)building the roleplay's bundles; overrides are kept"""
+    from app.roleplay_bundles import start_bundle_build
+    language = request.form.get('language')
+    languages, started = start_bundle_build(roleplay_id, [language] if language else None)
+    if not languages:
+        flash('This roleplay has no languages other than English')
+    elif started:
+        flash(f'Translating into {", ".join(languages)}')
+    else:
+        flash('A translation build is already running for this roleplay')
+    return redirect(url_for('admin_roleplay_translations', roleplay_id=roleplay_id, language=language))
+
+@app.route('/admin/roleplay/<path:roleplay_id>/translations/<int:translation_id>', methods=['POST'])
+@admin_required
+def admin_roleplay_translation_override(roleplay_id, translation_id):
+    """Save (or clear, when empty) an admin override for one line"""
+    from app.queries import set_roleplay_translation_override
+    from app.roleplay_bundles import invalidate_bundle
+    override_text = (request.form.get('override_text') or '').strip()
+    language = set_roleplay_translation_override(translation_id, roleplay_id, override_text)
+    if language is None:
+        flash('Could not save the translation')
+    else:
+        invalidate_bundle(roleplay_id, language)
+        flash('Translation override saved' if override_text else 'Translation override cleared')
+    return redirect(url_for('admin_roleplay_translations', roleplay_id=roleplay_id,
+                            language=language or request.form.get('language')) + f'#line{translation_id}')
 
 @app.route('/admin/clusters', methods=['POST'])
 @admin_required
@@ -3130,6 +3298,53 @@ def admin_cluster_create():
         flash('Error creating cluster')
         return redirect(url_for('admin_clusters'))
 
+@app.route('/admin/cache-stats')
+@admin_required
+def admin_cache_stats():
+    """Hit/miss counters for the in-process metadata and TTS caches (this worker only)
+    plus size/eviction figures for the on-disk audio caches"""
+    from app.tts_service import get_tts_cache_stats
+    from app.tts_prefetch import get_prefetch_stats
+    from app.disk_cache import disk_cache_stats
+    from app.recording_merge import get_merge_stats
+    from app.recording_transcode import get_transcode_stats
+    from app.audio_vad import get_vad_stats
+    from app.live_transcription import get_live_stt_stats
+    from app.translation_memory import get_translation_stats
+    from app.roleplay_bundles import get_bundle_stats
+    from app.pf16_queue import get_pf16_queue_stats
+    from app.http_client import get_http_stats
+    from app.pf16_payload import get_payload_stats
+    from app.pf16_status import get_status_stats
+    return jsonify({'success': True, 'pid': os.getpid(), 'caches': cache_stats(),
+                    'tts': get_tts_cache_stats(), 'tts_prefetch': get_prefetch_stats(),
+                    'disk': disk_cache_stats(),
+                    'recording_merge': get_merge_stats(), 'recording_transcode': get_transcode_stats(),
+                    'vad': get_vad_stats(), 'live_transcription': get_live_stt_stats(),
+                    'translation_memory': get_translation_stats(), 'roleplay_bundles': get_bundle_stats(),
+                    'pf16_queue': get_pf16_queue_stats(), 'pf16_payload': get_payload_stats(),
+                    'pf16_status': get_status_stats(), 'http': get_http_stats()})
+
+@app.route('/admin/disk-cache/sweep', methods=['POST'])
+@admin_required
+def admin_disk_cache_sweep():
+    """Sweep the on-disk audio caches now instead of waiting for the background sweeper"""
+    from app.disk_cache import sweep_all, disk_cache_stats
+    return jsonify({'success': True, 'pid': os.getpid(), 'sweeps': sweep_all(), 'disk': disk_cache_stats()})
+
+@app.route('/admin/sql-stats')
+@admin_required
+def admin_sql_stats():
+    """Recent per-request SQL counts, slowest statements and N+1 suspects (this worker only)"""
+    from app.sql_instrumentation import recent_requests, endpoint_totals
+    if request.args.get('format') == 'json':
+        return jsonify({'success': True, 'pid': os.getpid(),
+                        'endpoints': endpoint_totals(), 'requests': recent_requests()})
+    return render_template('admin_sql_stats.html',
+                           endpoints=endpoint_totals(),
+                           requests=recent_requests(),
+                           pid=os.getpid())
+
 @app.route('/admin/clusters/<int:cluster_id>/delete', methods=['GET'])
 @admin_required
 def admin_cluster_delete(cluster_id):
@@ -3192,19 +3407,23 @@ def admin_user_detail(user_id):
         
         print(f"[ADMIN_USER_DETAIL] Querying attempted roleplays...")
         # Modified query to handle cases where cluster_id might be NULL
+        # Score comes from the materialised play_summary row (one lookup per play);
+        # plays without one yet (not backfilled) fall back to averaging their turns
         cur.execute("""
             SELECT p.id, p.roleplay_id, p.cluster_id, p.status, p.start_time, p.end_time,
                    r.name as roleplay_name, r.person_name, 
                    COALESCE(rc.name, 'No Cluster') as cluster_name,
-                   ROUND(AVG(sm.overall_score)) as score_total
+                   ROUND(COALESCE(ps.avg_overall_score, (
+                       SELECT AVG(sm.overall_score)
+                       FROM chathistory ch
+                       JOIN scoremaster sm ON sm.chathistory_id = ch.id
+                       WHERE ch.play_id = p.id
+                   ))) as score_total
             FROM play p
             JOIN roleplay r ON p.roleplay_id = r.id
             LEFT JOIN roleplay_cluster rc ON p.cluster_id = rc.id
-            LEFT JOIN chathistory ch ON ch.play_id = p.id
-            LEFT JOIN scoremaster sm ON sm.chathistory_id = ch.id
+            LEFT JOIN play_summary ps ON ps.play_id = p.id
             WHERE p.user_id = %s AND p.status IN ('completed', 'optimal_viewed')
-            GROUP BY p.id, p.roleplay_id, p.cluster_id, p.status, p.start_time, p.end_time,
-                     r.name, r.person_name, rc.name
             ORDER BY p.start_time DESC
         """, (user_id,))
         
@@ -3387,42 +3606,34 @@ def user_cluster_view(user_id, cluster_id):
         # Get roleplays in this cluster with their configs
         cluster_roleplays = get_cluster_roleplays(cluster_id)
         
+        # User's play counts per roleplay/status in THIS cluster - one grouped query
+        # instead of three COUNT(*) queries (and a new connection) per roleplay
+        play_counts = {}
+        conn = mysql.connector.connect(
+            host=os.getenv('DB_HOST', 'localhost'),
+            user=os.getenv('DB_USER', 'root'),
+            password=os.getenv('DB_PASSWORD'),
+            database=os.getenv('DB_NAME', 'roleplay')
+        )
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT roleplay_id, status, COUNT(*) FROM play
+            WHERE user_id = %s AND cluster_id = %s
+              AND status IN ('completed', 'optimal_viewed', 'in_progress')
+            GROUP BY roleplay_id, status
+        """, (user_id, cluster_id))
+        for rp_id, play_status, count in cur.fetchall():
+            play_counts[(rp_id, play_status)] = count
+        cur.close()
+        conn.close()
+        
         roleplay_data = []
         for rp in cluster_roleplays:
             config = get_roleplay_config(rp[0])
             
-            # Check user's attempts for this roleplay
-            conn = mysql.connector.connect(
-                host=os.getenv('DB_HOST', 'localhost'),
-                user=os.getenv('DB_USER', 'root'),
-                password=os.getenv('DB_PASSWORD'),
-                database=os.getenv('DB_NAME', 'roleplay')
-            )
-            cur = conn.cursor()
-            
-            # Get user's play history for this roleplay in THIS cluster
-            cur.execute("""
-                SELECT COUNT(*) FROM play 
-                WHERE user_id = %s AND roleplay_id = %s AND cluster_id = %s AND status = 'completed'
-            """, (user_id, rp[0], cluster_id))
-            completed_attempts = cur.fetchone()[0]
-            
-            # Check if user viewed optimal video in THIS cluster
-            cur.execute("""
-                SELECT COUNT(*) FROM play 
-                WHERE user_id = %s AND roleplay_id = %s AND cluster_id = %s AND status = 'optimal_viewed'
-            """, (user_id, rp[0], cluster_id))
-            viewed_optimal = cur.fetchone()[0] > 0
-            
-            # Check if there's an in-progress attempt in THIS cluster
-            cur.execute("""
-                SELECT COUNT(*) FROM play 
-                WHERE user_id = %s AND roleplay_id = %s AND cluster_id = %s AND status = 'in_progress'
-            """, (user_id, rp[0], cluster_id))
-            has_in_progress = cur.fetchone()[0] > 0
-            
-            cur.close()
-            conn.close()
+            completed_attempts = play_counts.get((rp[0], 'completed'), 0)
+            viewed_optimal = play_counts.get((rp[0], 'optimal_viewed'), 0) > 0
+            has_in_progress = play_counts.get((rp[0], 'in_progress'), 0) > 0
             
             max_attempts = config[7] if config else 1  # repeat_attempts_allowed
             
@@ -3519,24 +3730,9 @@ def submit_and_next(user_id, cluster_id, roleplay_id):
         from app.queries import get_roleplay_with_config
         roleplay = get_roleplay_with_config(roleplay_id)
         
-        conn = mysql.connector.connect(
-            host=os.getenv('DB_HOST', 'localhost'),
-            user=os.getenv('DB_USER', 'root'),
-            password=os.getenv('DB_PASSWORD'),
-            database=os.getenv('DB_NAME', 'roleplay')
-        )
-        cur = conn.cursor()
-        
         # Update play status
         if 'play_id' in session:
-            cur.execute("""
-                UPDATE play SET status = 'completed', end_time = CURRENT_TIMESTAMP
-                WHERE id = %s
-            """, (session['play_id'],))
-        
-        conn.commit()
-        cur.close()
-        conn.close()
+            mark_play_completed(session['play_id'])
         
         flash('Scores submitted successfully!')
         return redirect(url_for('user_cluster_view', user_id=user_id, cluster_id=cluster_id))
@@ -3578,12 +3774,7 @@ def submit_scores_ajax(user_id, cluster_id, roleplay_id):
             # post_attempt_data(play_id)
             
             # Update play status to completed
-            cur.execute("""
-                UPDATE play SET status = 'completed', end_time = CURRENT_TIMESTAMP
-                WHERE id = %s
-            """, (play_id,))
-            
-            conn.commit()
+            mark_play_completed(play_id)
             
             return jsonify({
                 'success': True,
@@ -4421,27 +4612,32 @@ def api_16pf_analyze():
 
 @app.route("/api/16pf/status/<int:play_id>", methods=["GET"])
 def api_16pf_status(play_id):
-    """Get the 16PF analysis status and results for a play session."""
+    """Get the 16PF analysis status and results for a play session.
+    
+    Served from the in-process status cache (app/pf16_status.py) with an ETag.
+    ?wait=<seconds> plus If-None-Match long-polls until the status changes.
+    """
+    from app.pf16_status import get_status, wait_for_change, count_not_modified, MAX_WAIT
     try:
-        result = get_16pf_analysis_by_play_id(play_id)
-        
-        if not result:
-            return jsonify({
+        payload, etag = get_status(play_id)
+        wait = request.args.get('wait', type=float)
+        if wait and MAX_WAIT > 0 and request.if_none_match.contains(etag):
+            payload, etag = wait_for_change(play_id, etag, wait)
+        
+        if request.if_none_match.contains(etag):
+            count_not_modified()
+            response = Response(status=304)
+        elif not payload:
+            response = jsonify({
                 "success": False,
                 "error": "No 16PF analysis found for this play session"
-            }), 404
-        
-        return jsonify({
-            "success": True,
-            "status": result.get('status'),
-            "personality_scores": result.get('personality_scores', {}),
-            "composite_scores": result.get('composite_scores', {}),
-            "overall_role_fit": result.get('overall_role_fit'),
-            "analysis_confidence": result.get('analysis_confidence'),
-            "error_message": result.get('error_message'),
-            "created_at": str(result.get('created_at')) if result.get('created_at') else None,
-            "completed_at": str(result.get('completed_at')) if result.get('completed_at') else None
-        })
+            })
+            response.status_code = 404
+        else:
+            response = jsonify({"success": True, **payload})
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
         
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -4478,32 +4674,27 @@ def api_16pf_trigger(play_id):
         user_gender = data.get('gender', 'Male')
         analysis_source = data.get('source', pf16_config.get('pf16_analysis_source', 'persona360'))
         
-        # Create analysis record
-        analysis_id = save_16pf_analysis_result(
+        # Queue the analysis; a re-trigger re-runs a finished one but not a queued or running one
+        from app.pf16_queue import enqueue
+        analysis_id, queued = enqueue(
             play_id=play_id,
             user_id=user_id,
             roleplay_id=roleplay_id,
             audio_file_path=audio_file_path,
             user_age=user_age,
             user_gender=user_gender,
-            analysis_source=analysis_source
+            analysis_source=analysis_source,
+            force=True
         )
         
         if not analysis_id:
-            return jsonify({"success": False, "error": "Failed to create analysis record"}), 500
-        
-        # Run analysis in background
-        thread = threading.Thread(
-            target=run_16pf_analysis_async,
-            args=(analysis_id, audio_file_path, user_age, user_gender, analysis_source)
-        )
-        thread.daemon = True
-        thread.start()
+            return jsonify({"success": False, "error": "Failed to queue analysis"}), 500
         
         return jsonify({
             "success": True,
-            "message": "16PF analysis triggered",
+            "message": "16PF analysis queued" if queued else "16PF analysis already queued or running",
             "analysis_id": analysis_id,
+            "queued": queued,
             "play_id": play_id,
             "audio_file": audio_file_path
         })
@@ -4589,6 +4780,8 @@ def download_16pf_audio(play_id):
         merged_audio_path = merge_audio_files_for_play(play_id)
         
         if merged_audio_path and os.path.exists(merged_audio_path):
+            from app.disk_cache import touch
+            touch(merged_audio_path)
             filename = os.path.basename(merged_audio_path)
             return send_file(
                 merged_audio_path,
@@ -4645,32 +4838,18 @@ def list_16pf_audio_files(play_id):
     This is useful for debugging to see what audio recordings exist.
     """
     try:
-        user_recordings_dir = os.path.join(app.root_path, 'static', 'user_recordings')
-        
-        if not os.path.exists(user_recordings_dir):
-            return jsonify({
-                "success": True,
-                "play_id": play_id,
-                "audio_files": [],
-                "message": "User recordings directory does not exist"
-            })
-        
         audio_files = []
-        for filename in os.listdir(user_recordings_dir):
-            if filename.endswith(('.webm', '.mp3', '.wav', '.m4a', '.ogg')):
-                if f'play{play_id}_' in filename or f'play_{play_id}' in filename:
-                    file_path = os.path.join(user_recordings_dir, filename)
-                    file_size = os.path.getsize(file_path)
-                    file_mtime = os.path.getmtime(file_path)
-                    audio_files.append({
-                        "filename": filename,
-                        "size_bytes": file_size,
-                        "size_mb": round(file_size / (1024 * 1024), 2),
-                        "modified": datetime.datetime.fromtimestamp(file_mtime).strftime('%Y-%m-%d %H:%M:%S')
-                    })
-        
-        # Sort by filename to show in interaction order
-        audio_files.sort(key=lambda x: x['filename'])
+        for recording in get_play_recordings(play_id):
+            size = recording['size_bytes']
+            audio_files.append({
+                "filename": os.path.basename(recording['file_path']),
+                "interaction_number": recording['interaction_number'],
+                "size_bytes": size,
+                "size_mb": round(size / (1024 * 1024), 2),
+                "duration_ms": recording['duration_ms'],
+                "transcode_status": recording['transcode_status'],
+                "modified": recording['created_at'].strftime('%Y-%m-%d %H:%M:%S') if recording['created_at'] else None
+            })
         
         return jsonify({
             "success": True,
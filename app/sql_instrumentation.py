@@ -0,0 +1,208 @@
+"""
+Per-request SQL instrumentation and N+1 detection.
+
+Every mysql.connector cursor's execute() is wrapped once at startup (pure Python
+and C-extension cursors, dictionary/buffered variants included, so pandas
+read_sql_query is counted too). Inside a Flask request each statement's
+normalised text, parameters and elapsed time are recorded on flask.g; at the end
+of the request a summary is kept in a bounded in-memory history.
+
+A statement that runs repeatedly in one request with different parameters is
+flagged as a likely N+1 (a loop issuing one query per row).
+
+Surfacing:
+  - X-SQL-Queries / X-SQL-Time-Ms / X-SQL-N-Plus-One response headers when the
+    app runs in debug mode or SQL_STATS_HEADER=1
+  - /admin/sql-stats (admin only) - recent requests and per-endpoint totals
+
+Configuration (environment):
+    SQL_INSTRUMENTATION        1/0, default 1
+    SQL_STATS_HEADER           1 to emit headers outside debug mode
+    SQL_STATS_HISTORY          request summaries kept per worker (default 200)
+    SQL_N_PLUS_ONE_THRESHOLD   distinct parameter sets that flag a statement (default 3)
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+from flask import g, has_request_context, request
+
+ENABLED = os.getenv('SQL_INSTRUMENTATION', '1') == '1'
+HEADER_ALWAYS = os.getenv('SQL_STATS_HEADER', '0') == '1'
+HISTORY_SIZE = int(os.getenv('SQL_STATS_HISTORY', 200))
+N_PLUS_ONE_THRESHOLD = int(os.getenv('SQL_N_PLUS_ONE_THRESHOLD', 3))
+SLOWEST_KEPT = 5
+MAX_SQL_LEN = 300
+
+_history = deque(maxlen=HISTORY_SIZE)
+_history_lock = threading.Lock()
+_installed = False
+
+
+class RequestSQLStats:
+    """Statements executed during one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.statements = {}  # normalised sql -> {'count', 'time', 'params': set()}
+        self.slowest = []     # [(elapsed, sql)] kept sorted, longest first
+
+    def record(self, sql, params, elapsed):
+        self.count += 1
+        self.total_time += elapsed
+        entry = self.statements.setdefault(sql, {'count': 0, 'time': 0.0, 'params': set()})
+        entry['count'] += 1
+        entry['time'] += elapsed
+        if len(entry['params']) <= N_PLUS_ONE_THRESHOLD * 10:
+            entry['params'].add(repr(params))
+        if len(self.slowest) < SLOWEST_KEPT or elapsed > self.slowest[-1][0]:
+            self.slowest.append((elapsed, sql))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[SLOWEST_KEPT:]
+
+    def n_plus_one(self):
+        suspects = []
+        for sql, entry in self.statements.items():
+            if len(entry['params']) >= N_PLUS_ONE_THRESHOLD:
+                suspects.append({
+                    'sql': sql,
+                    'count': entry['count'],
+                    'distinct_params': len(entry['params']),
+                    'total_ms': round(entry['time'] * 1000, 2),
+                })
+        suspects.sort(key=lambda item: item['count'], reverse=True)
+        return suspects
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_time * 1000, 2),
+            'slowest': [{'ms': round(t * 1000, 2), 'sql': sql} for t, sql in self.slowest],
+            'n_plus_one': self.n_plus_one(),
+        }
+
+
+def _normalise(operation):
+    if isinstance(operation, (bytes, bytearray)):
+        operation = operation.decode('utf-8', 'replace')
+    return " ".join(str(operation).split())[:MAX_SQL_LEN]
+
+
+def _record(operation, params, elapsed):
+    if not has_request_context():
+        return
+    stats = getattr(g, '_sql_stats', None)
+    if stats is None:
+        stats = g._sql_stats = RequestSQLStats()
+    stats.record(_normalise(operation), params, elapsed)
+
+
+_local = threading.local()
+
+
+def _wrap_execute(original):
+    def execute(self, operation, params=None, *args, **kwargs):
+        # Subclass execute() may call the base one; only time the outermost call
+        if getattr(_local, 'depth', 0):
+            return original(self, operation, params, *args, **kwargs)
+        _local.depth = 1
+        start = time.perf_counter()
+        try:
+            return original(self, operation, params, *args, **kwargs)
+        finally:
+            _local.depth = 0
+            _record(operation, params, time.perf_counter() - start)
+    execute._sql_instrumented = True
+    return execute
+
+
+def _patch_cursor_classes():
+    """Wrap execute() on every mysql.connector cursor class that defines one."""
+    classes = []
+    try:
+        from mysql.connector.cursor import MySQLCursor
+        classes.append(MySQLCursor)
+    except ImportError:
+        pass
+    try:
+        from mysql.connector.cursor_cext import CMySQLCursor
+        classes.append(CMySQLCursor)
+    except ImportError:
+        pass
+
+    seen = set()
+    while classes:
+        cls = classes.pop()
+        if cls in seen:
+            continue
+        seen.add(cls)
+        classes.extend(cls.__subclasses__())
+        original = cls.__dict__.get('execute')
+        if original is not None and not getattr(original, '_sql_instrumented', False):
+            cls.execute = _wrap_execute(original)
+    return len(seen)
+
+
+def _after_request(response):
+    stats = getattr(g, '_sql_stats', None)
+    if stats is None:
+        return response
+    summary = stats.summary()
+    summary.update({
+        'endpoint': request.endpoint,
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'at': time.time(),
+    })
+    with _history_lock:
+        _history.append(summary)
+
+    from app import app
+    if app.debug or HEADER_ALWAYS:
+        response.headers['X-SQL-Queries'] = str(summary['count'])
+        response.headers['X-SQL-Time-Ms'] = str(summary['total_ms'])
+        response.headers['X-SQL-N-Plus-One'] = str(len(summary['n_plus_one']))
+    return response
+
+
+def recent_requests(limit=50):
+    """Most recent request summaries, newest first."""
+    with _history_lock:
+        items = list(_history)
+    return list(reversed(items))[:limit]
+
+
+def endpoint_totals():
+    """Per-endpoint aggregates over the kept history, worst average first."""
+    totals = {}
+    with _history_lock:
+        items = list(_history)
+    for item in items:
+        key = item['endpoint'] or item['path']
+        entry = totals.setdefault(key, {'endpoint': key, 'requests': 0, 'queries': 0,
+                                        'total_ms': 0.0, 'max_queries': 0, 'n_plus_one_requests': 0})
+        entry['requests'] += 1
+        entry['queries'] += item['count']
+        entry['total_ms'] += item['total_ms']
+        entry['max_queries'] = max(entry['max_queries'], item['count'])
+        if item['n_plus_one']:
+            entry['n_plus_one_requests'] += 1
+    for entry in totals.values():
+        entry['avg_queries'] = round(entry['queries'] / entry['requests'], 1)
+        entry['avg_ms'] = round(entry['total_ms'] / entry['requests'], 2)
+        entry['total_ms'] = round(entry['total_ms'], 2)
+    return sorted(totals.values(), key=lambda e: e['avg_queries'], reverse=True)
+
+
+def init_app(app):
+    """Install the cursor hooks and the after_request collector (idempotent)."""
+    global _installed
+    if not ENABLED or _installed:
+        return
+    _patch_cursor_classes()
+    app.after_request(_after_request)
+    _installed = True
@@ -0,0 +1,204 @@
+"""
+Persistent translation memory for translate_text().
+
+Every /chatbot render of a non-English roleplay translates the scenario and the
+computer's lines, and a page refresh used to repeat those GoogleTranslator calls.
+Translations are now kept in a small SQLite store keyed by (SHA-256 of the source
+text, target language), shared by all worker processes, with an in-process LRU
+in front of it so a repeated line costs a dict lookup.
+
+- Only successful translations are stored; a failed call returns the original
+  text, as before, and is retried on a later render.
+- After a translator failure, further calls are skipped for
+  TRANSLATION_RETRY_AFTER seconds (the memory keeps serving what it has), so an
+  outage does not add a network timeout to every render.
+- seed() imports curated translations (origin 'seed'), which take precedence
+  over machine ones; scripts/seed_translation_memory.py wraps it and can also
+  warm the memory for whole roleplays. Other worker processes may still hold
+  the machine translation in their LRU, so those entries are only trusted for
+  TRANSLATION_LRU_TTL seconds before the store is read again; seeded entries
+  are final and kept until evicted.
+
+Configuration (environment):
+    TRANSLATION_MEMORY_PATH     SQLite file (default data/translation_memory.sqlite)
+    TRANSLATION_LRU_SIZE        entries kept in memory per worker process (default 2048)
+    TRANSLATION_LRU_TTL         seconds a machine translation is served from memory (default 300)
+    TRANSLATION_RETRY_AFTER     seconds to stop calling the translator after a failure (default 60)
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+STORE_PATH = os.getenv('TRANSLATION_MEMORY_PATH', os.path.join(BASE_DIR, 'data', 'translation_memory.sqlite'))
+LRU_SIZE = int(os.getenv('TRANSLATION_LRU_SIZE', 2048))
+LRU_TTL = int(os.getenv('TRANSLATION_LRU_TTL', 300))
+RETRY_AFTER = int(os.getenv('TRANSLATION_RETRY_AFTER', 60))
+
+_lock = threading.Lock()
+_lru = OrderedDict()  # (source hash, language) -> (translated text, origin, remembered at)
+_translator_down_until = 0.0
+_schema_pid = None  # process that has created the store's schema
+
+TRANSLATION_STATS = {
+    'lru_hits': 0,
+    'store_hits': 0,
+    'misses': 0,             # not in memory; translator called
+    'translated': 0,
+    'translator_errors': 0,
+    'translator_skipped': 0, # misses served untranslated while the translator is backed off
+    'seeded': 0,
+}
+
+
+def _count(stat, amount=1):
+    with _lock:
+        TRANSLATION_STATS[stat] += amount
+
+
+def source_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _store():
+    global _schema_pid
+    if _schema_pid == os.getpid():
+        return sqlite3.connect(STORE_PATH, timeout=10)
+    # First connection of this process: create the store (WAL mode persists in the file)
+    os.makedirs(os.path.dirname(STORE_PATH), exist_ok=True)
+    conn = sqlite3.connect(STORE_PATH, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS translation (
+            source_hash TEXT NOT NULL,
+            target_language TEXT NOT NULL,
+            source_text TEXT NOT NULL,
+            translated_text TEXT NOT NULL,
+            origin TEXT NOT NULL DEFAULT 'translator',
+            created_at REAL NOT NULL,
+            PRIMARY KEY (source_hash, target_language)
+        )
+    """)
+    _schema_pid = os.getpid()
+    return conn
+
+
+def _remember(key, translated, origin):
+    with _lock:
+        _lru[key] = (translated, origin, time.monotonic())
+        _lru.move_to_end(key)
+        while len(_lru) > LRU_SIZE:
+            _lru.popitem(last=False)
+
+
+def lookup(text, target_language):
+    """Translation on record, or None."""
+    key = (source_hash(text), target_language)
+    with _lock:
+        entry = _lru.get(key)
+        # A machine translation may since have been replaced by a seeded one in the store
+        if entry is not None and (entry[1] != 'translator' or time.monotonic() - entry[2] < LRU_TTL):
+            _lru.move_to_end(key)
+            TRANSLATION_STATS['lru_hits'] += 1
+            return entry[0]
+    try:
+        conn = _store()
+        try:
+            row = conn.execute("SELECT translated_text, origin FROM translation "
+                               "WHERE source_hash = ? AND target_language = ?", key).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"[TRANSLATION] Store lookup failed: {e}")
+        row = None
+    if row is None:
+        return None
+    _count('store_hits')
+    _remember(key, row[0], row[1])
+    return row[0]
+
+
+def store(text, target_language, translated, origin='translator'):
+    """Record a translation. Machine translations never replace a seeded one."""
+    key = (source_hash(text), target_language)
+    try:
+        conn = _store()
+        try:
+            if origin == 'translator':
+                conn.execute("""
+                    INSERT OR IGNORE INTO translation
+                        (source_hash, target_language, source_text, translated_text, origin, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, key + (text, translated, origin, time.time()))
+            else:
+                conn.execute("""
+                    INSERT INTO translation
+                        (source_hash, target_language, source_text, translated_text, origin, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(source_hash, target_language) DO UPDATE SET
+                        translated_text = excluded.translated_text, origin = excluded.origin,
+                        created_at = excluded.created_at
+                """, key + (text, translated, origin, time.time()))
+            conn.commit()
+            row = conn.execute("SELECT translated_text, origin FROM translation "
+                               "WHERE source_hash = ? AND target_language = ?", key).fetchone()
+        finally:
+            conn.close()
+        if row:
+            translated, origin = row
+    except sqlite3.Error as e:
+        print(f"[TRANSLATION] Could not store translation: {e}")
+    _remember(key, translated, origin)
+    return translated
+
+
+def translate(text, target_language, translator):
+    """Translated text from memory, else translator(text) (stored on success).
+
+    Returns the original text when the translator fails or is backed off.
+    """
+    global _translator_down_until
+    translated = lookup(text, target_language)
+    if translated is not None:
+        return translated
+
+    if time.monotonic() < _translator_down_until:
+        _count('translator_skipped')
+        return text
+    _count('misses')
+    try:
+        translated = translator(text)
+    except Exception as e:
+        _count('translator_errors')
+        _translator_down_until = time.monotonic() + RETRY_AFTER
+        print(f"Translation error: {e}")
+        return text
+    if not translated:
+        return text
+    _count('translated')
+    return store(text, target_language, translated)
+
+
+def seed(entries, origin='seed'):
+    """Import (source_text, target_language, translated_text) triples. Returns how many were stored."""
+    stored = 0
+    for text, target_language, translated in entries:
+        if text and target_language and translated:
+            store(text, target_language, translated, origin=origin)
+            stored += 1
+    _count('seeded', stored)
+    return stored
+
+
+def get_translation_stats():
+    with _lock:
+        stats = dict(TRANSLATION_STATS)
+        stats['lru_size'] = len(_lru)
+    served = stats['lru_hits'] + stats['store_hits'] + stats['misses'] + stats['translator_skipped']
+    stats['hit_rate'] = round((stats['lru_hits'] + stats['store_hits']) / served, 3) if served else None
+    stats['translator_backed_off'] = time.monotonic() < _translator_down_until
+    return stats
@@ -0,0 +1,174 @@
+"""
+Predictive TTS prewarming for the next computer turn.
+
+While the player is typing or recording, /chatbot can schedule the lines the
+next render will play and a small thread pool synthesises them into the shared
+TTS store (app/tts_service.py), so the next render finds their audio on disk.
+The same pool warms the segments of multi-speaker turns and long lines for the
+streaming render paths.
+
+- Bounded: at most TTS_PREFETCH_WORKERS threads, and new work is dropped once
+  TTS_PREFETCH_MAX_PENDING syntheses are queued or running.
+- Deduplicated: one in-flight synthesis per TTS cache key; lines already in the
+  store are skipped.
+- The render path calls fetch_for_render(), which waits briefly on a prefetch
+  still in flight instead of starting a second Polly call for the same line.
+
+Next-turn candidates are limited to lines spoken verbatim (the timeout reply):
+the score-matched replies are rephrased by the LLM before they are voiced, so
+prefetching them would pay for audio that is never played. Candidate prefetch
+is off by default (TTS_PREFETCH_CANDIDATES); the post_turn_* counters in
+/admin/cache-stats give the hit rate to judge it by before turning it on.
+
+Configuration (environment):
+    TTS_PREFETCH                 1/0, default 1
+    TTS_PREFETCH_CANDIDATES      1/0, prewarm the next turn's verbatim lines (default 0)
+    TTS_PREFETCH_WORKERS         synthesis threads per worker process (default 2)
+    TTS_PREFETCH_MAX_PENDING     queued + running syntheses before dropping (default 24)
+    TTS_PREFETCH_WAIT            seconds the render waits on an in-flight prefetch (default 8)
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from app.tts_service import get_cached_tts_path, get_or_generate_tts, tts_cache_key
+
+ENABLED = os.getenv('TTS_PREFETCH', '1') == '1'
+PREFETCH_CANDIDATES = ENABLED and os.getenv('TTS_PREFETCH_CANDIDATES', '0') == '1'
+WORKERS = int(os.getenv('TTS_PREFETCH_WORKERS', 2))
+MAX_PENDING = int(os.getenv('TTS_PREFETCH_MAX_PENDING', 24))
+RENDER_WAIT = float(os.getenv('TTS_PREFETCH_WAIT', 8))
+
+_executor = None
+_lock = threading.Lock()
+_inflight = {}  # tts cache key -> Future
+
+PREFETCH_STATS = {
+    'scheduled': 0,        # syntheses submitted to the pool
+    'already_cached': 0,   # candidates that were in the store already
+    'deduped': 0,          # candidates already being synthesised
+    'dropped': 0,          # candidates refused because the pool was full
+    'completed': 0,
+    'failed': 0,
+    # What the player-facing render found for the line it had to speak
+    'post_turn_hits': 0,   # audio already in the store
+    'post_turn_waits': 0,  # prefetch still running, render waited for it
+    'post_turn_misses': 0, # synthesised on the render path
+}
+
+
+def _count(stat):
+    with _lock:
+        PREFETCH_STATS[stat] += 1
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='tts-prefetch')
+        return _executor
+
+
+def _synthesise(key, text, voice_name, language):
+    try:
+        path = get_or_generate_tts(text, voice_name=voice_name, language=language)
+        _count('completed')
+        return path
+    except Exception as e:
+        _count('failed')
+        print(f"[TTS_PREFETCH] synthesis failed for voice={voice_name}: {e}")
+        return None
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+
+
+def prefetch_lines(lines, language='English'):
+    """Queue (text, voice_name) pairs for background synthesis. Returns how many were scheduled."""
+    if not ENABLED:
+        return 0
+    executor = _get_executor()
+    scheduled = 0
+    for text, voice_name in lines:
+        if not text or not voice_name:
+            continue
+        if get_cached_tts_path(voice_name, text, language=language):
+            _count('already_cached')
+            continue
+        key = tts_cache_key(text, voice_name, language=language)
+        with _lock:
+            if key in _inflight:
+                PREFETCH_STATS['deduped'] += 1
+                continue
+            if len(_inflight) >= MAX_PENDING:
+                PREFETCH_STATS['dropped'] += 1
+                continue
+            # Register before submitting so a concurrent caller sees it as in flight
+            _inflight[key] = None
+            PREFETCH_STATS['scheduled'] += 1
+        future = executor.submit(_synthesise, key, text, voice_name, language)
+        with _lock:
+            if key in _inflight:
+                _inflight[key] = future
+        scheduled += 1
+    return scheduled
+
+
+def prefetch_async(build_lines, language='English'):
+    """Run build_lines() (candidate resolution, translation) off the request thread, then prefetch its result."""
+    if not ENABLED:
+        return
+
+    def run():
+        try:
+            prefetch_lines(build_lines(), language)
+        except Exception as e:
+            print(f"[TTS_PREFETCH] could not build candidate lines: {e}")
+
+    _get_executor().submit(run)
+
+
+def fetch_for_render(text, voice_name, language='English', post_turn=True, synthesise=True):
+    """Path of the audio for a line the page is about to play, synthesising only if nobody else is.
+
+    post_turn=False (the opening scenario) keeps the line out of the hit-rate counters.
+    synthesise=False leaves a miss to the page's own /make_audio request (which can
+    stream it) and returns None.
+    """
+    count = _count if post_turn else (lambda stat: None)
+    cached = get_cached_tts_path(voice_name, text, language=language)
+    if cached:
+        count('post_turn_hits')
+        return get_or_generate_tts(text, voice_name=voice_name, language=language)
+
+    with _lock:
+        future = _inflight.get(tts_cache_key(text, voice_name, language=language))
+    if future is not None:
+        try:
+            path = future.result(timeout=RENDER_WAIT)
+            if path:
+                count('post_turn_waits')
+                return path
+        except FutureTimeout:
+            pass
+
+    count('post_turn_misses')
+    if not synthesise:
+        return None
+    return get_or_generate_tts(text, voice_name=voice_name, language=language)
+
+
+def get_prefetch_stats():
+    """Prefetch counters and post-turn hit rate for this worker process."""
+    with _lock:
+        stats = dict(PREFETCH_STATS)
+        stats['inflight'] = len(_inflight)
+    served = stats['post_turn_hits'] + stats['post_turn_waits'] + stats['post_turn_misses']
+    stats['post_turn_hit_rate'] = (
+        round((stats['post_turn_hits'] + stats['post_turn_waits']) / served, 3) if served else None)
+    stats['enabled'] = ENABLED
+    stats['candidates_enabled'] = PREFETCH_CANDIDATES
+    stats['workers'] = WORKERS
+    return stats
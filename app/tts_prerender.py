@@ -0,0 +1,265 @@
+"""
+Whole-roleplay audio pre-render.
+
+Walks a compiled roleplay (every interaction reachable from interaction 1) and
+synthesises each line whose audio is known in advance - the opening scenario and
+the timeout reply after each interaction, voiced the way the chatbot render
+voices them - for each language configured on the roleplay, through
+tts_service. Rendered files are pinned in the disk cache so eviction never
+removes them.
+
+The score-matched computer replies are not pre-rendered: the chatbot speaks the
+LLM-rephrased version of them (response_transition), which only exists once the
+player has answered, so audio for the sheet's wording would never be played.
+Those turns are synthesised on demand (streamed in segments when enabled).
+
+Jobs are started after upload_files, from the cluster edit page, or with
+scripts/prerender_roleplay_audio.py. Each run is a tts_prerender_job row
+(migrations/create_tts_prerender_job.sql) whose counters are updated as lines
+finish, so any worker can report progress. Because the TTS store is
+content-addressed, a re-run after a failure is a resume: lines already on disk
+are counted as cached and only the missing ones are synthesised.
+
+Configuration (environment):
+    TTS_PRERENDER_CONCURRENCY     simultaneous Polly calls per process, across all jobs (default 3)
+    TTS_PRERENDER_ATTEMPTS        attempts per line, with exponential backoff (default 3)
+    TTS_PRERENDER_STALE_SECONDS   a running job not updated for this long is treated as dead (default 900)
+    TTS_PRERENDER_ON_UPLOAD       1/0, start a job after a roleplay upload (default 1)
+"""
+
+import datetime
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+CONCURRENCY = int(os.getenv('TTS_PRERENDER_CONCURRENCY', 3))
+MAX_ATTEMPTS = int(os.getenv('TTS_PRERENDER_ATTEMPTS', 3))
+STALE_AFTER = int(os.getenv('TTS_PRERENDER_STALE_SECONDS', 900))
+ON_UPLOAD = os.getenv('TTS_PRERENDER_ON_UPLOAD', '1') == '1'
+PROGRESS_EVERY = 10  # lines between job row updates
+MAX_INTERACTIONS = 500  # guard against a malformed flow sheet that loops forever
+
+# Shared by every job in this process so two roleplays pre-rendering at once
+# still respect the Polly request budget
+_polly_slots = threading.BoundedSemaphore(CONCURRENCY)
+_running = {}  # roleplay_id -> job id running in this process
+_running_lock = threading.Lock()
+
+
+def roleplay_languages(roleplay_id):
+    """Languages configured on the roleplay (roleplay_config.available_languages)."""
+    from app.queries import get_roleplay_config
+    config = get_roleplay_config(roleplay_id)
+    raw = config[4] if config and len(config) > 4 else None
+    languages = []
+    if raw:
+        try:
+            languages = json.loads(raw) if isinstance(raw, str) else list(raw)
+        except (ValueError, TypeError):
+            languages = [part.strip() for part in str(raw).split(',') if part.strip()]
+    return languages or ['English']
+
+
+def load_roleplay_reader(roleplay_id):
+    """ExcelReader for a roleplay, resolved the same way /launch does."""
+    import reader.excel
+    import reader.master
+    from app import app
+    from app.queries import get_roleplay
+    from app.routes import resolve_file_path, competency_descriptions
+
+    roleplay = get_roleplay(roleplay_id)
+    if not roleplay:
+        raise ValueError(f"Roleplay {roleplay_id} not found")
+    # id, name, file_path, image_file_path, competency_file_path, ...
+    excel_path = resolve_file_path(roleplay[2], [app.config.get('UPLOAD_PATH_ROLEPLAY')])
+    image_excel_path = resolve_file_path(roleplay[3], [app.config.get('UPLOAD_PATH_IMAGES')])
+
+    competencies = competency_descriptions
+    if roleplay[4]:
+        comp_path = resolve_file_path(roleplay[4], [app.config.get('UPLOAD_PATH_COMP')])
+        if comp_path and os.path.exists(comp_path):
+            try:
+                competencies = reader.master.MasterLoader(comp_path).get_competencies_as_list()
+            except Exception as e:
+                print(f"[TTS_PRERENDER] Could not load competencies for {roleplay_id}: {e}")
+    return reader.excel.ExcelReader(excel_path, competencies, image_excel_path)
+
+
+def reachable_interactions(reader_obj, start=1):
+    """Interaction numbers reachable from start through any score, in visit order."""
+    order, seen, queue = [], {start}, [start]
+    while queue and len(order) < MAX_INTERACTIONS:
+        number = queue.pop(0)
+        if not reader_obj.get_interaction(number):
+            continue
+        order.append(number)
+        for score in (1, 2, 3):
+            try:
+                nxt = reader_obj.get_next_interaction(number, score)
+            except Exception:
+                continue
+            if nxt in (-1, False, None) or nxt in seen:
+                continue
+            seen.add(nxt)
+            queue.append(nxt)
+    return order
+
+
+def roleplay_audio_lines(roleplay_id, languages=None):
+    """Every (language, text, voice) the chatbot plays verbatim for the roleplay, deduplicated.
+
+    That is the scenario plus each interaction's timeout reply (next_turn_audio_lines);
+    rephrased replies cannot be known in advance.
+    """
+    from app.routes import (translate_text, resolve_dialogue_voice, dialogue_audio_lines,
+                            next_turn_audio_lines)
+    from app.tts_service import select_voice_for_character, tts_cache_key
+
+    reader_obj = load_roleplay_reader(roleplay_id)
+    numbers = reachable_interactions(reader_obj)
+    languages = languages or roleplay_languages(roleplay_id)
+
+    lines, keys = [], set()
+
+    def add(language, text, voice_name):
+        key = tts_cache_key(text, voice_name, language=language)
+        if text and key not in keys:
+            keys.add(key)
+            lines.append((language, text, voice_name))
+
+    for language in languages:
+        # Opening scenario, voiced as the first chatbot render does (no computer line yet)
+        first = reader_obj.get_interaction(1)
+        voice = resolve_dialogue_voice("", first, language, roleplay_id)
+        scenario = translate_text(reader_obj.get_system_prompt(), language, roleplay_id)
+        for text, character, gender in dialogue_audio_lines(voice, scenario):
+            add(language, text, select_voice_for_character(character, gender, language))
+
+        for number in numbers:
+            data = reader_obj.get_interaction(number)
+            if not data:
+                continue
+            for text, voice_name in next_turn_audio_lines(reader_obj, number, data, language, roleplay_id):
+                add(language, text, voice_name)
+    return lines
+
+
+def _render_line(language, text, voice_name):
+    """Make sure one line is in the store and pinned; returns 'cached' or 'rendered'."""
+    from app.tts_service import get_cached_tts_path, get_or_generate_tts
+    from app.disk_cache import pin
+
+    path = get_cached_tts_path(voice_name, text, language=language)
+    if path:
+        pin(path)
+        return 'cached'
+
+    last_error = None
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            with _polly_slots:
+                path = get_or_generate_tts(text, voice_name=voice_name, language=language)
+            pin(path)
+            return 'rendered'
+        except Exception as e:
+            # Mostly Polly throttling; back off before retrying
+            last_error = e
+            time.sleep(2 ** attempt)
+    raise last_error
+
+
+def run_prerender(roleplay_id, job_id=None, languages=None):
+    """Pre-render a roleplay synchronously. Returns the final counters."""
+    from app.queries import update_prerender_job
+
+    def progress(**fields):
+        if job_id:
+            update_prerender_job(job_id, **fields)
+
+    counts = {'total_lines': 0, 'rendered_lines': 0, 'cached_lines': 0, 'failed_lines': 0}
+    progress(status='running', started_at=datetime.datetime.now())
+    try:
+        lines = roleplay_audio_lines(roleplay_id, languages)
+        counts['total_lines'] = len(lines)
+        progress(**counts)
+        print(f"[TTS_PRERENDER] {roleplay_id}: {len(lines)} lines to check")
+
+        last_error = None
+        with ThreadPoolExecutor(max_workers=CONCURRENCY, thread_name_prefix='tts-prerender') as pool:
+            futures = [pool.submit(_render_line, *line) for line in lines]
+            for done, future in enumerate(as_completed(futures), start=1):
+                try:
+                    counts[f"{future.result()}_lines"] += 1
+                except Exception as e:
+                    counts['failed_lines'] += 1
+                    last_error = str(e)
+                if done % PROGRESS_EVERY == 0:
+                    progress(**counts)
+
+        status = 'completed' if counts['failed_lines'] == 0 else 'failed'
+        progress(status=status, last_error=last_error, finished_at=datetime.datetime.now(), **counts)
+        print(f"[TTS_PRERENDER] {roleplay_id}: {status} {counts}")
+    except Exception as e:
+        print(f"[TTS_PRERENDER] {roleplay_id}: failed: {e}")
+        progress(status='failed', last_error=str(e), finished_at=datetime.datetime.now(), **counts)
+        counts['error'] = str(e)
+    return counts
+
+
+def _job_is_active(job):
+    if not job or job.get('status') not in ('queued', 'running'):
+        return False
+    updated = job.get('updated_at') or job.get('created_at')
+    if updated is None:
+        return True
+    # A job whose worker died stops updating; let a new run take over
+    return (datetime.datetime.now() - updated).total_seconds() < STALE_AFTER
+
+
+def start_prerender(roleplay_id, languages=None):
+    """Start (or resume) a background pre-render. Returns (job_id, started)."""
+    from app.queries import create_prerender_job, get_latest_prerender_job
+
+    with _running_lock:
+        if roleplay_id in _running:
+            return _running[roleplay_id], False
+        latest = get_latest_prerender_job(roleplay_id)
+        if _job_is_active(latest):
+            return latest['id'], False
+        languages = languages or roleplay_languages(roleplay_id)
+        job_id = create_prerender_job(roleplay_id, languages)
+        _running[roleplay_id] = job_id
+
+    def run():
+        try:
+            run_prerender(roleplay_id, job_id, languages)
+        finally:
+            with _running_lock:
+                _running.pop(roleplay_id, None)
+
+    threading.Thread(target=run, name=f'tts-prerender-{roleplay_id}', daemon=True).start()
+    return job_id, True
+
+
+def prerender_report(roleplay_id, languages=None, missing_limit=20):
+    """Completeness of the roleplay's audio in the store, per language (no synthesis)."""
+    from app.tts_service import get_cached_tts_path
+
+    report = {'roleplay_id': roleplay_id, 'languages': {}, 'total_lines': 0, 'present_lines': 0}
+    for language, text, voice_name in roleplay_audio_lines(roleplay_id, languages):
+        entry = report['languages'].setdefault(language, {'total': 0, 'present': 0, 'missing': []})
+        entry['total'] += 1
+        if get_cached_tts_path(voice_name, text, language=language):
+            entry['present'] += 1
+        elif len(entry['missing']) < missing_limit:
+            entry['missing'].append({'voice': voice_name, 'text': text[:120]})
+    for entry in report['languages'].values():
+        entry['complete'] = round(entry['present'] / entry['total'], 3) if entry['total'] else None
+        report['total_lines'] += entry['total']
+        report['present_lines'] += entry['present']
+    report['complete'] = (round(report['present_lines'] / report['total_lines'], 3)
+                          if report['total_lines'] else None)
+    return report
@@ -8,11 +8,21 @@ import os
 import random
 import json
 import hashlib
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
-import shutil
 import boto3
 from botocore.exceptions import BotoCoreError, ClientError
 
+try:
+    import fcntl  # Cross-process single-flight lock files (not available on Windows)
+except ImportError:
+    fcntl = None
+
 # AWS Polly Client (initialized lazily)
 _polly_client = None
 
@@ -96,7 +106,7 @@ LANGUAGE_MAPPING = {
     'Arabic': 'ar', # Matches ar-AE and arb (if we check startswith 'ar')
 }
 
-# Mapping of normalized character_name -> assigned voice name
+# In-process cache of the voice assignment store: normalized character_name -> voice name
 SELECTED_VOICES: dict = {}
 
 # Directory to store generated/cached TTS files
@@ -107,11 +117,15 @@ try:
 except Exception as e:
     print(f"[TTS] Warning: Could not create cache dir {DEFAULT_CACHE_DIR}: {e}")
     # Fallback to temp directory
-    import tempfile
     DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'rolevo_tts_cache')
     os.makedirs(DEFAULT_CACHE_DIR, exist_ok=True)
 
+# Legacy assignments file; only read, to seed the store on first start
 _SELECTED_VOICES_PATH = os.path.join(DEFAULT_CACHE_DIR, 'selected_voices.json')
+# Voice assignments shared by every worker (SQLite, one row per character)
+VOICE_STORE_PATH = os.getenv('TTS_VOICE_STORE', os.path.join(BASE_DIR, 'data', 'voice_assignments.sqlite'))
+# Seconds before the in-process cache re-reads the store (picks up other workers' manual assignments)
+VOICE_CACHE_TTL = float(os.getenv('TTS_VOICE_CACHE_TTL', 300))
 
 
 def get_available_voices(language_code=None, gender=None):
@@ -135,25 +149,97 @@ def get_available_voices(language_code=None, gender=None):
 
 
 # --- Persistence Logic ---
+# Assignments are upserted one key at a time into a small SQLite store, so
+# concurrent workers never overwrite each other's picks (the first writer for a
+# character wins and everyone else reads its row). Lookups are served from
+# SELECTED_VOICES and only touch the store on a miss or once per VOICE_CACHE_TTL.
+
+_voices_lock = threading.Lock()
+_voices_loaded_at = 0.0
+
+
+def _voice_store():
+    os.makedirs(os.path.dirname(VOICE_STORE_PATH), exist_ok=True)
+    conn = sqlite3.connect(VOICE_STORE_PATH, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS voice_assignment (
+            character_name TEXT PRIMARY KEY,
+            voice_name TEXT NOT NULL,
+            manual INTEGER NOT NULL DEFAULT 0,
+            assigned_at REAL NOT NULL
+        )
+    """)
+    return conn
+
 
 def _load_selected_voices():
-    global SELECTED_VOICES
+    """Refresh SELECTED_VOICES from the store (seeding it from selected_voices.json once)."""
+    global _voices_loaded_at
     try:
-        if os.path.exists(_SELECTED_VOICES_PATH):
-            with open(_SELECTED_VOICES_PATH, 'r', encoding='utf-8') as fh:
-                data = json.load(fh)
+        conn = _voice_store()
+        try:
+            if os.path.exists(_SELECTED_VOICES_PATH) and not conn.execute(
+                    "SELECT 1 FROM voice_assignment LIMIT 1").fetchone():
+                with open(_SELECTED_VOICES_PATH, 'r', encoding='utf-8') as fh:
+                    data = json.load(fh)
                 if isinstance(data, dict):
-                    SELECTED_VOICES.update({k: v for k, v in data.items()})
-                    debug_log(f"Loaded {len(SELECTED_VOICES)} persisted voice assignments")
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO voice_assignment (character_name, voice_name, assigned_at) "
+                        "VALUES (?, ?, ?)", [(k, v, time.time()) for k, v in data.items()])
+                    conn.commit()
+                    debug_log(f"Imported {len(data)} voice assignments from selected_voices.json")
+            rows = conn.execute("SELECT character_name, voice_name FROM voice_assignment").fetchall()
+        finally:
+            conn.close()
+        with _voices_lock:
+            SELECTED_VOICES.clear()
+            SELECTED_VOICES.update(dict(rows))
+            _voices_loaded_at = time.monotonic()
+        debug_log(f"Loaded {len(rows)} persisted voice assignments")
     except Exception as e:
         debug_log(f"Failed loading selected voices: {e}")
+        _voices_loaded_at = time.monotonic()  # keep serving the in-memory map; retry after the TTL
 
-def _save_selected_voices():
+
+def _store_voice(key: str, voice_name: str, manual: bool = False) -> str:
+    """Persist one assignment and return the voice now on record for key.
+
+    Automatic picks are insert-if-absent, so when two workers race the loser
+    adopts the winner's voice; manual assignments overwrite.
+    """
     try:
-        with open(_SELECTED_VOICES_PATH, 'w', encoding='utf-8') as fh:
-            json.dump(SELECTED_VOICES, fh, ensure_ascii=False, indent=2)
+        conn = _voice_store()
+        try:
+            if manual:
+                conn.execute("""
+                    INSERT INTO voice_assignment (character_name, voice_name, manual, assigned_at)
+                    VALUES (?, ?, 1, ?)
+                    ON CONFLICT(character_name) DO UPDATE SET
+                        voice_name = excluded.voice_name, manual = 1, assigned_at = excluded.assigned_at
+                """, (key, voice_name, time.time()))
+            else:
+                conn.execute(
+                    "INSERT OR IGNORE INTO voice_assignment (character_name, voice_name, assigned_at) "
+                    "VALUES (?, ?, ?)", (key, voice_name, time.time()))
+            conn.commit()
+            row = conn.execute("SELECT voice_name FROM voice_assignment WHERE character_name = ?",
+                               (key,)).fetchone()
+        finally:
+            conn.close()
+        if row:
+            voice_name = row[0]
     except Exception as e:
-        debug_log(f"Failed saving selected voices: {e}")
+        debug_log(f"Failed saving voice assignment for '{key}': {e}")
+    with _voices_lock:
+        SELECTED_VOICES[key] = voice_name
+    return voice_name
+
+
+def _cached_voice(key: str) -> Optional[str]:
+    if time.monotonic() - _voices_loaded_at > VOICE_CACHE_TTL:
+        _load_selected_voices()
+    return SELECTED_VOICES.get(key)
 
 _load_selected_voices()
 
@@ -174,8 +260,9 @@ def select_voice_for_character(character_name: str, gender: str = 'female', lang
     # 1. Return existing assignment (check if it matches strict requirements? No, trust persistence for stability)
     # However, if language requirement changed (e.g. English -> Hindi), we might want to re-assign?
     # For now, stick to persistence to avoid voice switching mid-convo.
-    if key in SELECTED_VOICES:
-        return SELECTED_VOICES[key]
+    existing = _cached_voice(key)
+    if existing:
+        return existing
     
     normalized_gender = gender.lower() if gender else 'female'
     if normalized_gender not in ['male', 'female']:
@@ -242,7 +329,10 @@ def select_voice_for_character(character_name: str, gender: str = 'female', lang
             if info['gender'] == normalized_gender
         ]
         
-    # 3. Find confirmed used voices
+    # 3. Find confirmed used voices (re-read the store: another worker may have assigned some)
+    _load_selected_voices()
+    if key in SELECTED_VOICES:
+        return SELECTED_VOICES[key]
     used_voices = set(SELECTED_VOICES.values())
     
     # 4. Filter for unused candidates
@@ -263,36 +353,160 @@ def select_voice_for_character(character_name: str, gender: str = 'female', lang
              # Extreme fallback
              chosen = 'Joanna' if normalized_gender == 'female' else 'Matthew'
     
-    SELECTED_VOICES[key] = chosen
-    _save_selected_voices()
-    return chosen
+    return _store_voice(key, chosen)
 
 def manual_assign_voice(character_name: str, voice_name: str):
     """Manually force an assignment."""
     if voice_name not in POLLY_VOICES_METADATA:
          # Warn but allow if it's a valid AWS voice not in our metadata list
          debug_log(f"Warning: Manually assigned voice '{voice_name}' is not in local metadata.")
-    SELECTED_VOICES[character_name.strip()] = voice_name
-    _save_selected_voices()
+    _store_voice(character_name.strip(), voice_name, manual=True)
 
 
 # --- Generation Logic ---
 
-def _make_cache_filename(voice_name: str, text: str) -> str:
+# Content-addressed TTS store shared by /make_audio, chatbot pre-generation and
+# get_or_generate_tts. Files are named by a SHA-256 of (text, voice, engine,
+# language), which is stable across processes and restarts (unlike hash()).
+# Writers synthesise into a temp file in the same directory and os.replace() it
+# into place, so concurrent workers only ever see complete files.
+TTS_KEY_VERSION = 'v1'
+
+_tts_stats_lock = threading.Lock()
+TTS_CACHE_STATS = {'hits': 0, 'misses': 0, 'errors': 0, 'coalesced': 0}
+
+
+def _count(stat: str):
+    with _tts_stats_lock:
+        TTS_CACHE_STATS[stat] += 1
+
+
+def get_tts_cache_stats() -> Dict[str, object]:
+    """Hit/miss counters for the TTS store in this process."""
+    with _tts_stats_lock:
+        stats = dict(TTS_CACHE_STATS)
+    # Coalesced requests waited on another synthesis instead of calling Polly
+    served = stats['hits'] + stats['coalesced']
+    total = served + stats['misses']
+    stats['hit_rate'] = round(served / total, 3) if total else None
+    stats['cache_dir'] = DEFAULT_CACHE_DIR
+    return stats
+
+
+def _touch_cache_entry(path: str):
+    """Tell the disk cache manager about a hit/write so LRU eviction sees it."""
+    try:
+        from app.disk_cache import touch
+    except ImportError:  # tts_service loaded standalone (scripts/generate_batch_tts.py)
+        return
+    touch(path)
+
+
+def voice_engine(voice_name: str) -> str:
+    """Polly engine used for a voice (neural unless metadata says otherwise)."""
+    return POLLY_VOICES_METADATA.get(voice_name, {}).get('engine', 'neural')
+
+
+def tts_cache_key(text: str, voice_name: str, engine: str = None, language: str = 'English') -> str:
+    engine = engine or voice_engine(voice_name)
     h = hashlib.sha256()
-    h.update((voice_name + '||' + text).encode('utf-8'))
-    return h.hexdigest() + '.mp3'
+    h.update('\x1f'.join([TTS_KEY_VERSION, voice_name, engine, language or '', text]).encode('utf-8'))
+    return h.hexdigest()
+
+
+def _make_cache_filename(voice_name: str, text: str, language: str = 'English', engine: str = None) -> str:
+    return tts_cache_key(text, voice_name, engine, language) + '.mp3'
 
-def get_cached_tts_path(voice_name: str, text: str, cache_dir: str = None) -> Optional[str]:
+
+def get_cached_tts_path(voice_name: str, text: str, cache_dir: str = None,
+                        language: str = 'English', engine: str = None) -> Optional[str]:
     cache_dir = cache_dir or DEFAULT_CACHE_DIR
-    fname = _make_cache_filename(voice_name, text)
+    fname = _make_cache_filename(voice_name, text, language, engine)
     path = os.path.join(cache_dir, fname)
     return path if os.path.exists(path) else None
 
+
+# Single-flight: concurrent requests for one cache key wait on a single synthesis.
+# Within a process a per-key lock does it; across worker processes an flock'd
+# lock file in <cache_dir>/.locks does. A waiter that times out synthesises
+# anyway, so a stuck holder can slow a line down but never block it.
+TTS_LOCK_TIMEOUT = float(os.getenv('TTS_LOCK_TIMEOUT', 60))
+
+_flight_locks = {}  # cache key -> [threading.Lock, users]
+_flight_guard = threading.Lock()
+
+
+class _Flight:
+    """Claim on one cache key; acquire() before synthesising, release() once the file is in place."""
+
+    def __init__(self, key: str, cache_dir: str):
+        self.key = key
+        self.lock_path = os.path.join(cache_dir, '.locks', key + '.lock')
+        self._entry = None
+        self._fh = None
+
+    def _unref(self):
+        with _flight_guard:
+            self._entry[1] -= 1
+            if self._entry[1] == 0:
+                _flight_locks.pop(self.key, None)
+        self._entry = None
+
+    def _lock_file(self, blocking: bool, deadline: float) -> bool:
+        os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+        while True:
+            fh = open(self.lock_path, 'a+')
+            try:
+                fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                fh.close()
+                if not blocking or time.monotonic() > deadline:
+                    return False
+                time.sleep(0.1)
+                continue
+            # The previous holder may have unlinked the file after we opened it
+            try:
+                if os.fstat(fh.fileno()).st_ino == os.stat(self.lock_path).st_ino:
+                    self._fh = fh
+                    return True
+            except FileNotFoundError:
+                pass
+            fh.close()
+
+    def acquire(self, blocking: bool = True, timeout: float = TTS_LOCK_TIMEOUT) -> bool:
+        deadline = time.monotonic() + timeout
+        with _flight_guard:
+            self._entry = _flight_locks.setdefault(self.key, [threading.Lock(), 0])
+            self._entry[1] += 1
+        thread_lock = self._entry[0]
+        if not (thread_lock.acquire(True, timeout) if blocking else thread_lock.acquire(False)):
+            self._unref()
+            return False
+        if fcntl is not None and not self._lock_file(blocking, deadline):
+            thread_lock.release()
+            self._unref()
+            return False
+        return True
+
+    def release(self):
+        if self._entry is None:
+            return
+        if self._fh is not None:
+            try:
+                os.remove(self.lock_path)
+            except OSError:
+                pass
+            self._fh.close()  # closing drops the flock
+            self._fh = None
+        self._entry[0].release()
+        self._unref()
+
+
 def get_or_generate_tts(text: str, voice_name: str = None, character_name: str = None, 
                        gender: str = 'female', language: str = 'English', cache_dir: str = None) -> str:
     """
     Main entry point for AWS Polly TTS.
+    Returns the path of the cached MP3 for (text, voice, engine, language), synthesising it on a miss.
     """
     cache_dir = cache_dir or DEFAULT_CACHE_DIR
     
@@ -304,27 +518,362 @@ def get_or_generate_tts(text: str, voice_name: str = None, character_name: str =
             voice_name = 'Joanna' if gender == 'female' else 'Matthew'
             
     # Check cache
-    cached = get_cached_tts_path(voice_name, text, cache_dir)
+    cached = get_cached_tts_path(voice_name, text, cache_dir, language)
     if cached:
+        _count('hits')
+        _touch_cache_entry(cached)
         return cached
 
-    # Generate
+    flight = _Flight(tts_cache_key(text, voice_name, language=language), cache_dir)
+    claimed = flight.acquire()
     try:
-        import tempfile
-        tmp_fd, tmp_path = tempfile.mkstemp(suffix='.mp3')
+        # Another request may have produced the file while we waited for the claim
+        cached = get_cached_tts_path(voice_name, text, cache_dir, language)
+        if cached:
+            _count('coalesced')
+            _touch_cache_entry(cached)
+            return cached
+
+        _count('misses')
+        final_path = os.path.join(cache_dir, _make_cache_filename(voice_name, text, language))
+
+        # Generate into a temp file next to the final path, then atomically rename
+        tmp_fd, tmp_path = tempfile.mkstemp(suffix='.part', dir=cache_dir)
         os.close(tmp_fd)
-        
-        generate_polly_audio(text, voice_name, tmp_path)
-        
-        # Move to cache
-        fname = _make_cache_filename(voice_name, text)
-        final_path = os.path.join(cache_dir, fname)
-        shutil.move(tmp_path, final_path)
-        return final_path
-    
-    except Exception as e:
-        debug_log(f"Generation failed: {e}")
+        try:
+            generate_polly_audio(text, voice_name, tmp_path)
+            os.replace(tmp_path, final_path)
+            _touch_cache_entry(final_path)
+            return final_path
+        except Exception as e:
+            _count('errors')
+            debug_log(f"Generation failed: {e}")
+            raise
+        finally:
+            if os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+    finally:
+        if claimed:
+            flight.release()
+
+# Streaming path: playback starts on Polly's first chunks instead of after the
+# whole file has been written. The chunks are teed into the same store entry
+# get_or_generate_tts would have produced.
+TTS_STREAM_CHUNK_SIZE = int(os.getenv('TTS_STREAM_CHUNK_SIZE', 4096))
+
+
+def open_polly_stream(text: str, voice_name: str):
+    """Start a Polly synthesis and return its AudioStream (a botocore StreamingBody).
+
+    Errors (credentials, throttling, bad voice) are raised here, before any audio is read.
+    """
+    client = get_polly_client()
+    engine = voice_engine(voice_name)
+    debug_log(f"AWS Polly TTS (stream): voice={voice_name}, text_len={len(text)}")
+    try:
+        response = client.synthesize_speech(Text=text, OutputFormat='mp3', VoiceId=voice_name, Engine=engine)
+    except ClientError as e:
+        if 'EngineNotSupported' in str(e) and engine == 'neural':
+            debug_log("Neural engine not supported, retrying with standard")
+            response = client.synthesize_speech(Text=text, OutputFormat='mp3', VoiceId=voice_name, Engine='standard')
+        else:
+            raise
+    if "AudioStream" not in response:
+        raise Exception("No AudioStream in Polly response")
+    return response['AudioStream']
+
+
+def _tee_stream_to_cache(audio_stream, final_path: str, cache_dir: str, chunk_size: int):
+    """Yield chunks from audio_stream while writing them to final_path (atomically)."""
+    tmp_fd, tmp_path = tempfile.mkstemp(suffix='.part', dir=cache_dir)
+    complete = False
+    try:
+        with os.fdopen(tmp_fd, 'wb') as fh:
+            try:
+                for chunk in audio_stream.iter_chunks(chunk_size):
+                    fh.write(chunk)
+                    yield chunk
+                complete = True
+            except GeneratorExit:
+                # Client went away mid-stream: finish writing the file so the synthesis isn't wasted
+                try:
+                    for chunk in audio_stream.iter_chunks(chunk_size):
+                        fh.write(chunk)
+                    complete = True
+                except Exception as e:
+                    debug_log(f"Could not finish cached stream after disconnect: {e}")
+                # Returning (not yielding) after GeneratorExit ends the generator cleanly
+        if complete and os.path.getsize(tmp_path) >= 100:
+            os.replace(tmp_path, final_path)
+            _touch_cache_entry(final_path)
+        else:
+            complete = False
+    finally:
+        if not complete:
+            _count('errors')
+        if os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+class _ClaimedStream:
+    """Response iterable for a streamed synthesis that holds the single-flight claim.
+
+    The WSGI server always calls close(), even if the body was never iterated,
+    so the claim is released there rather than in the generator.
+    """
+
+    def __init__(self, chunks, release=None):
+        self._chunks = chunks
+        self._release = release
+
+    def __iter__(self):
+        return self._chunks
+
+    def close(self):
+        try:
+            self._chunks.close()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+def get_tts_stream(text: str, voice_name: str, language: str = 'English', cache_dir: str = None):
+    """Cached file for a line, or a chunk generator streaming a fresh synthesis into the store.
+
+    Returns (path, None) on a cache hit and (None, chunks) on a miss. On a miss the
+    Polly request is made before returning, so synthesis errors surface to the
+    caller rather than halfway through an HTTP response. A request that finds the
+    same line already being synthesised waits for that file instead of calling
+    Polly again; chunks must be closed (the HTTP response does this).
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    cached = get_cached_tts_path(voice_name, text, cache_dir, language)
+    if cached:
+        _count('hits')
+        _touch_cache_entry(cached)
+        return cached, None
+
+    # Take the single-flight claim; if someone else holds it, wait for their file
+    flight = _Flight(tts_cache_key(text, voice_name, language=language), cache_dir)
+    claimed = flight.acquire(blocking=False) or flight.acquire()
+    cached = get_cached_tts_path(voice_name, text, cache_dir, language)
+    if cached:
+        if claimed:
+            flight.release()
+        _count('coalesced')
+        _touch_cache_entry(cached)
+        return cached, None
+
+    _count('misses')
+    try:
+        audio_stream = open_polly_stream(text, voice_name)
+    except Exception:
+        _count('errors')
+        if claimed:
+            flight.release()
         raise
+    final_path = os.path.join(cache_dir, _make_cache_filename(voice_name, text, language))
+    chunks = _tee_stream_to_cache(audio_stream, final_path, cache_dir, TTS_STREAM_CHUNK_SIZE)
+    return None, _ClaimedStream(chunks, flight.release if claimed else None)
+
+# Synthesis planner: long lines and multi-speaker turns are split into segments
+# (sentence-bounded, one voice each) that are synthesised concurrently. Every
+# segment is an ordinary store entry, so it is reused by any other line or turn
+# that contains it; the concatenated turn is cached as turn-<key>.mp3 next to
+# them. A turn's plan is saved in <cache_dir>/.turns/<key>.json so whichever
+# worker serves /turn_audio/<key>.mp3 can rebuild it.
+TTS_SEGMENT_CHARS = int(os.getenv('TTS_SEGMENT_CHARS', 1500))  # Polly rejects > 3000 characters
+TTS_SEGMENT_WORKERS = int(os.getenv('TTS_SEGMENT_WORKERS', 4))
+
+_SENTENCE_END = re.compile(r'(?<=[.!?\u0964\u3002])\s+')
+_TURN_KEY = re.compile(r'^[0-9a-f]{64}$')
+_segment_pool = None
+_segment_pool_lock = threading.Lock()
+
+
+def _get_segment_pool() -> ThreadPoolExecutor:
+    global _segment_pool
+    with _segment_pool_lock:
+        if _segment_pool is None:
+            _segment_pool = ThreadPoolExecutor(max_workers=TTS_SEGMENT_WORKERS, thread_name_prefix='tts-segment')
+        return _segment_pool
+
+
+def split_for_synthesis(text: str, max_chars: int = None) -> List[str]:
+    """Split text into chunks of whole sentences, each at most max_chars long.
+
+    A single sentence longer than max_chars is cut at the last space before the limit.
+    """
+    max_chars = max_chars or TTS_SEGMENT_CHARS
+    text = (text or '').strip()
+    if len(text) <= max_chars:
+        return [text] if text else []
+
+    chunks, current = [], ''
+    for sentence in _SENTENCE_END.split(text):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(' ', 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = ''
+        current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return [c for c in chunks if c]
+
+
+def plan_synthesis(parts, max_chars: int = None) -> List[tuple]:
+    """Turn [(text, voice_name), ...] (one entry per speaker) into the segments to synthesise."""
+    segments = []
+    for text, voice_name in parts:
+        for chunk in split_for_synthesis(text, max_chars):
+            segments.append((chunk, voice_name))
+    return segments
+
+
+def turn_cache_key(segments, language: str = 'English') -> str:
+    """Key of the concatenated audio for a planned turn (derived from its segment keys)."""
+    h = hashlib.sha256()
+    h.update('\x1f'.join([TTS_KEY_VERSION, 'turn', language or '']
+                         + [tts_cache_key(text, voice, language=language) for text, voice in segments]).encode('utf-8'))
+    return h.hexdigest()
+
+
+def save_turn_plan(parts, language: str = 'English', cache_dir: str = None) -> str:
+    """Record a turn's plan so /turn_audio can build it later; returns the turn key."""
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    segments = plan_synthesis(parts)
+    key = turn_cache_key(segments, language)
+    plan_dir = os.path.join(cache_dir, '.turns')
+    plan_path = os.path.join(plan_dir, key + '.json')
+    if not os.path.exists(plan_path):
+        os.makedirs(plan_dir, exist_ok=True)
+        tmp_fd, tmp_path = tempfile.mkstemp(suffix='.part', dir=plan_dir)
+        with os.fdopen(tmp_fd, 'w', encoding='utf-8') as fh:
+            json.dump({'language': language, 'segments': segments}, fh, ensure_ascii=False)
+        os.replace(tmp_path, plan_path)
+    return key
+
+
+def load_turn_plan(key: str, cache_dir: str = None):
+    """(segments, language) saved under key, or None for an unknown/invalid key."""
+    if not _TURN_KEY.match(key or ''):
+        return None
+    plan_path = os.path.join(cache_dir or DEFAULT_CACHE_DIR, '.turns', key + '.json')
+    try:
+        with open(plan_path, 'r', encoding='utf-8') as fh:
+            plan = json.load(fh)
+        return [tuple(seg) for seg in plan['segments']], plan.get('language', 'English')
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _strip_id3(data: bytes) -> bytes:
+    """Drop a leading ID3v2 tag so only MPEG frames are concatenated."""
+    if data[:3] == b'ID3' and len(data) > 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        return data[10 + size:]
+    return data
+
+
+def _concat_mp3(paths: List[str], output_path: str):
+    """Join MP3 files into one. Uses pydub when ffmpeg is available (it also evens out
+    sample rates between neural and standard voices), else appends the MPEG frames."""
+    try:
+        from pydub import AudioSegment
+        combined = AudioSegment.empty()
+        for path in paths:
+            combined += AudioSegment.from_mp3(path)
+        combined.export(output_path, format='mp3')
+        return
+    except Exception as e:
+        debug_log(f"pydub concat unavailable ({e}), joining MP3 frames")
+    with open(output_path, 'wb') as out:
+        for i, path in enumerate(paths):
+            with open(path, 'rb') as fh:
+                data = fh.read()
+            out.write(data if i == 0 else _strip_id3(data))
+
+
+def get_cached_turn_path(parts, language: str = 'English', cache_dir: str = None) -> Optional[str]:
+    """Path synthesize_turn() would return for parts if it is already on disk, else None."""
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    segments = plan_synthesis(parts)
+    if not segments:
+        return None
+    if len(segments) == 1:
+        text, voice_name = segments[0]
+        return get_cached_tts_path(voice_name, text, cache_dir=cache_dir, language=language)
+    path = os.path.join(cache_dir, f'turn-{turn_cache_key(segments, language)}.mp3')
+    return path if os.path.exists(path) else None
+
+
+def synthesize_turn(parts, language: str = 'English', cache_dir: str = None) -> str:
+    """Path of one MP3 for a whole turn, given [(text, voice_name), ...] in speaking order.
+
+    Segments are synthesised concurrently through get_or_generate_tts (cached and
+    single-flighted individually); a turn that plans to one segment is just that
+    segment's store entry.
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    segments = plan_synthesis(parts)
+    if not segments:
+        raise ValueError("Nothing to synthesise")
+    if len(segments) == 1:
+        text, voice_name = segments[0]
+        return get_or_generate_tts(text, voice_name=voice_name, language=language, cache_dir=cache_dir)
+
+    key = turn_cache_key(segments, language)
+    final_path = os.path.join(cache_dir, f'turn-{key}.mp3')
+    if os.path.exists(final_path):
+        _count('hits')
+        _touch_cache_entry(final_path)
+        return final_path
+
+    flight = _Flight('turn-' + key, cache_dir)
+    claimed = flight.acquire()
+    try:
+        if os.path.exists(final_path):
+            _count('coalesced')
+            _touch_cache_entry(final_path)
+            return final_path
+
+        pool = _get_segment_pool()
+        futures = [pool.submit(get_or_generate_tts, text, voice_name=voice_name,
+                               language=language, cache_dir=cache_dir)
+                   for text, voice_name in segments]
+        paths = [f.result() for f in futures]  # raises the first segment failure
+
+        tmp_fd, tmp_path = tempfile.mkstemp(suffix='.part', dir=cache_dir)
+        os.close(tmp_fd)
+        try:
+            _concat_mp3(paths, tmp_path)
+            os.replace(tmp_path, final_path)
+        finally:
+            if os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+        _touch_cache_entry(final_path)
+        debug_log(f"Built turn audio from {len(segments)} segments: {os.path.basename(final_path)}")
+        return final_path
+    finally:
+        if claimed:
+            flight.release()
 
 def generate_polly_audio(text: str, voice_name: str, output_path: str):
     """
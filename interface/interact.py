@@ -839,6 +839,13 @@ Rephrased Ideal Response: Put the rephrased response here
         # Get language code
         lang_code = language_map.get(language, 'en')
         
+        # Upload only the speech: leading/trailing silence and long gaps are trimmed locally
+        try:
+            from app.audio_vad import trim_silence
+            audio_file_path = trim_silence(audio_file_path)['path']
+        except ImportError:
+            pass
+        
         try:
             with open(audio_file_path, "rb") as audio_file:
                 transcript = self.client.audio.transcriptions.create(
@@ -0,0 +1,17 @@
+-- Migration: Job-queue columns on pf16_analysis_results
+-- Run once against the roleplay database.
+--
+-- 16PF analyses are run by a fixed pool of workers per process
+-- (app/pf16_queue.py) that claim 'pending' rows instead of a thread per trigger.
+-- A failed Persona360 call puts the row back to 'pending' with next_attempt_at
+-- set (exponential backoff) until attempts reaches PF16_MAX_ATTEMPTS.
+-- locked_by/locked_at identify the worker running a 'processing' row; rows whose
+-- lock is older than PF16_STALE_AFTER (a crashed or restarted worker) are put
+-- back in the queue.
+
+ALTER TABLE pf16_analysis_results
+    ADD COLUMN attempts INT NOT NULL DEFAULT 0,
+    ADD COLUMN next_attempt_at DATETIME NULL,
+    ADD COLUMN locked_by VARCHAR(64) NULL,
+    ADD COLUMN locked_at DATETIME NULL,
+    ADD INDEX idx_pf16_queue (status, next_attempt_at);
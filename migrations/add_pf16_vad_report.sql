@@ -0,0 +1,13 @@
+-- Migration: Silence-trimming report on pf16_analysis_results
+-- Run once against the roleplay database.
+--
+-- Before a play's audio is posted to Persona360, app/audio_vad.py drops its
+-- leading/trailing silence and shortens long gaps. These columns record what
+-- that saved per play; vad_segments maps the trimmed audio back to the original
+-- timeline ([{start, end, offset}] in seconds).
+
+ALTER TABLE pf16_analysis_results
+    ADD COLUMN vad_original_seconds DECIMAL(8,2) NULL,
+    ADD COLUMN vad_seconds_saved DECIMAL(8,2) NULL,
+    ADD COLUMN vad_bytes_saved BIGINT NULL,
+    ADD COLUMN vad_segments JSON NULL;
@@ -0,0 +1,47 @@
+-- Migration: Composite / covering indexes for the hot play-lookup paths
+-- Run once against an existing database (MySQL 8). Verify afterwards with:
+--     python scripts/explain_app_queries.py
+--
+-- play only had single-column keys (user_id, roleplay_id, cluster_id), so the
+-- per-roleplay status counts in user_cluster_view / roleplay_completion, the
+-- "latest in_progress play" lookup and the scores APIs all merged or scanned
+-- index ranges and then filesorted. InnoDB appends the primary key (id) to every
+-- secondary index, so ORDER BY id is served from the index when every column of
+-- the index is matched by equality.
+
+-- COUNT(*) ... WHERE user_id AND roleplay_id AND cluster_id AND status = ...
+-- (covering: the count never touches the clustered index)
+ALTER TABLE play
+    ADD INDEX idx_play_user_rp_cluster_status (user_id, roleplay_id, cluster_id, status);
+
+-- WHERE user_id AND roleplay_id AND status = 'in_progress' ORDER BY start_time DESC
+-- (not ORDER BY id without a status: the implicit id follows start_time, so
+-- "WHERE user_id AND roleplay_id ORDER BY id DESC" would still filesort; only
+-- the unused old_query_showreport runs that)
+ALTER TABLE play
+    ADD INDEX idx_play_user_rp_status_start (user_id, roleplay_id, status, start_time);
+
+-- COUNT(DISTINCT roleplay_id) ... WHERE user_id AND cluster_id AND status IN (...)
+-- (covering: check_all_cluster_roleplays_completed, admin_user_detail)
+ALTER TABLE play
+    ADD INDEX idx_play_user_cluster_status_rp (user_id, cluster_id, status, roleplay_id);
+
+-- /api/rolevo/scores/cluster/<id>: WHERE cluster_id AND status IN (...)
+ALTER TABLE play
+    ADD INDEX idx_play_cluster_status_end (cluster_id, status, end_time);
+
+-- /api/rolevo/scores/user/<id>: WHERE user_id AND status IN (...) ORDER BY end_time DESC
+ALTER TABLE play
+    ADD INDEX idx_play_user_status_end (user_id, status, end_time);
+
+-- 16PF status lookups: WHERE play_id ORDER BY created_at DESC
+ALTER TABLE pf16_analysis_results
+    ADD INDEX idx_pf16_play_created (play_id, created_at);
+
+-- Report / summary joins walk chathistory -> scoremaster -> scorebreakdown.
+-- Covering index so the per-play score aggregation reads only index pages.
+ALTER TABLE scorebreakdown
+    ADD INDEX idx_scorebreakdown_sm_name_score (scoremaster_id, score_name, score);
+
+ALTER TABLE scoremaster
+    ADD INDEX idx_scoremaster_ch_score (chathistory_id, overall_score);
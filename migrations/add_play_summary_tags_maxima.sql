@@ -0,0 +1,11 @@
+-- Migration: Track where play_summary's competency maxima came from
+-- Run once against the roleplay database, after create_play_summary.sql.
+--
+-- mark_play_completed writes the summary with per-turn maxima (3 per scored
+-- interaction) and rebuilds it with the roleplay's Tags-sheet maxima in the
+-- background. tags_maxima is 1 once the row carries the Tags-sheet maxima;
+-- until then build_result_payload falls back to query_showreport, and
+-- scripts/backfill_play_summary.py rebuilds rows still at 0.
+
+ALTER TABLE play_summary
+    ADD COLUMN tags_maxima TINYINT(1) NOT NULL DEFAULT 0;
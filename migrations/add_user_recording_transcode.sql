@@ -0,0 +1,13 @@
+-- Migration: Transcode job status on user_recording
+-- Run once after migrations/create_user_recording.sql.
+--
+-- Every upload is normalised by app/recording_transcode.py to a mono low-bitrate
+-- MP3 next to the original; the merge and 16PF paths only read that copy.
+-- transcode_status: queued -> running -> done | failed
+
+ALTER TABLE user_recording
+    ADD COLUMN transcode_status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    ADD COLUMN transcoded_path VARCHAR(500) NULL,
+    ADD COLUMN transcode_error TEXT NULL,
+    ADD COLUMN transcode_updated_at DATETIME NULL,
+    ADD INDEX idx_user_recording_transcode (transcode_status);
@@ -0,0 +1,28 @@
+-- Migration: Create play_summary table (materialised per-play score totals)
+-- Written by mark_play_completed (same transaction as the status update) so
+-- reports, /api/rolevo/scores/*, admin_user_detail and build_result_payload can
+-- read one row instead of re-aggregating chathistory -> scoremaster -> scorebreakdown.
+--
+-- After creating the table, populate it for existing plays with:
+--     python scripts/backfill_play_summary.py
+
+CREATE TABLE IF NOT EXISTS play_summary (
+    play_id INT NOT NULL PRIMARY KEY,
+    user_id INT NULL,
+    roleplay_id VARCHAR(100) NULL,
+    cluster_id INT NULL,
+    interaction_count INT NOT NULL DEFAULT 0,
+    scored_interaction_count INT NOT NULL DEFAULT 0,
+    total_score INT NOT NULL DEFAULT 0,
+    max_total_score INT NOT NULL DEFAULT 0,
+    avg_overall_score DECIMAL(5,2) NULL,
+    last_overall_score INT NULL,
+    -- Ordered JSON array: [{"name", "score", "count", "max_turn_score", "total_possible"}, ...]
+    competency_scores JSON NULL,
+    duration_seconds INT NULL,
+    completed_at DATETIME NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_play_summary_user (user_id),
+    INDEX idx_play_summary_cluster (cluster_id),
+    FOREIGN KEY (play_id) REFERENCES play(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
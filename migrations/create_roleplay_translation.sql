@@ -0,0 +1,36 @@
+-- Migration: Create roleplay_translation_bundle / roleplay_translation tables
+-- Pre-localised roleplays (see app/roleplay_bundles.py). After an upload every
+-- line the chatbot can show - scenario, tips, computer replies and their
+-- per-speaker segments - is machine-translated into each enabled language.
+-- Admins can override any line; the player path reads override_text when set,
+-- machine_text otherwise, instead of translating live.
+
+CREATE TABLE IF NOT EXISTS roleplay_translation_bundle (
+    roleplay_id VARCHAR(100) NOT NULL,
+    language VARCHAR(50) NOT NULL,
+    -- queued | running | ready | partial (some lines untranslated) | failed
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    total_lines INT NOT NULL DEFAULT 0,
+    translated_lines INT NOT NULL DEFAULT 0,
+    failed_lines INT NOT NULL DEFAULT 0,
+    last_error TEXT NULL,
+    started_at DATETIME NULL,
+    finished_at DATETIME NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (roleplay_id, language),
+    FOREIGN KEY (roleplay_id) REFERENCES roleplay(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS roleplay_translation (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    roleplay_id VARCHAR(100) NOT NULL,
+    language VARCHAR(50) NOT NULL,
+    source_hash CHAR(64) NOT NULL,           -- SHA-256 of source_text
+    source_text MEDIUMTEXT NOT NULL,
+    machine_text MEDIUMTEXT NULL,            -- NULL if the translator failed for this line
+    override_text MEDIUMTEXT NULL,           -- set by an admin on review
+    reviewed_at DATETIME NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_roleplay_translation (roleplay_id, language, source_hash),
+    FOREIGN KEY (roleplay_id) REFERENCES roleplay(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,24 @@
+-- Migration: Create tts_prerender_job table (whole-roleplay audio pre-render runs)
+-- One row per run of app/tts_prerender.py for a roleplay. Progress counters are
+-- updated as lines finish so any worker can report status; the audio itself is
+-- in the content-addressed TTS store, so a re-run (resume) only synthesises the
+-- lines that are still missing.
+
+CREATE TABLE IF NOT EXISTS tts_prerender_job (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    roleplay_id VARCHAR(100) NOT NULL,
+    -- queued | running | completed | failed
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    languages JSON NULL,
+    total_lines INT NOT NULL DEFAULT 0,
+    rendered_lines INT NOT NULL DEFAULT 0,   -- synthesised by this run
+    cached_lines INT NOT NULL DEFAULT 0,     -- already in the store
+    failed_lines INT NOT NULL DEFAULT 0,
+    last_error TEXT NULL,
+    started_at DATETIME NULL,
+    finished_at DATETIME NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_tts_prerender_roleplay (roleplay_id, id),
+    FOREIGN KEY (roleplay_id) REFERENCES roleplay(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
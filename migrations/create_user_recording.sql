@@ -0,0 +1,24 @@
+-- Migration: Create user_recording table (manifest of per-play voice recordings)
+-- Written by /api/upload-user-audio for every recording saved under
+-- static/user_recordings/<play_id>/. merge_audio_files_for_play,
+-- get_audio_file_for_play and the /api/16pf/*-audio endpoints read this table
+-- instead of listing and substring-matching the recordings directory.
+--
+-- Recordings uploaded before this table existed sit directly in
+-- static/user_recordings; move them into per-play directories and record them with:
+--     python scripts/backfill_user_recordings.py
+
+CREATE TABLE IF NOT EXISTS user_recording (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    play_id INT NOT NULL,
+    interaction_number INT NOT NULL DEFAULT 1,
+    -- Relative to the app static directory, e.g. user_recordings/258/user_audio_play258_int3_20250101_101500.webm
+    file_path VARCHAR(500) NOT NULL,
+    size_bytes BIGINT NOT NULL DEFAULT 0,
+    duration_ms INT NULL,
+    mime_type VARCHAR(50) NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_user_recording_play (play_id, interaction_number, id),
+    UNIQUE KEY uq_user_recording_path (file_path),
+    FOREIGN KEY (play_id) REFERENCES play(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
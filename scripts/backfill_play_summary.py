@@ -0,0 +1,42 @@
+"""
+Backfill / rebuild the play_summary table.
+
+Run after migrations/create_play_summary.sql, or any time summaries drift:
+    python scripts/backfill_play_summary.py              # completed plays without a summary,
+                                                         # or without its Tags-sheet maxima yet
+    python scripts/backfill_play_summary.py --all        # rebuild every completed play
+    python scripts/backfill_play_summary.py --play 123   # rebuild specific plays
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+# Project root
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.queries import backfill_play_summaries, rebuild_play_summary  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Rebuild play_summary rows from chathistory/scoremaster/scorebreakdown")
+    parser.add_argument("--all", action="store_true", help="Rebuild summaries that already exist too")
+    parser.add_argument("--play", type=int, action="append", help="Rebuild only this play id (repeatable)")
+    args = parser.parse_args()
+
+    if args.play:
+        failed = [pid for pid in args.play if not rebuild_play_summary(pid)]
+        print(f"Rebuilt {len(args.play) - len(failed)} play summaries, failed: {failed or 'none'}")
+        return 1 if failed else 0
+
+    rebuilt, failed = backfill_play_summaries(only_missing=not args.all)
+    print(f"Rebuilt {rebuilt} play summaries, {failed} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Move legacy flat recordings into per-play directories and record them in user_recording.
+
+Run once after migrations/create_user_recording.sql:
+    python scripts/backfill_user_recordings.py             # move + record
+    python scripts/backfill_user_recordings.py --dry-run   # only print what would happen
+
+Files directly under app/static/user_recordings named like
+user_audio_play258_int3_20250101_101500.webm are moved to
+app/static/user_recordings/258/ and get a manifest row. Files whose play id or
+interaction number cannot be parsed are left where they are and listed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import mimetypes
+import os
+import re
+import sys
+from pathlib import Path
+
+# Project root
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.queries import create_user_recording, get_user_recordings  # noqa: E402
+
+STATIC_DIR = ROOT / "app" / "static"
+RECORDINGS_DIR = STATIC_DIR / "user_recordings"
+RECORDING_EXTENSIONS = (".webm", ".mp3", ".wav", ".m4a", ".ogg")
+# user_audio_play258_int3_... (uploads) or play_258_interaction_3... (client-side names)
+NAME_PATTERN = re.compile(r"play_?(\d+)_(?:int|interaction_)(\d+)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Backfill the user_recording manifest from the flat recordings directory")
+    parser.add_argument("--dry-run", action="store_true", help="Print the plan without moving files or writing rows")
+    args = parser.parse_args()
+
+    if not RECORDINGS_DIR.is_dir():
+        print(f"No recordings directory at {RECORDINGS_DIR}")
+        return 0
+
+    moved, skipped, failed = 0, [], 0
+    known = {}  # play_id -> set of manifest paths
+    for entry in sorted(RECORDINGS_DIR.iterdir()):
+        if not entry.is_file() or entry.suffix.lower() not in RECORDING_EXTENSIONS:
+            continue
+        match = NAME_PATTERN.search(entry.name)
+        if not match:
+            skipped.append(entry.name)
+            continue
+        play_id, interaction = int(match.group(1)), int(match.group(2))
+        target = RECORDINGS_DIR / str(play_id) / entry.name
+        rel_path = target.relative_to(STATIC_DIR).as_posix()
+
+        if args.dry_run:
+            print(f"{entry.name} -> {rel_path}")
+            moved += 1
+            continue
+
+        if play_id not in known:
+            known[play_id] = {row["file_path"] for row in get_user_recordings(play_id)}
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(entry, target)
+        if rel_path not in known[play_id]:
+            mime_type = mimetypes.guess_type(entry.name)[0] or "audio/webm"
+            if create_user_recording(play_id, interaction, rel_path, target.stat().st_size,
+                                     None, mime_type) is None:
+                failed += 1
+                continue
+            known[play_id].add(rel_path)
+        moved += 1
+
+    action = "Would move" if args.dry_run else "Moved"
+    print(f"{action} {moved} recordings, {failed} failed, {len(skipped)} unrecognised")
+    for name in skipped:
+        print(f"  left in place: {name}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+Query-plan audit for the SQL embedded in app/.
+
+Walks every .py file under app/, pulls out string literals that look like
+SELECT / UPDATE / DELETE statements (f-strings included - interpolated parts
+are treated as a single %s placeholder), runs EXPLAIN for each one against the
+configured database and flags:
+
+  - full table scans   (type = ALL)
+  - filesorts          (Extra contains "Using filesort")
+  - temporary tables   (Extra contains "Using temporary")
+
+Point it at a seeded local DB, never production:
+    DB_HOST=127.0.0.1 DB_NAME=roleplay_local python scripts/explain_app_queries.py
+    python scripts/explain_app_queries.py --param 1 --only-flagged
+    python scripts/explain_app_queries.py --file app/routes.py
+
+Exit code is 1 when anything was flagged, so it can gate a CI job.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import os
+import re
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+try:
+    import mysql.connector
+    from dotenv import load_dotenv
+except ImportError:
+    print("Install dependencies: pip install mysql-connector-python python-dotenv")
+    sys.exit(1)
+
+load_dotenv()
+
+SQL_START = re.compile(r"^\s*(SELECT|UPDATE|DELETE)\b", re.IGNORECASE)
+
+
+def _literal_text(node):
+    """Return the text of a str constant / f-string node, or None."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.JoinedStr):
+        parts = []
+        for value in node.values:
+            if isinstance(value, ast.Constant) and isinstance(value.value, str):
+                parts.append(value.value)
+            else:
+                parts.append("%s")
+        return "".join(parts)
+    return None
+
+
+def extract_statements(path: Path):
+    """Yield (lineno, sql) for each SQL-looking literal in a Python file."""
+    try:
+        tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    except (SyntaxError, UnicodeDecodeError) as e:
+        print(f"[skip] {path}: {e}")
+        return
+    seen = set()
+    for node in ast.walk(tree):
+        text = _literal_text(node)
+        if not text or not SQL_START.match(text):
+            continue
+        sql = " ".join(text.split())
+        # Skip fragments that are clearly not complete statements
+        if " FROM " not in sql.upper() and not sql.upper().startswith("UPDATE"):
+            continue
+        if (node.lineno, sql) in seen:
+            continue
+        seen.add((node.lineno, sql))
+        yield node.lineno, sql
+
+
+def bind_params(sql: str, param: str) -> str:
+    """Replace DB-API placeholders with a literal so EXPLAIN can plan it."""
+    literal = param if param.isdigit() else "'" + param.replace("'", "''") + "'"
+    sql = re.sub(r"%\(\w+\)s", literal, sql)
+    return sql.replace("%s", literal)
+
+
+def explain(cur, sql: str):
+    cur.execute("EXPLAIN " + sql)
+    return cur.fetchall()
+
+
+def flag_rows(rows):
+    flags = []
+    for row in rows:
+        table = row.get("table")
+        extra = row.get("Extra") or ""
+        if row.get("type") == "ALL":
+            flags.append(f"full scan on {table} (rows={row.get('rows')})")
+        if "Using filesort" in extra:
+            flags.append(f"filesort on {table}")
+        if "Using temporary" in extra:
+            flags.append(f"temporary table on {table}")
+    return flags
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="EXPLAIN every SQL statement found in app/")
+    parser.add_argument("--file", action="append", help="Only scan this file (repeatable)")
+    parser.add_argument("--param", default="1", help="Literal substituted for %%s placeholders (default: 1)")
+    parser.add_argument("--only-flagged", action="store_true", help="Print flagged statements only")
+    args = parser.parse_args()
+
+    files = [Path(f) for f in args.file] if args.file else sorted((ROOT / "app").rglob("*.py"))
+
+    conn = mysql.connector.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        user=os.getenv('DB_USER', 'root'),
+        password=os.getenv('DB_PASSWORD'),
+        database=os.getenv('DB_NAME', 'roleplay')
+    )
+    cur = conn.cursor(dictionary=True)
+
+    total = flagged = failed = 0
+    for path in files:
+        for lineno, sql in extract_statements(path):
+            total += 1
+            where = f"{path.relative_to(ROOT) if path.is_absolute() else path}:{lineno}"
+            try:
+                rows = explain(cur, bind_params(sql, args.param))
+            except mysql.connector.Error as e:
+                failed += 1
+                if not args.only_flagged:
+                    print(f"[error] {where}: {e.msg}\n        {sql[:160]}")
+                continue
+            flags = flag_rows(rows)
+            if flags:
+                flagged += 1
+                print(f"[FLAG] {where}\n        {sql[:200]}")
+                for f in flags:
+                    print(f"        -> {f}")
+            elif not args.only_flagged:
+                print(f"[ok]   {where}")
+
+    cur.close()
+    conn.close()
+
+    print("=" * 60)
+    print(f"Statements: {total}  flagged: {flagged}  could not explain: {failed}")
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Offline Persona360 stand-in for load and regression testing of the 16PF path.
+
+Exposes:
+  POST /predict    same multipart request as the real API (file, mode, age, gender);
+                   answers {"predictions": {"A": 6, ..., "Q4": 7}, ...} like the real
+                   API, which Persona360Service._parse_response maps to the 16 factors
+  GET  /_stats     requests served, errors injected, average latency of successful answers
+  POST /_config    change latency / error injection while a benchmark runs (JSON body
+                   with any of the option names below, e.g. {"error_rate": 0.2})
+  GET  /health
+
+Scores are derived from a hash of the uploaded bytes (plus age/gender), so the
+same recording always gets the same profile and regression runs are stable.
+
+Latency is latency + latency_per_mb * upload size + uniform jitter. Error
+injection: error_rate answers error_status, hang_rate sleeps hang_seconds before
+answering (past PERSONA360_TIMEOUT that looks like an upstream timeout) and
+bad_json_rate answers 200 with a body that is not JSON.
+
+Run: python scripts/mock_persona360.py --latency 2 --latency-per-mb 1 --error-rate 0.1
+Then set PERSONA360_API_URL=http://127.0.0.1:8290/predict and run plays / the
+16PF queue / report generation as usual.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Project root
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+try:
+    from flask import Flask, request, jsonify
+except ImportError:
+    print("Install Flask: pip install flask")
+    sys.exit(1)
+
+app = Flask(__name__)
+PORT = 8290
+HOST = "0.0.0.0"
+
+FACTOR_CODES = ["A", "B", "C", "E", "F", "G", "H", "I", "L", "M", "N", "O", "Q1", "Q2", "Q3", "Q4"]
+
+CONFIG = {
+    "latency": 0.5,          # seconds per request
+    "latency_per_mb": 0.5,   # extra seconds per MB uploaded
+    "jitter": 0.2,           # up to this many extra seconds, uniformly
+    "error_rate": 0.0,
+    "error_status": 503,
+    "hang_rate": 0.0,
+    "hang_seconds": 300.0,
+    "bad_json_rate": 0.0,
+}
+
+_lock = threading.Lock()
+STATS = {"requests": 0, "ok": 0, "errors": 0, "hangs": 0, "bad_json": 0, "bytes": 0, "latency_total": 0.0}
+
+
+def _count(stat: str, amount: float = 1) -> None:
+    with _lock:
+        STATS[stat] += amount
+
+
+def sten_scores(data: bytes, age: str, gender: str) -> dict[str, int]:
+    """Deterministic sten scores (1-10, centred on 5-6) for an upload."""
+    seed = hashlib.sha256(data + f"|{age}|{gender}".encode()).digest()
+    rng = random.Random(seed)
+    return {code: max(1, min(10, round(rng.gauss(5.5, 1.8)))) for code in FACTOR_CODES}
+
+
+@app.route("/predict", methods=["POST"])
+def predict():
+    """Mock Persona360 endpoint: 16PF prediction from an audio/video upload."""
+    _count("requests")
+    upload = request.files.get("file")
+    if upload is None:
+        _count("errors")
+        return jsonify({"detail": [{"loc": ["body", "file"], "msg": "field required"}]}), 422
+    mode = request.form.get("mode", "audio")
+    if mode not in ("audio", "video", "multimodal"):
+        _count("errors")
+        return jsonify({"detail": f"Unsupported mode: {mode}"}), 422
+    data = upload.read()
+    _count("bytes", len(data))
+
+    with _lock:
+        config = dict(CONFIG)
+    roll = random.random()
+    if roll < config["hang_rate"]:
+        _count("hangs")
+        time.sleep(config["hang_seconds"])
+    delay = config["latency"] + config["latency_per_mb"] * len(data) / (1024 * 1024) \
+        + random.uniform(0, config["jitter"])
+    time.sleep(delay)
+
+    roll = random.random()
+    if roll < config["error_rate"]:
+        _count("errors")
+        return jsonify({"detail": "Injected error"}), int(config["error_status"])
+    if roll < config["error_rate"] + config["bad_json_rate"]:
+        _count("bad_json")
+        return "<html>upstream error</html>", 200, {"Content-Type": "application/json"}
+
+    _count("ok")
+    _count("latency_total", delay)  # avg_latency is over successful answers only
+    return jsonify({
+        "predictions": sten_scores(data, request.form.get("age", ""), request.form.get("gender", "")),
+        "mode": mode,
+        "filename": upload.filename,
+        "bytes": len(data),
+    }), 200
+
+
+@app.route("/_config", methods=["GET", "POST"])
+def config():
+    if request.method == "POST":
+        changes = request.get_json(force=True, silent=True) or {}
+        unknown = sorted(set(changes) - set(CONFIG))
+        if unknown:
+            return jsonify({"success": False, "error": f"Unknown options: {', '.join(unknown)}"}), 400
+        with _lock:
+            CONFIG.update({key: float(value) for key, value in changes.items()})
+    with _lock:
+        return jsonify(dict(CONFIG)), 200
+
+
+@app.route("/_stats", methods=["GET"])
+def stats():
+    with _lock:
+        data = dict(STATS)
+    data["avg_latency"] = round(data.pop("latency_total") / data["ok"], 3) if data["ok"] else None
+    return jsonify(data), 200
+
+
+@app.route("/health", methods=["GET"])
+def health():
+    return jsonify({"status": "ok", "mock": "persona360"}), 200
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline Persona360 stand-in")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    for key, value in CONFIG.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=float, default=value)
+    args = parser.parse_args()
+    CONFIG.update({key: getattr(args, key) for key in CONFIG})
+
+    print(f"Mock Persona360: http://{args.host}:{args.port}")
+    print("  POST /predict   GET /_stats   POST /_config")
+    print(f"  {CONFIG}")
+    print(f"\nSet PERSONA360_API_URL=http://127.0.0.1:{args.port}/predict\n")
+    app.run(host=args.host, port=args.port, debug=False, use_reloader=False, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Pre-render (or resume pre-rendering) the fixed audio for one or more roleplays:
+the opening scenario and the timeout reply, in every configured language. The
+computer's replies are rephrased per play by the LLM, so they are synthesised
+when played and are not part of a pre-render.
+
+Runs the same job as the admin "Pre-render audio" button, in the foreground:
+    python scripts/prerender_roleplay_audio.py RP_ABC123
+    python scripts/prerender_roleplay_audio.py RP_ABC123 --language English --language Hindi
+    python scripts/prerender_roleplay_audio.py RP_ABC123 --report     # completeness only, no synthesis
+
+Lines already in static/generated_tts are skipped, so re-running after a failure
+picks up where the previous run stopped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Project root
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.queries import create_prerender_job  # noqa: E402
+from app.tts_prerender import prerender_report, roleplay_languages, run_prerender  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Pre-render the fixed TTS audio (scenario, timeout replies) for whole roleplays")
+    parser.add_argument("roleplay_ids", nargs="+", help="Roleplay id(s)")
+    parser.add_argument("--language", action="append", help="Only this language (repeatable); default: roleplay config")
+    parser.add_argument("--report", action="store_true", help="Print the completeness report without synthesising")
+    args = parser.parse_args()
+
+    exit_code = 0
+    for roleplay_id in args.roleplay_ids:
+        if args.report:
+            report = prerender_report(roleplay_id, args.language)
+            print(json.dumps(report, indent=2, ensure_ascii=False))
+            if report["complete"] != 1:
+                exit_code = 1
+            continue
+
+        languages = args.language or roleplay_languages(roleplay_id)
+        job_id = create_prerender_job(roleplay_id, languages)
+        counts = run_prerender(roleplay_id, job_id, languages)
+        print(f"{roleplay_id}: {counts} (job {job_id})")
+        if counts.get("failed_lines") or counts.get("error"):
+            exit_code = 1
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+Pre-seed the translation memory used by translate_text().
+
+Import curated translations (a JSON list of {"source", "language", "translation"}
+objects or a CSV with those columns); they take precedence over machine ones:
+    python scripts/seed_translation_memory.py --file hindi_overrides.csv
+
+Warm the memory for whole roleplays by translating every line the chatbot can
+show, so the first player does not wait on the translator:
+    python scripts/seed_translation_memory.py --roleplay RP_ABC123 --language Hindi
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import sys
+from pathlib import Path
+
+# Project root
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.translation_memory import get_translation_stats, seed  # noqa: E402
+
+
+def load_entries(path: Path) -> list[tuple[str, str, str]]:
+    if path.suffix.lower() == ".csv":
+        with path.open(newline="", encoding="utf-8") as fh:
+            rows = list(csv.DictReader(fh))
+    else:
+        rows = json.loads(path.read_text(encoding="utf-8"))
+    return [(row["source"], row["language"], row["translation"]) for row in rows]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Pre-seed the translation memory")
+    parser.add_argument("--file", type=Path, action="append", default=[], help="Curated translations (.json or .csv)")
+    parser.add_argument("--roleplay", action="append", default=[], help="Roleplay id to warm (repeatable)")
+    parser.add_argument("--language", action="append", help="Only this language (repeatable); default: roleplay config")
+    args = parser.parse_args()
+    if not args.file and not args.roleplay:
+        parser.error("nothing to do: pass --file and/or --roleplay")
+
+    for path in args.file:
+        print(f"{path}: {seed(load_entries(path))} translations imported")
+
+    if args.roleplay:
+        # Walking the roleplay's audio lines translates each of them through translate_text
+        from app.tts_prerender import roleplay_audio_lines, roleplay_languages
+
+        for roleplay_id in args.roleplay:
+            languages = [lang for lang in (args.language or roleplay_languages(roleplay_id)) if lang != "English"]
+            lines = roleplay_audio_lines(roleplay_id, languages) if languages else []
+            print(f"{roleplay_id}: {len(lines)} lines in {', '.join(languages) or 'no non-English language'}")
+
+    print(json.dumps(get_translation_stats(), indent=2))
+    return 0 if get_translation_stats()["translator_errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())